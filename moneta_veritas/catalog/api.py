@@ -0,0 +1,356 @@
+# catalog/api.py
+"""
+JSON API каталога только для чтения: /api/coins/, /api/banknotes/,
+/api/news/ и /api/references/.
+
+Списки понимают те же параметры фильтров и сортировки, что и HTML-списки
+(catalog/filters.py), и листаются курсором (catalog/pagination.py).
+Параметр fields=name,year,image оставляет в ответе только эти поля, и из
+базы читаются только нужные для них колонки.
+
+Каждый ответ несет ETag. У списка он строится из поколений моделей в кеше
+(catalog/page_cache.py), фильтров и курсора, без запросов к базе: подсчет
+по всей выборке на каждой странице свел бы на нет курсорную пагинацию.
+Деталь берет ETag и Last-Modified из updated_at записи. Если клиент
+прислал совпадающий If-None-Match (для детали - и If-Modified-Since),
+возвращается 304 без выборки и сериализации объектов. У списков
+Last-Modified нет: после удаления или снятия с публикации самое позднее
+updated_at не растет, и If-Modified-Since дал бы устаревший 304.
+Отдаются только опубликованные записи, поэтому ответ не зависит от
+пользователя.
+"""
+import hashlib
+from calendar import timegm
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views import View
+
+from . import reference
+from .filters import get_filterset
+from .models import Banknote, Category, Coin, Country, Material, Mint, News
+from .page_cache import get_generations
+from .pagination import CursorPaginator, InvalidCursor
+
+# Меняется при несовместимом изменении формата ответов
+API_VERSION = 1
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class ApiError(Exception):
+    """Некорректный запрос: отдается клиенту как 400"""
+
+
+class ApiField:
+    """Поле ответа: колонки, которые нужно прочитать, и способ получить значение"""
+
+    def __init__(self, columns, getter):
+        self.columns = columns
+        self.getter = getter
+
+    def get(self, obj, request):
+        return self.getter(obj, request)
+
+
+def attribute(name):
+    return ApiField((name,), lambda obj, request: getattr(obj, name))
+
+
+def reference_title(name, model):
+    # Названия справочников берутся из кеша в памяти, без JOIN
+    column = f'{name}_id'
+
+    def getter(obj, request):
+        row = reference.get_map(model).get(getattr(obj, column))
+        return row.title if row is not None else None
+
+    return ApiField((column,), getter)
+
+
+def image_url(name='image'):
+    def getter(obj, request):
+        image = getattr(obj, name)
+        return request.build_absolute_uri(image.url) if image else None
+
+    return ApiField((name,), getter)
+
+
+ITEM_FIELDS = {
+    'id': ApiField(('catalog_entry',), lambda obj, request: obj.catalog_entry_id),
+    'name': attribute('name'),
+    'denomination': attribute('denomination'),
+    'currency': attribute('currency'),
+    'year': attribute('year'),
+    'country': reference_title('country', Country),
+    'category': reference_title('category', Category),
+    'description': attribute('description'),
+    'image': image_url(),
+    'author': ApiField(
+        ('author__username',),
+        lambda obj, request: obj.author.username if obj.author_id else None
+    ),
+    'url': ApiField(
+        ('catalog_entry',),
+        lambda obj, request: request.build_absolute_uri(obj.get_absolute_url())
+    ),
+    'created_at': attribute('created_at'),
+    'updated_at': attribute('updated_at'),
+}
+
+COIN_FIELDS = {
+    **ITEM_FIELDS,
+    'material': reference_title('material', Material),
+    'mint': reference_title('mint', Mint),
+    'weight': attribute('weight'),
+    'diameter': attribute('diameter'),
+}
+
+BANKNOTE_FIELDS = {
+    **ITEM_FIELDS,
+    'serial_number': attribute('serial_number'),
+    'width': attribute('width'),
+    'height': attribute('height'),
+}
+
+NEWS_FIELDS = {
+    'id': attribute('pk'),
+    'title': attribute('title'),
+    'content': attribute('content'),
+    'image': image_url(),
+    'author': ApiField(('author__username',), lambda obj, request: obj.author.username),
+    'url': ApiField(
+        (),
+        lambda obj, request: request.build_absolute_uri(reverse('catalog:news_detail', args=[obj.pk]))
+    ),
+    'created_at': attribute('created_at'),
+    'updated_at': attribute('updated_at'),
+}
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr((API_VERSION, *parts)).encode()).hexdigest())
+
+
+class ApiView(View):
+    """Базовое представление API: условный GET и выбор полей"""
+    http_method_names = ['get', 'head', 'options']
+    fields = {}
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return self.respond(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=400, json_dumps_params={'ensure_ascii': False})
+
+    def respond(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def get_fields(self):
+        """Запрошенные поля (?fields=a,b) в порядке объявления"""
+        requested = self.request.GET.get('fields')
+        if not requested:
+            return list(self.fields)
+        names = {name.strip() for name in requested.split(',') if name.strip()}
+        unknown = names - set(self.fields)
+        if unknown:
+            raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+        return [name for name in self.fields if name in names]
+
+    def load_only(self, queryset, names, extra=()):
+        """Ограничивает выборку колонками запрошенных полей"""
+        columns = {'pk', *extra}
+        for name in names:
+            columns.update(self.fields[name].columns)
+        related = {column.split('__')[0] for column in columns if '__' in column}
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name].get(obj, self.request) for name in names}
+
+    def conditional(self, etag, last_modified=None):
+        """Ответ 304/412, если клиент уже получил эту версию"""
+        timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+        response = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            self.set_validators(response, etag, last_modified)
+        return response
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+        # Кеш клиента обязан перепроверять ответ, это дешево благодаря 304
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def render(self, data, etag, last_modified=None):
+        response = JsonResponse(data, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+        return self.set_validators(response, etag, last_modified)
+
+
+class ListApiView(ApiView):
+    """Список опубликованных записей с курсорной пагинацией"""
+    model = None
+    # Модели, изменение которых меняет ответ (поле author - имя пользователя)
+    dependencies = ('user',)
+
+    def get_queryset(self):
+        return self.model.objects.filter(is_published=True)
+
+    def get_ordering(self):
+        return '-created_at'
+
+    def get_etag_parts(self):
+        return ()
+
+    def get_page_size(self):
+        try:
+            size = int(self.request.GET.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ApiError('limit должен быть числом')
+        return min(max(size, 1), MAX_PAGE_SIZE)
+
+    def get_cursor_url(self, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params['cursor'] = cursor
+        return self.request.build_absolute_uri(f'?{params.urlencode()}')
+
+    def respond(self, request, *args, **kwargs):
+        names = self.get_fields()
+        page_size = self.get_page_size()
+        queryset = self.get_queryset()
+        ordering = self.get_ordering()
+
+        # Версия выборки: поколения моделей сбрасываются сигналами при любом
+        # сохранении и удалении (catalog/signals.py)
+        generations = get_generations((self.model._meta.model_name, *self.dependencies))
+        etag = make_etag(
+            self.model._meta.label, generations, names, page_size,
+            ordering, request.GET.get('cursor'), *self.get_etag_parts()
+        )
+        # Без Last-Modified: у удаления нет своего updated_at
+        not_modified = self.conditional(etag)
+        if not_modified is not None:
+            return not_modified
+
+        field = ordering.lstrip('-')
+        extra = (field,) if field in {f.name for f in self.model._meta.concrete_fields} else ()
+        paginator = CursorPaginator(self.load_only(queryset, names, extra), page_size, ordering)
+        try:
+            page = paginator.page(request.GET.get('cursor'))
+        except InvalidCursor:
+            raise ApiError('Некорректный курсор')
+        data = {
+            'results': [self.serialize(obj, names) for obj in page],
+            'next': self.get_cursor_url(page.next_cursor),
+            'previous': self.get_cursor_url(page.previous_cursor),
+        }
+        return self.render(data, etag)
+
+
+class DetailApiView(ApiView):
+    """Одна опубликованная запись"""
+    model = None
+    lookup = 'pk'
+
+    def get_queryset(self):
+        return self.model.objects.filter(is_published=True, **{self.lookup: self.kwargs['pk']})
+
+    def respond(self, request, *args, **kwargs):
+        names = self.get_fields()
+        queryset = self.get_queryset()
+        # Для проверки версии достаточно одной колонки
+        last_modified = queryset.values_list('updated_at', flat=True).first()
+        if last_modified is None:
+            raise Http404
+        etag = make_etag(self.model._meta.label, kwargs['pk'], last_modified, names, reference.get_version())
+        not_modified = self.conditional(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        obj = self.load_only(queryset, names).first()
+        if obj is None:
+            raise Http404
+        return self.render(self.serialize(obj, names), etag, last_modified)
+
+
+class ItemListApiView(ListApiView):
+    """Монеты или банкноты с фильтрами как в HTML-списках"""
+
+    @property
+    def filterset(self):
+        if not hasattr(self, '_filterset'):
+            self._filterset = get_filterset(self.model, self.request.GET)
+        return self._filterset
+
+    def get_queryset(self):
+        return self.filterset.filter(super().get_queryset())
+
+    def get_ordering(self):
+        return self.filterset.ordering
+
+    def get_etag_parts(self):
+        # Названия справочников входят в ответ
+        return self.filterset.signature(), reference.get_version()
+
+
+class CoinListApiView(ItemListApiView):
+    model = Coin
+    fields = COIN_FIELDS
+
+
+class BanknoteListApiView(ItemListApiView):
+    model = Banknote
+    fields = BANKNOTE_FIELDS
+
+
+class CoinDetailApiView(DetailApiView):
+    model = Coin
+    fields = COIN_FIELDS
+    lookup = 'catalog_entry_id'
+
+
+class BanknoteDetailApiView(DetailApiView):
+    model = Banknote
+    fields = BANKNOTE_FIELDS
+    lookup = 'catalog_entry_id'
+
+
+class NewsListApiView(ListApiView):
+    model = News
+    fields = NEWS_FIELDS
+
+
+class NewsDetailApiView(DetailApiView):
+    model = News
+    fields = NEWS_FIELDS
+
+
+class ReferenceApiView(ApiView):
+    """Справочники целиком из кеша в памяти; версия - счетчик справочников"""
+    tables = {
+        'categories': (Category, ('id', 'title')),
+        'countries': (Country, ('id', 'title')),
+        'materials': (Material, ('id', 'title')),
+        'mints': (Mint, ('id', 'title', 'country_id')),
+    }
+
+    def respond(self, request, *args, **kwargs):
+        etag = make_etag('references', reference.get_version())
+        not_modified = self.conditional(etag)
+        if not_modified is not None:
+            return not_modified
+        data = {
+            name: [{column: getattr(row, column) for column in columns} for row in reference.get_table(model)]
+            for name, (model, columns) in self.tables.items()
+        }
+        return self.render(data, etag)
@@ -0,0 +1,14 @@
+from django.urls import path
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('coins/', api.CoinListApiView.as_view(), name='coin_list'),
+    path('coins/<int:pk>/', api.CoinDetailApiView.as_view(), name='coin_detail'),
+    path('banknotes/', api.BanknoteListApiView.as_view(), name='banknote_list'),
+    path('banknotes/<int:pk>/', api.BanknoteDetailApiView.as_view(), name='banknote_detail'),
+    path('news/', api.NewsListApiView.as_view(), name='news_list'),
+    path('news/<int:pk>/', api.NewsDetailApiView.as_view(), name='news_detail'),
+    path('references/', api.ReferenceApiView.as_view(), name='references'),
+]
@@ -0,0 +1,191 @@
+# catalog/async_views.py
+"""
+Асинхронные версии читающих страниц каталога для ASGI.
+
+Под ASGI запросы направляются в moneta_veritas/urls_async.py (см.
+moneta_veritas/middleware.py), где списки, детальные страницы и новости
+обслуживаются этими представлениями, а под WSGI работают обычные
+из catalog/views.py. Контекст шаблонов у обоих вариантов одинаковый.
+
+Запросы выборки идут через асинхронный API ORM (aget, acount,
+async for); поиск по FTS5 - часть того же запроса (search_queryset
+только строит queryset). Синхронная работа - отрисовка шаблона,
+фасеты и справочники с их кешами - явно выносится в поток через
+sync_to_async, чтобы не блокировать цикл событий.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404
+from django.shortcuts import render
+from django.utils.decorators import method_decorator
+from django.views import View
+
+from . import reference, search
+from .facets import get_facets
+from .filters import get_filterset
+from .mixins import CursorPaginationMixin, published_or_own
+from .models import Banknote, CatalogEntry, Coin, Country, Material, Mint, News
+from .page_cache import cache_anonymous_page
+from .pagination import CursorPage, CursorPaginator, InvalidCursor
+from .views import visible_entries
+
+# Шаблоны могут обращаться к ORM (request.user, связи), поэтому рисуются в потоке
+arender = sync_to_async(render)
+
+
+class AsyncTemplateView(View):
+    """Основа async-представлений: шаблон рисуется вне цикла событий"""
+    template_name = None
+
+    async def render(self, context):
+        context.setdefault('view', self)
+        return await arender(self.request, self.template_name, context)
+
+
+class AsyncListView(AsyncTemplateView):
+    """Список с постраничной навигацией, как ListView"""
+    context_object_name = 'object_list'
+    paginate_by = None
+    page_kwarg = 'page'
+
+    async def get_queryset(self):
+        raise NotImplementedError
+
+    async def get_extra_context(self, queryset):
+        return {}
+
+    async def paginate_queryset(self, queryset, page_size):
+        paginator = Paginator(queryset, page_size)
+        # Счетчик заранее: Paginator сам посчитал бы его синхронно
+        paginator.count = await queryset.acount()
+        page = self.request.GET.get(self.page_kwarg) or 1
+        try:
+            page_number = int(page)
+        except ValueError:
+            if page != 'last':
+                raise Http404('Некорректный номер страницы')
+            page_number = paginator.num_pages
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage as error:
+            raise Http404(str(error))
+        page.object_list = [obj async for obj in page.object_list]
+        return paginator, page
+
+    def get_page_context(self, paginator, page):
+        return {
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            self.context_object_name: page.object_list,
+        }
+
+    async def get(self, request, *args, **kwargs):
+        queryset = await self.get_queryset()
+        paginator, page = await self.paginate_queryset(queryset, self.paginate_by)
+        context = self.get_page_context(paginator, page)
+        context.update(await self.get_extra_context(queryset))
+        return await self.render(context)
+
+
+class AsyncItemListView(CursorPaginationMixin, AsyncListView):
+    """Список предметов с фильтрами, как FilteredListMixin + ListView"""
+    model = None
+    paginate_by = 12
+    reference_tables = {'countries': Country}
+
+    async def get_queryset(self):
+        user = await self.request.auser()
+        self.filterset = get_filterset(self.model, self.request.GET)
+        # Поиск присоединяет индекс FTS5 к запросу, queryset строится без обращения к базе
+        queryset = self.filterset.apply(published_or_own(self.model.objects.all(), user))
+        self.ordering_key = self.filterset.ordering
+        return self.model.card_queryset(queryset)
+
+    async def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return await super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, self.ordering_key)
+        try:
+            page = await paginator.apage(self.request.GET.get(self.cursor_param))
+        except InvalidCursor:
+            page = await paginator.apage()
+        return paginator, page
+
+    def get_page_context(self, paginator, page):
+        context = super().get_page_context(paginator, page)
+        if isinstance(page, CursorPage):
+            context['cursor_mode'] = True
+            context['next_page_url'] = self.get_cursor_url(page.next_cursor)
+            context['previous_page_url'] = self.get_cursor_url(page.previous_cursor)
+        return context
+
+    def get_sync_context(self, queryset, user):
+        # Фасеты и справочники работают с кешем и базой синхронно
+        context = {
+            'filterset': self.filterset,
+            'search_params': self.filterset.values(),
+            'facets': get_facets(queryset, self.filterset, user),
+        }
+        for name, model in self.reference_tables.items():
+            context[name] = reference.get_table(model)
+        return context
+
+    async def get_extra_context(self, queryset):
+        user = await self.request.auser()
+        return await sync_to_async(self.get_sync_context)(queryset, user)
+
+
+@method_decorator(cache_anonymous_page('coin', 'country', 'material', 'mint', 'category', 'user'), name='get')
+class CoinListView(AsyncItemListView):
+    model = Coin
+    template_name = 'catalog/coin_list.html'
+    context_object_name = 'coin_list'
+    reference_tables = {'countries': Country, 'materials': Material, 'mints': Mint}
+
+
+@method_decorator(cache_anonymous_page('banknote', 'country', 'category', 'user'), name='get')
+class BanknoteListView(AsyncItemListView):
+    model = Banknote
+    template_name = 'catalog/banknote_list.html'
+    context_object_name = 'banknote_list'
+
+
+class CatalogDetailView(AsyncTemplateView):
+    template_name = 'catalog/detail.html'
+
+    async def get(self, request, *args, **kwargs):
+        user = await request.auser()
+        try:
+            entry = await visible_entries(user).aget(pk=kwargs.get('pk'))
+        except CatalogEntry.DoesNotExist:
+            raise Http404('Предмет не найден')
+        item = entry.get_item()
+        section = 'coin' if isinstance(item, Coin) else 'banknote'
+        return await self.render({'object': item, 'item': item, section: item})
+
+
+@method_decorator(cache_anonymous_page('news', 'user'), name='get')
+class NewsListView(AsyncListView):
+    template_name = 'catalog/news_list.html'
+    context_object_name = 'news_list'
+    paginate_by = 10
+
+    async def get_queryset(self):
+        queryset = News.objects.filter(is_published=True)
+        search_query = self.request.GET.get('q')
+        if search_query:
+            queryset = search.search_queryset(queryset, search_query)
+        return queryset.order_by('-created_at')
+
+
+class NewsDetailView(AsyncTemplateView):
+    template_name = 'catalog/news_detail.html'
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            news = await News.objects.filter(is_published=True).select_related('author').aget(pk=kwargs.get('pk'))
+        except News.DoesNotExist:
+            raise Http404('Новость не найдена')
+        return await self.render({'object': news, 'news': news})
@@ -0,0 +1,219 @@
+# catalog/benchmarks.py
+"""
+Набор замеров для всех страниц каталога, коллекций и главной:
+python manage.py run_benchmarks --sizes 100,1000,10000
+
+Для каждого размера создается отдельная тестовая база, заполняется
+генератором (catalog/synthetic.py) с фиксированным seed, после чего
+каждый URL из BENCHMARK_URLCONFS запрашивается несколько раз с пустыми
+кешами. Записываются медианная задержка и число SQL-запросов.
+
+База SQLite для замеров - файл во временном каталоге, а не база в памяти,
+как у тестов: в задержку входят чтение с диска и журнал (профиль из
+moneta_veritas/database.py). Кеш на время замеров - отдельный
+BENCHMARK_CACHES: fetch() очищает его перед каждым запросом и не должен
+трогать кеш, с которым работает сайт.
+
+Результаты сравниваются с базовым файлом (benchmarks/baseline.json):
+рост числа запросов - регрессия всегда, рост задержки - если он больше
+допуска. Новый базовый файл: run_benchmarks --update-baseline.
+"""
+import json
+import statistics
+import time
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+
+from usercollections.models import UserCollectionItem
+
+from . import reference
+from .models import Banknote, Coin, Country, News
+from .synthetic import SyntheticCatalog
+
+User = get_user_model()
+
+# Модули маршрутов, все страницы которых должны быть в наборе
+BENCHMARK_URLCONFS = ('catalog.urls', 'usercollections.urls', 'homepage.urls')
+
+# Кеш на время замеров: свой LocMem, а не настроенный в CACHES
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'moneta_veritas.instrumentation.InstrumentedLocMemCache',
+        'LOCATION': 'run-benchmarks',
+    }
+}
+
+DEFAULT_SIZES = (100, 1000)
+DEFAULT_REPEAT = 5
+
+# Допустимый рост задержки: доля от базовой и абсолютный минимум (шум таймера)
+DEFAULT_TOLERANCE = 0.5
+MIN_LATENCY_DELTA_MS = 5.0
+
+# Адрес вне INTERNAL_IPS, чтобы debug toolbar не влиял на замеры
+REMOTE_ADDR = '192.0.2.1'
+
+
+class Case:
+    """Как запросить страницу: аргументы URL, GET-параметры, нужен ли вход"""
+
+    def __init__(self, kwargs=None, params=None, login=False):
+        self.kwargs = kwargs or (lambda data: {})
+        self.params = params or (lambda data: {})
+        self.login = login
+
+
+CASES = {
+    'homepage:index': Case(),
+    'catalog:catalog_list': Case(),
+    'catalog:catalog_detail': Case(kwargs=lambda data: {'pk': data.coin.catalog_entry_id}),
+    'catalog:coin_list': Case(),
+    'catalog:coin_create': Case(login=True),
+    'catalog:coin_edit': Case(kwargs=lambda data: {'pk': data.own_coin.pk}, login=True),
+    'catalog:coin_delete': Case(kwargs=lambda data: {'pk': data.own_coin.pk}, login=True),
+    'catalog:banknote_list': Case(),
+    'catalog:banknote_create': Case(login=True),
+    'catalog:banknote_edit': Case(kwargs=lambda data: {'pk': data.own_banknote.pk}, login=True),
+    'catalog:banknote_delete': Case(kwargs=lambda data: {'pk': data.own_banknote.pk}, login=True),
+    # Инкрементальная выгрузка: только измененное после последнего изменения
+    'catalog:catalog_export': Case(
+        kwargs=lambda data: {'item_type': 'coins', 'fmt': 'csv'},
+        params=lambda data: {'since': data.since},
+    ),
+    'catalog:news_list': Case(),
+    'catalog:news_detail': Case(kwargs=lambda data: {'pk': data.news.pk}),
+    'catalog:news_create': Case(login=True),
+    'catalog:news_edit': Case(kwargs=lambda data: {'pk': data.news.pk}, login=True),
+    'catalog:news_delete': Case(kwargs=lambda data: {'pk': data.news.pk}, login=True),
+    'usercollections:my_collection': Case(login=True),
+    'usercollections:add_to_collection': Case(login=True),
+    'usercollections:add_item': Case(
+        kwargs=lambda data: {'item_type': 'coin', 'item_id': data.coin.pk},
+        login=True,
+    ),
+    'usercollections:edit_item': Case(kwargs=lambda data: {'pk': data.collection_item.pk}, login=True),
+    'usercollections:remove_item': Case(kwargs=lambda data: {'pk': data.collection_item.pk}, login=True),
+}
+
+
+def collect_url_names(urlconfs=BENCHMARK_URLCONFS):
+    """Полные имена маршрутов (namespace:name) из модулей urls"""
+    names = []
+
+    def walk(patterns, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, pattern.namespace or namespace)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                names.append(f'{namespace}:{pattern.name}' if namespace else pattern.name)
+
+    for urlconf in urlconfs:
+        module = import_module(urlconf)
+        walk(module.urlpatterns, getattr(module, 'app_name', None))
+    return names
+
+
+def missing_cases(urlconfs=BENCHMARK_URLCONFS):
+    """Маршруты, для которых не описан Case"""
+    return [name for name in collect_url_names(urlconfs) if name not in CASES]
+
+
+class BenchmarkData:
+    """Синтетический каталог заданного размера и объекты для URL с аргументами"""
+
+    def __init__(self, size, seed):
+        self.size = size
+        generator = SyntheticCatalog(seed=seed)
+        generator.generate(
+            coins=size,
+            banknotes=max(size // 2, 1),
+            users=max(size // 100, 2),
+            collection_items=max(size // 10, 1),
+        )
+        # Пользователь замеров: staff, автор своих предметов и новости
+        self.user = User.objects.create(username=f'benchmark-{seed}', is_staff=True)
+        country = Country.objects.order_by('pk').first()
+        self.own_coin = Coin.objects.create(name='Монета замера', country=country, denomination='1', author=self.user)
+        self.own_banknote = Banknote.objects.create(
+            name='Банкнота замера', country=country, denomination='10', author=self.user
+        )
+        self.news = News.objects.create(title='Новость замера', content='Текст', author=self.user)
+        self.coin = Coin.objects.filter(is_published=True).order_by('pk').first()
+        self.collection_item = UserCollectionItem.objects.create(user=self.user, coin=self.coin)
+        self.since = Coin.objects.latest('updated_at').updated_at.isoformat()
+
+
+def fetch(client, name, data):
+    """Один GET с холодными кешами; возвращает ответ, запросы и время в мс"""
+    case = CASES[name]
+    url = reverse(name, kwargs=case.kwargs(data))
+    # Кеши страниц и справочников сбрасываются, чтобы замер был воспроизводим
+    cache.clear()
+    reference.clear()
+    with CaptureQueriesContext(connection) as captured:
+        started = time.perf_counter()
+        response = client.get(url, case.params(data))
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = (time.perf_counter() - started) * 1000
+    return response, captured.captured_queries, elapsed
+
+
+def measure(data, repeat=DEFAULT_REPEAT, names=None):
+    """Медианная задержка (мс), число запросов и статус для каждого маршрута"""
+    anonymous = Client(REMOTE_ADDR=REMOTE_ADDR)
+    member = Client(REMOTE_ADDR=REMOTE_ADDR)
+    member.force_login(data.user)
+    results = {}
+    for name in names or collect_url_names():
+        client = member if CASES[name].login else anonymous
+        timings = []
+        queries = status = 0
+        for _ in range(max(repeat, 1)):
+            response, captured, elapsed = fetch(client, name, data)
+            timings.append(elapsed)
+            queries = max(queries, len(captured))
+            status = response.status_code
+        results[name] = {
+            'ms': round(statistics.median(timings), 2),
+            'queries': queries,
+            'status': status,
+        }
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, min_delta=MIN_LATENCY_DELTA_MS):
+    """Регрессии относительно базовых значений одного размера"""
+    regressions = []
+    for name, result in sorted(results.items()):
+        if result['status'] >= 400:
+            regressions.append(f'{name}: ответ {result["status"]}')
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(f'{name}: запросов {result["queries"]} (было {base["queries"]})')
+        limit = max(base['ms'] * (1 + tolerance), base['ms'] + min_delta)
+        if result['ms'] > limit:
+            regressions.append(f'{name}: {result["ms"]} мс (было {base["ms"]} мс)')
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, baseline):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(baseline, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write('\n')
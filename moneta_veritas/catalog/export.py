@@ -0,0 +1,191 @@
+# catalog/export.py
+"""
+Потоковая выгрузка опубликованных монет и банкнот в CSV и JSON Lines.
+
+Строки читаются из базы через iterator(chunk_size=...) и сразу отдаются
+клиенту (StreamingHttpResponse) или пишутся в файл, поэтому расход памяти
+не зависит от размера каталога. Справочники подставляются по названию из
+кеша в памяти (catalog/reference.py), без JOIN.
+
+Выборка принимает те же GET-параметры, что и списки (см. filters.py),
+и курсор since: только предметы, измененные позже этой даты. Верхняя
+граница выгрузки (cursor) фиксируется до начала чтения - ее нужно
+передать в since при следующей выгрузке.
+
+Инкрементальная выгрузка (с since) дополнительно содержит "надгробия" -
+строки {id, updated_at, deleted: true} для предметов, снятых с публикации
+или удаленных после since (модель DeletedItem). У остальных строк
+deleted: false. Снятые с публикации отбираются теми же фильтрами, а
+удаленные - нет: их полей уже нет, и получатель пропускает незнакомые id.
+Предмет, который изменился так, что перестал подходить под фильтры,
+надгробия не получает - для такой выборки нужна полная выгрузка.
+"""
+import csv
+import heapq
+import json
+from datetime import datetime, time, timezone as dt_timezone
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import reference
+from .filters import get_filterset
+from .models import Banknote, Category, Coin, Country, DeletedItem, Material, Mint
+from .storage import media_storage
+
+EXPORT_MODELS = {'coins': Coin, 'banknotes': Banknote}
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# Сколько строк забирать из базы за одно обращение
+EXPORT_CHUNK_SIZE = 2000
+
+# Колонка выгрузки -> поле модели; справочники заменяются названиями
+COMMON_COLUMNS = {
+    'id': 'catalog_entry_id',
+    'name': 'name',
+    'denomination': 'denomination',
+    'currency': 'currency',
+    'year': 'year',
+    'country': 'country_id',
+    'category': 'category_id',
+    'description': 'description',
+    'image': 'image',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+MODEL_COLUMNS = {
+    Coin: {'material': 'material_id', 'mint': 'mint_id', 'weight': 'weight', 'diameter': 'diameter'},
+    Banknote: {'serial_number': 'serial_number', 'width': 'width', 'height': 'height'},
+}
+REFERENCE_COLUMNS = {
+    'country': Country,
+    'category': Category,
+    'material': Material,
+    'mint': Mint,
+}
+
+
+def parse_since(value):
+    """Дата курсора since (ISO 8601); ValueError для некорректного значения"""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Некорректная дата since: {value}')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+def get_columns(model):
+    return {**COMMON_COLUMNS, **MODEL_COLUMNS[model]}
+
+
+class CatalogExport:
+    """Выборка для выгрузки и ее сериализация построчно"""
+
+    def __init__(self, model, params, since=None, chunk_size=EXPORT_CHUNK_SIZE, image_url=None):
+        self.model = model
+        self.columns = get_columns(model)
+        self.filterset = get_filterset(model, params)
+        self.since = since
+        self.chunk_size = chunk_size
+        # Превращает относительный URL медиа в абсолютный (build_absolute_uri)
+        self.image_url = image_url or (lambda url: url)
+        queryset = self.filterset.filter(model.objects.filter(is_published=True))
+        hidden = self.filterset.filter(model.objects.filter(is_published=False))
+        deleted = DeletedItem.objects.filter(item_type=model._meta.model_name)
+        if since is not None:
+            queryset = queryset.filter(updated_at__gt=since)
+            hidden = hidden.filter(updated_at__gt=since)
+            deleted = deleted.filter(deleted_at__gt=since)
+        self.queryset = queryset
+        # Пустые выборки надгробий не читаются (None вместо queryset)
+        hidden_cursor = hidden.aggregate(cursor=Max('updated_at'))['cursor']
+        deleted_cursor = deleted.aggregate(cursor=Max('deleted_at'))['cursor']
+        self.hidden = hidden if hidden_cursor is not None else None
+        self.deleted = deleted if deleted_cursor is not None else None
+        # Курсор учитывает и снятия с публикации, и удаления: иначе они
+        # оказались бы раньше since следующей выгрузки и пропали
+        moments = [queryset.aggregate(cursor=Max('updated_at'))['cursor'], hidden_cursor, deleted_cursor]
+        self.cursor = max((moment for moment in moments if moment is not None), default=since)
+        self.fieldnames = list(self.columns) if since is None else [*self.columns, 'deleted']
+
+    def rows(self):
+        """Словари строк по возрастанию updated_at, с надгробиями при since"""
+        rows = self.item_rows()
+        if self.since is not None:
+            rows = heapq.merge(rows, self.tombstones(), key=itemgetter('updated_at'))
+        for row in rows:
+            # Полная точность: значение updated_at годится как since
+            row['updated_at'] = row['updated_at'].isoformat()
+            yield row
+
+    def tombstones(self):
+        """Строки снятых с публикации и удаленных предметов по возрастанию времени"""
+        sources = []
+        if self.hidden is not None:
+            hidden = self.hidden.filter(updated_at__lte=self.cursor).order_by('updated_at', 'pk')
+            sources.append(hidden.values_list('catalog_entry_id', 'updated_at').iterator(chunk_size=self.chunk_size))
+        if self.deleted is not None:
+            deleted = self.deleted.filter(deleted_at__lte=self.cursor).order_by('deleted_at', 'pk')
+            sources.append(deleted.values_list('entry_id', 'deleted_at').iterator(chunk_size=self.chunk_size))
+        changes = heapq.merge(*sources, key=itemgetter(1))
+        for entry_id, moment in changes:
+            yield {'id': entry_id, 'updated_at': moment, 'deleted': True}
+
+    def item_rows(self):
+        """Строки опубликованных предметов по возрастанию updated_at (еще datetime)"""
+        queryset = self.queryset
+        if self.cursor is not None:
+            # Изменения во время выгрузки попадут в следующую
+            queryset = queryset.filter(updated_at__lte=self.cursor)
+        queryset = queryset.order_by('updated_at', 'pk').values_list(*self.columns.values())
+        maps = {
+            column: reference.get_map(model)
+            for column, model in REFERENCE_COLUMNS.items() if column in self.columns
+        }
+        names = list(self.columns)
+        for values in queryset.iterator(chunk_size=self.chunk_size):
+            row = dict(zip(names, values))
+            if self.since is not None:
+                row['deleted'] = False
+            for column, table in maps.items():
+                obj = table.get(row[column])
+                row[column] = obj.title if obj is not None else None
+            if row['image']:
+                row['image'] = self.image_url(media_storage.url(row['image']))
+            row['created_at'] = row['created_at'].isoformat()
+            yield row
+
+    def csv_lines(self):
+        """Строки CSV с заголовком"""
+        buffer = EchoBuffer()
+        # Надгробия заполняют только id, updated_at и deleted
+        writer = csv.DictWriter(buffer, fieldnames=self.fieldnames, restval='')
+        yield writer.writeheader()
+        for row in self.rows():
+            yield writer.writerow(row)
+
+    def jsonl_lines(self):
+        for row in self.rows():
+            yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+    def lines(self, fmt):
+        return self.csv_lines() if fmt == 'csv' else self.jsonl_lines()
+
+
+class EchoBuffer:
+    """Псевдофайл для csv.writer: возвращает записанное вместо хранения"""
+
+    def write(self, value):
+        return value
@@ -0,0 +1,78 @@
+# catalog/facets.py
+"""
+Фасетные счетчики для фильтров каталога.
+
+Все счетчики (по стране, материалу, двору, категории, валюте и десятилетию)
+считаются одним запросом: сгруппированные подзапросы объединяются через
+UNION ALL. Результат кешируется по каноничной сигнатуре фильтров
+(FilterSet.signature() из catalog/filters.py) и поколению модели из
+catalog/page_cache.py: после изменения предметов счетчики пересчитываются
+сразу, а не через CATALOG_FACETS_TIMEOUT, и не попадают устаревшими
+в свежий кеш страниц. Изменение и удаление справочников тоже сдвигает
+поколение предметов (signals.invalidate_dependent_items): SET_NULL
+обнуляет ссылки без сигналов самих предметов.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast
+
+from .page_cache import get_generations
+
+# Имя фасета -> выражение, по которому группируются предметы
+COMMON_FACETS = {
+    'country': F('country_id'),
+    'category': F('category_id'),
+    'currency': F('currency'),
+    'decade': F('year') / 10 * 10,
+}
+
+FACETS = {
+    'coin': {
+        **COMMON_FACETS,
+        'material': F('material_id'),
+        'mint': F('mint_id'),
+    },
+    'banknote': COMMON_FACETS,
+}
+
+# Фасеты, значения которых - целые числа (id и десятилетия)
+INTEGER_FACETS = {'country', 'category', 'material', 'mint', 'decade'}
+
+def compute_facets(queryset):
+    """Считает фасеты для выборки одним запросом"""
+    facets = FACETS[queryset.model._meta.model_name]
+    base = queryset.order_by()
+    parts = [
+        base.values(
+            facet=Value(name, output_field=CharField()),
+            value=Cast(expression, CharField())
+        ).annotate(count=Count('pk'))
+        for name, expression in facets.items()
+    ]
+    result = {name: {} for name in facets}
+    for row in parts[0].union(*parts[1:], all=True):
+        value = row['value']
+        if value is None:
+            continue
+        if row['facet'] in INTEGER_FACETS:
+            value = int(value)
+        result[row['facet']][value] = row['count']
+    return result
+
+
+def get_facets(queryset, filterset, user=None):
+    """Возвращает фасеты, используя кеш по сигнатуре фильтров.
+
+    Авторизованный пользователь видит свои неопубликованные предметы,
+    поэтому для него ключ кеша свой.
+    """
+    audience = f'user{user.pk}' if user is not None and user.is_authenticated else 'anon'
+    model_name = queryset.model._meta.model_name
+    generation, = get_generations([model_name])
+    key = 'catalog:facets:{}:{}:{}:{}'.format(model_name, generation, audience, filterset.signature())
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, getattr(settings, 'CATALOG_FACETS_TIMEOUT', 300))
+    return facets
@@ -0,0 +1,203 @@
+# catalog/filters.py
+"""
+Декларативные фильтры списков каталога.
+
+Для каждой модели описан набор фильтров (FilterSet): какой GET-параметр
+на какое поле влияет и к какому типу приводится значение. Некорректные
+значения (year_from=abc) отбрасываются до обращения к базе, повторяющиеся
+параметры (country=1&country=2) превращаются в условие IN. Все условия
+собираются в один filter(), а signature() дает каноничный ключ для кешей.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+from . import search
+from .models import Banknote, Coin
+
+
+# Границы INTEGER в SQLite (знаковое 64-битное): большее число база не примет
+INT_MIN = -2 ** 63
+INT_MAX = 2 ** 63 - 1
+
+
+def to_int(value):
+    number = int(value)
+    if not INT_MIN <= number <= INT_MAX:
+        raise ValueError(value)
+    return number
+
+
+def to_decimal(value):
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(value)
+    if not number.is_finite():
+        raise ValueError(value)
+    return number
+
+
+def to_str(value):
+    value = value.strip()
+    if not value:
+        raise ValueError(value)
+    return value
+
+
+class Filter:
+    """Фильтр по значению поля; несколько значений дают IN"""
+
+    def __init__(self, field, coerce=to_int, multiple=True):
+        self.field = field
+        self.coerce = coerce
+        self.multiple = multiple
+
+    def params(self, name):
+        """GET-параметры, которые читает фильтр"""
+        return (name,)
+
+    def clean_values(self, values):
+        cleaned = set()
+        for value in values:
+            try:
+                cleaned.add(self.coerce(value))
+            except (TypeError, ValueError):
+                continue
+        cleaned = sorted(cleaned)
+        if not self.multiple:
+            cleaned = cleaned[:1]
+        return cleaned
+
+    def clean(self, name, params):
+        """Приводит значения к типу поля; пустой результат - фильтр не задан"""
+        values = self.clean_values(params.getlist(name))
+        return {name: values} if values else {}
+
+    def condition(self, name, cleaned):
+        values = cleaned[name]
+        if len(values) == 1:
+            return Q(**{self.field: values[0]})
+        return Q(**{f'{self.field}__in': values})
+
+
+class RangeFilter(Filter):
+    """Фильтр по диапазону: параметры <name>_from и <name>_to"""
+
+    def params(self, name):
+        return (f'{name}_from', f'{name}_to')
+
+    def clean(self, name, params):
+        cleaned = {}
+        for param in self.params(name):
+            # Из нескольких значений границы берется первое корректное
+            for value in params.getlist(param):
+                try:
+                    cleaned[param] = [self.coerce(value)]
+                    break
+                except (TypeError, ValueError):
+                    continue
+        return cleaned
+
+    def condition(self, name, cleaned):
+        low, high = self.params(name)
+        condition = Q()
+        if low in cleaned:
+            condition &= Q(**{f'{self.field}__gte': cleaned[low][0]})
+        if high in cleaned:
+            condition &= Q(**{f'{self.field}__lte': cleaned[high][0]})
+        return condition
+
+
+class FilterSet:
+    """Набор фильтров, поиска и сортировки для списка предметов"""
+    filters = {}
+    sorts = ('-created_at', 'created_at', 'name', '-name', 'year', '-year', 'denomination')
+    default_sort = '-created_at'
+
+    def __init__(self, params):
+        self.query = params.get('q', '').strip()
+        self.cleaned = {}
+        for name, spec in self.filters.items():
+            self.cleaned.update(spec.clean(name, params))
+        sort = params.get('sort') or ('relevance' if self.query else self.default_sort)
+        if sort != 'relevance' and sort not in self.sorts:
+            sort = self.default_sort
+        self.sort = sort
+
+    @property
+    def ordering(self):
+        """Выражение для order_by с учетом сортировки по релевантности"""
+        if self.sort == 'relevance':
+            return 'search_rank' if self.query else self.default_sort
+        return self.sort
+
+    def condition(self):
+        """Все условия фильтров одним Q"""
+        condition = Q()
+        for name, spec in self.filters.items():
+            if any(param in self.cleaned for param in spec.params(name)):
+                condition &= spec.condition(name, self.cleaned)
+        return condition
+
+    def filter(self, queryset):
+        """Применяет поиск и фильтры к queryset (без сортировки)"""
+        if self.query:
+            queryset = search.search_queryset(queryset, self.query)
+        return queryset.filter(self.condition())
+
+    def apply(self, queryset):
+        """Применяет поиск, фильтры и сортировку"""
+        return self.filter(queryset).order_by(self.ordering)
+
+    def items(self):
+        """Каноничные пары (параметр, значение), отсортированные по имени"""
+        items = [('q', self.query)] if self.query else []
+        for param in sorted(self.cleaned):
+            items.extend((param, str(value)) for value in self.cleaned[param])
+        return items
+
+    def signature(self):
+        """Ключ состава выборки для кешей (без сортировки и страницы)"""
+        return hashlib.md5(repr(self.items()).encode()).hexdigest()
+
+    def values(self):
+        """Первые значения параметров в виде строк (для формы фильтров)"""
+        values = {'q': self.query, 'sort': self.sort}
+        for name, spec in self.filters.items():
+            for param in spec.params(name):
+                values[param] = str(self.cleaned[param][0]) if param in self.cleaned else ''
+        return values
+
+
+class CoinFilterSet(FilterSet):
+    filters = {
+        'country': Filter('country_id'),
+        'currency': Filter('currency', coerce=to_str),
+        'year': RangeFilter('year'),
+        'material': Filter('material_id'),
+        'mint': Filter('mint_id'),
+        'diameter': RangeFilter('diameter', coerce=to_decimal),
+    }
+
+
+class BanknoteFilterSet(FilterSet):
+    filters = {
+        'country': Filter('country_id'),
+        'currency': Filter('currency', coerce=to_str),
+        'year': RangeFilter('year'),
+        'width': RangeFilter('width'),
+        'height': RangeFilter('height'),
+    }
+
+
+FILTERSETS = {
+    Coin: CoinFilterSet,
+    Banknote: BanknoteFilterSet,
+}
+
+
+def get_filterset(model, params):
+    """Набор фильтров для модели, разобранный из GET-параметров"""
+    return FILTERSETS[model](params)
@@ -1,9 +1,56 @@
 # catalog/forms.py
 from django import forms
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
+
+from . import reference
 from .models import Coin, Banknote, News  # Добавили импорт News
 from .validators import validate_year
 
 
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    """Варианты выбора из кеша справочников вместо запроса к базе"""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for obj in reference.get_table(self.queryset.model):
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(reference.get_table(self.queryset.model)) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(reference.get_table(self.queryset.model))
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField для справочников, работающий через reference-кеш"""
+    iterator = CachedModelChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            return value
+        try:
+            return reference.get_map(self.queryset.model)[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+
+REFERENCE_FIELD_CLASSES = {
+    'category': CachedModelChoiceField,
+    'country': CachedModelChoiceField,
+    'material': CachedModelChoiceField,
+    'mint': CachedModelChoiceField,
+}
+
+
 class CoinForm(forms.ModelForm):
     """Форма для создания и редактирования монет"""
 
@@ -25,6 +72,7 @@ class CoinForm(forms.ModelForm):
             'is_published',
             'is_on_main'
         ]
+        field_classes = REFERENCE_FIELD_CLASSES
 
     def clean_year(self):
         year = self.cleaned_data.get('year')
@@ -53,6 +101,7 @@ class BanknoteForm(forms.ModelForm):
             'is_published',
             'is_on_main'
         ]
+        field_classes = REFERENCE_FIELD_CLASSES
 
     def clean_year(self):
         year = self.cleaned_data.get('year')
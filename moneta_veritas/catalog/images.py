@@ -0,0 +1,106 @@
+# catalog/images.py
+"""
+Производные изображения (превью) для карточек и детальных страниц.
+
+При загрузке фото предмета или новости Pillow сохраняет уменьшенные копии
+фиксированных размеров в WebP и JPEG рядом с медиа в каталоге derivatives/.
+Шаблоны выбирают их через srcset (тег responsive_image в catalog_extras),
+а пока копий нет - показывают оригинал. Есть ли копии, записано в поле
+image_derivatives предмета или новости при их создании: при отрисовке
+страницы файловая система не проверяется.
+Для уже загруженных файлов: python manage.py generate_image_derivatives
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+DERIVATIVES_DIR = 'derivatives'
+
+# Размер -> максимальная сторона в пикселях
+DERIVATIVE_SIZES = {
+    'card': 400,
+    'detail': 1200,
+}
+
+# Формат -> (расширение, формат Pillow, параметры сохранения)
+DERIVATIVE_FORMATS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Подсказка браузеру о ширине картинки на странице (атрибут sizes)
+SIZES_ATTRIBUTE = {
+    'card': '(min-width: 992px) 25vw, (min-width: 768px) 33vw, 50vw',
+    'detail': '(min-width: 768px) 50vw, 100vw',
+}
+
+
+def derivative_name(name, size, fmt):
+    """Путь производного файла в хранилище"""
+    root = os.path.splitext(name)[0]
+    return f'{DERIVATIVES_DIR}/{root}_{size}.{DERIVATIVE_FORMATS[fmt][0]}'
+
+
+def all_derivative_names(name):
+    """Пути всех производных файла"""
+    return [
+        derivative_name(name, size, fmt)
+        for size in DERIVATIVE_SIZES
+        for fmt in DERIVATIVE_FORMATS
+    ]
+
+
+def has_derivatives(name, storage=default_storage):
+    """Созданы ли производные для файла (проверяется последний из них)"""
+    return storage.exists(derivative_name(name, list(DERIVATIVE_SIZES)[-1], 'jpeg'))
+
+
+def _encode(image, fmt):
+    extension, pillow_format, options = DERIVATIVE_FORMATS[fmt]
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG без прозрачности: подкладываем белый фон
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name, storage=default_storage, force=False):
+    """Создает все производные для файла, возвращает количество записанных"""
+    if not force and has_derivatives(name, storage):
+        return 0
+    with storage.open(name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    written = 0
+    for size, side in DERIVATIVE_SIZES.items():
+        image = original.copy()
+        image.thumbnail((side, side), Image.LANCZOS)
+        for fmt in DERIVATIVE_FORMATS:
+            target = derivative_name(name, size, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(_encode(image, fmt)))
+            written += 1
+    return written
+
+
+def derivative_srcsets(name, storage=default_storage):
+    """srcset для каждого формата (производные должны быть созданы)"""
+    if not name:
+        return None
+    return {
+        fmt: ', '.join(
+            f'{storage.url(derivative_name(name, size, fmt))} {side}w'
+            for size, side in DERIVATIVE_SIZES.items()
+        )
+        for fmt in DERIVATIVE_FORMATS
+    }
@@ -0,0 +1,359 @@
+# catalog/importer.py
+"""
+Массовый импорт предметов каталога: python manage.py import_catalog
+
+Файл читается потоком, поэтому его размер не ограничен памятью.
+Поддерживаются:
+- JSON-массив в формате фикстур Django (как db.json): справочники
+  из того же файла сопоставляются с базой по названию;
+- JSON Lines и CSV с плоскими записями, где страна, материал, монетный
+  двор и категория заданы названиями, а тип предмета - колонкой type
+  (или параметром --type).
+
+Недостающие записи справочников создаются. Предметы сохраняются через
+bulk_create пачками, каждая пачка - в своей транзакции. Повторный импорт
+того же файла ничего не дублирует: предмет с тем же естественным ключом
+(NATURAL_KEY) пропускается.
+"""
+import csv
+import io
+import json
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from . import search, storage
+from .models import Banknote, CatalogEntry, Category, Coin, Country, Material, Mint, build_excerpt
+from .signals import items_bulk_created
+
+ITEM_MODELS = {'coin': Coin, 'banknote': Banknote}
+
+# Поле предмета -> модель справочника (у всех справочников поле title)
+REFERENCE_FIELDS = {
+    'country': Country,
+    'category': Category,
+    'material': Material,
+    'mint': Mint,
+}
+REFERENCE_MODELS = {model._meta.model_name: model for model in REFERENCE_FIELDS.values()}
+
+# По этим полям повторно импортируемый предмет считается уже существующим
+NATURAL_KEY = ('name', 'denomination', 'year', 'country_id')
+
+FORMATS = ('json', 'jsonl', 'csv')
+DEFAULT_BATCH_SIZE = 500
+
+# Размер порции при потоковом чтении JSON-массива
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def detect_format(path):
+    """Формат по расширению файла"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension in FORMATS:
+        return extension
+    raise ValueError(f'Не удалось определить формат файла {path}, укажите --format')
+
+
+def iter_json_array(stream, chunk_size=READ_CHUNK_SIZE):
+    """Элементы JSON-массива верхнего уровня без загрузки всего файла"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    exhausted = False
+    while True:
+        # Пропускаем пробелы и разделители между элементами
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) or exhausted:
+                break
+            buffer, position = buffer[position:] + stream.read(chunk_size), 0
+            exhausted = position == len(buffer)
+        if position >= len(buffer):
+            if started:
+                raise ValueError('Файл JSON оборван: нет закрывающей скобки')
+            return
+        if not started:
+            if buffer[position] != '[':
+                raise ValueError('Ожидался JSON-массив')
+            started = True
+            position += 1
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            # Элемент не поместился в буфер - дочитываем
+            chunk = stream.read(chunk_size)
+            exhausted = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        # Элемент мог закончиться ровно на границе порции (например, число)
+        if end == len(buffer) and not exhausted:
+            chunk = stream.read(chunk_size)
+            exhausted = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+        position = end
+
+
+def iter_jsonl(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            raise ValueError(f'Строка {number}: {error}') from error
+
+
+def iter_csv(stream):
+    for row in csv.DictReader(stream):
+        # Пустые ячейки CSV означают отсутствие значения
+        yield {key: value for key, value in row.items() if value not in ('', None)}
+
+
+READERS = {
+    'json': iter_json_array,
+    'jsonl': iter_jsonl,
+    'csv': iter_csv,
+}
+
+
+class ReferenceResolver:
+    """Находит id справочников по названию, создавая недостающие записи.
+
+    Все названия справочника загружаются одним запросом при первом
+    обращении, дальше поиск идет по словарю в памяти.
+    """
+
+    def __init__(self):
+        self.cache = {}
+        self.created = 0
+
+    def _table(self, model):
+        table = self.cache.get(model)
+        if table is None:
+            table = {}
+            for pk, title in model.objects.order_by('pk').values_list('pk', 'title'):
+                table.setdefault(self._key(title), pk)
+            self.cache[model] = table
+        return table
+
+    @staticmethod
+    def _key(title):
+        return title.strip().casefold()
+
+    def resolve(self, model, title, **defaults):
+        """id записи с этим названием; defaults - поля для новой записи"""
+        if title in (None, ''):
+            return None
+        title = str(title).strip()
+        table = self._table(model)
+        key = self._key(title)
+        pk = table.get(key)
+        if pk is None:
+            # .create, а не bulk_create: сигналы сбросят кеш справочников
+            pk = table[key] = model.objects.create(title=title, **defaults).pk
+            self.created += 1
+        return pk
+
+
+class CatalogImporter:
+    """Импорт потока записей в каталог"""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, item_type=None, author=None, progress=None):
+        self.batch_size = max(batch_size, 1)
+        self.item_type = item_type
+        self.author = author
+        self.progress = progress
+        self.resolver = ReferenceResolver()
+        # Справочники из фикстуры: (модель, pk в файле) -> поля записи
+        self.fixture_references = {}
+        self.stats = {'read': 0, 'created': 0, 'skipped': 0}
+
+    def run(self, records):
+        batches = {model: [] for model in ITEM_MODELS.values()}
+        for record in records:
+            parsed = self.parse(record)
+            if parsed is None:
+                continue
+            self.stats['read'] += 1
+            model, fields = parsed
+            batch = batches[model]
+            batch.append(fields)
+            if len(batch) >= self.batch_size:
+                self.flush(model, batch)
+                batch.clear()
+        for model, batch in batches.items():
+            if batch:
+                self.flush(model, batch)
+        self.stats['references_created'] = self.resolver.created
+        return self.stats
+
+    def parse(self, record):
+        """Модель и поля предмета из записи; None для справочников и прочего"""
+        if 'model' in record and 'fields' in record:
+            return self.parse_fixture(record)
+        item_type = (record.get('type') or self.item_type or '').lower()
+        model = ITEM_MODELS.get(item_type)
+        if model is None:
+            raise ValueError(f'Неизвестный тип предмета: {item_type or "не указан"}')
+        return model, self.build_fields(model, record)
+
+    def parse_fixture(self, record):
+        app_label, _, model_name = record['model'].partition('.')
+        if app_label != 'catalog':
+            # auth, admin, sessions и т.п. в дампе не импортируются
+            return None
+        fields = record['fields']
+        if model_name in REFERENCE_MODELS:
+            self.fixture_references[model_name, record.get('pk')] = fields
+            return None
+        model = ITEM_MODELS.get(model_name)
+        if model is None:
+            return None
+        values = dict(fields)
+        # Ссылки фикстуры - pk из файла; переводим их в названия
+        for name in REFERENCE_FIELDS:
+            if values.get(name) is not None:
+                values[name] = self.fixture_title(name, values[name])
+        return model, self.build_fields(model, values)
+
+    def fixture_title(self, model_name, pk):
+        fields = self.fixture_references.get((model_name, pk))
+        if fields is None:
+            raise ValueError(f'В файле нет записи catalog.{model_name} с pk={pk}')
+        return fields['title']
+
+    def build_fields(self, model, values):
+        fields = {}
+        for field in model._meta.concrete_fields:
+            if field.name in values and field.editable and not field.primary_key:
+                if field.name in REFERENCE_FIELDS or field.name == 'author':
+                    continue
+                fields[field.name] = self.convert(field, values[field.name])
+        if not fields.get('name'):
+            raise ValueError('У предмета нет названия')
+        country_id = self.resolver.resolve(Country, values.get('country'))
+        if country_id is None:
+            raise ValueError(f'У предмета "{fields["name"]}" не указана страна')
+        fields['country_id'] = country_id
+        fields['category_id'] = self.resolver.resolve(Category, values.get('category'))
+        if model is Coin:
+            fields['material_id'] = self.resolver.resolve(Material, values.get('material'))
+            # Новый монетный двор привязывается к стране предмета
+            fields['mint_id'] = self.resolver.resolve(Mint, values.get('mint'), country_id=country_id)
+        if 'created_at' in values:
+            fields['created_at'] = parse_datetime(values['created_at'])
+        return fields
+
+    @staticmethod
+    def convert(field, value):
+        internal_type = field.get_internal_type()
+        if value is None:
+            return None
+        if internal_type == 'BooleanField':
+            if isinstance(value, str):
+                return value.strip().lower() in ('1', 'true', 'yes', 'да')
+            return bool(value)
+        if internal_type == 'IntegerField':
+            return int(value)
+        if internal_type == 'DecimalField':
+            try:
+                return Decimal(str(value))
+            except InvalidOperation as error:
+                raise ValueError(f'{field.name}: некорректное число {value!r}') from error
+        return str(value)
+
+    def existing_keys(self, model, batch):
+        """Естественные ключи пачки, которые уже есть в базе"""
+        names = {fields['name'] for fields in batch}
+        return set(model.objects.filter(name__in=names).values_list(*NATURAL_KEY))
+
+    def flush(self, model, batch):
+        existing = self.existing_keys(model, batch)
+        instances = []
+        created_at = []
+        for fields in batch:
+            key = tuple(fields.get(name) for name in NATURAL_KEY)
+            if key in existing:
+                self.stats['skipped'] += 1
+                continue
+            # Дубликаты внутри файла тоже пропускаются
+            existing.add(key)
+            instances.append(model(author=self.author, **{k: v for k, v in fields.items() if k != 'created_at'}))
+            created_at.append(fields.get('created_at'))
+
+        if instances:
+            insert_items(model, instances, created_at, batch_size=self.batch_size)
+            self.stats['created'] += len(instances)
+
+        if self.progress:
+            self.progress(self.stats)
+
+
+def insert_items(model, instances, created_at=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Сохраняет новые предметы через bulk_create в одной транзакции.
+
+    bulk_create не вызывает save() и сигналы, поэтому здесь же заполняются
+    служебные поля, записи каталога, поисковый индекс и ссылки на медиа.
+    created_at - даты создания в порядке instances (None - текущее время).
+    """
+    for instance in instances:
+        instance.search_text = search.build_search_text(instance)
+        instance.description_excerpt = build_excerpt(instance.description)
+
+    with transaction.atomic():
+        entries = CatalogEntry.objects.bulk_create(
+            [CatalogEntry(item_type=model._meta.model_name) for _ in instances], batch_size=batch_size
+        )
+        for instance, entry in zip(instances, entries):
+            instance.catalog_entry = entry
+        model.objects.bulk_create(instances, batch_size=batch_size)
+        if created_at is not None:
+            restore_created_at(model, instances, created_at)
+        for instance in instances:
+            storage.acquire(instance.image.name)
+        search.index_items(instances)
+        items_bulk_created.send(sender=model, instances=instances)
+
+
+def restore_created_at(model, instances, created_at):
+    """Возвращает даты создания, которые auto_now_add перезаписал при вставке"""
+    field = model._meta.get_field('created_at')
+    quote = connection.ops.quote_name
+    rows = []
+    for instance, moment in zip(instances, created_at):
+        if moment is not None:
+            instance.created_at = moment
+            rows.append((field.get_db_prep_value(moment, connection), instance.pk))
+    if not rows:
+        return
+    # executemany по первичному ключу в разы быстрее bulk_update с CASE
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {quote(model._meta.db_table)} SET {quote(field.column)} = %s '
+            f'WHERE {quote(model._meta.pk.column)} = %s',
+            rows
+        )
+
+
+def open_records(path, fmt):
+    """Поток записей из файла выбранного формата"""
+    stream = io.open(path, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    try:
+        yield from READERS[fmt](stream)
+    finally:
+        stream.close()
@@ -0,0 +1,152 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.models import CatalogEntry
+from moneta_veritas import slow_queries
+
+# Адрес вне INTERNAL_IPS, чтобы debug toolbar не влиял на замеры
+REMOTE_ADDR = '192.0.2.1'
+HOST = 'localhost'
+
+DEFAULT_URLS = ('/', '/catalog/coins/', '/catalog/banknotes/', '/catalog/news/')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность читающих страниц под WSGI '
+        '(синхронные представления в пуле потоков) и ASGI (async-представления)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на каждый режим')
+        parser.add_argument('--concurrency', type=int, default=16, help='Одновременных запросов')
+        parser.add_argument('--url', action='append', dest='urls', help='Путь для замера (можно несколько)')
+        parser.add_argument(
+            '--uncached',
+            action='store_true',
+            help='Обходить кеш страниц (запросы с cookie сессии)'
+        )
+
+    @slow_queries.disabled()
+    def handle(self, *args, **options):
+        urls = options['urls'] or list(DEFAULT_URLS)
+        entry = CatalogEntry.objects.order_by('pk').first()
+        if entry is not None and not options['urls']:
+            urls.append(entry.get_absolute_url())
+        total = max(options['requests'], 1)
+        concurrency = max(options['concurrency'], 1)
+        # Сессия без записи в базе: пользователь анонимный, но страница не из кеша
+        cookie = 'sessionid=benchmark' if options['uncached'] else ''
+        paths = [urls[number % len(urls)] for number in range(total)]
+
+        # Прогрев: шаблоны, справочники и кеш страниц заполняются до замеров
+        self.run_wsgi(urls, 1, cookie)
+        asyncio.run(self.run_asgi(urls, 1, cookie))
+
+        results = {
+            'WSGI': self.run_wsgi(paths, concurrency, cookie),
+            'ASGI': asyncio.run(self.run_asgi(paths, concurrency, cookie)),
+        }
+        self.stdout.write(f'Запросов: {total}, одновременно: {concurrency}, страниц: {len(urls)}')
+        for mode, (elapsed, latencies, errors) in results.items():
+            self.stdout.write(
+                f'{mode}: {total / elapsed:8.1f} запр/с, '
+                f'p50 {self.percentile(latencies, 50):7.1f} мс, '
+                f'p95 {self.percentile(latencies, 95):7.1f} мс, '
+                f'ошибок {errors}'
+            )
+        if any(errors for _, _, errors in results.values()):
+            raise CommandError('Часть запросов завершилась ошибкой')
+
+    @staticmethod
+    def percentile(values, percent):
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=100)[percent - 1]
+
+    def run_wsgi(self, paths, concurrency, cookie):
+        """Синхронный обработчик в пуле потоков, как у многопоточного WSGI-сервера"""
+        handler = WSGIHandler()
+
+        def request(path):
+            started = time.perf_counter()
+            status = []
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': HOST,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'REMOTE_ADDR': REMOTE_ADDR,
+                'HTTP_HOST': HOST,
+                'HTTP_COOKIE': cookie,
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(),
+                'wsgi.errors': BytesIO(),
+            }
+            response = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+            for _ in response:
+                pass
+            response.close()
+            return (time.perf_counter() - started) * 1000, not status[0].startswith('200')
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            timings = list(executor.map(request, paths))
+        elapsed = time.perf_counter() - started
+        return elapsed, [latency for latency, _ in timings], sum(failed for _, failed in timings)
+
+    async def run_asgi(self, paths, concurrency, cookie):
+        """ASGI-обработчик в одном цикле событий"""
+        handler = ASGIHandler()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request(path):
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': b'',
+                'root_path': '',
+                'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode())],
+                'client': (REMOTE_ADDR, 50000),
+                'server': (HOST, 80),
+            }
+            status = []
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            finished = asyncio.Event()
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # Клиент "отключается" после получения ответа
+                await finished.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body'):
+                    finished.set()
+
+            async with semaphore:
+                started = time.perf_counter()
+                await handler(scope, receive, send)
+                return (time.perf_counter() - started) * 1000, status[0] != 200
+
+        started = time.perf_counter()
+        timings = await asyncio.gather(*(request(path) for path in paths))
+        elapsed = time.perf_counter() - started
+        return elapsed, [latency for latency, _ in timings], sum(failed for _, failed in timings)
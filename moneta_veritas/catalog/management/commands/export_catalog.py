@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from catalog import export
+
+
+class Command(BaseCommand):
+    help = 'Выгружает опубликованные монеты или банкноты в CSV или JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('item_type', choices=sorted(export.EXPORT_MODELS))
+        parser.add_argument('--format', choices=sorted(export.EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help='Файл для записи (по умолчанию - stdout)')
+        parser.add_argument('--since', help='Только предметы, измененные после этой даты (ISO 8601)')
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='ПАРАМЕТР=ЗНАЧЕНИЕ',
+            help='Параметр фильтра как в списках каталога, например country=1 или year_from=2000'
+        )
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for item in options['filter']:
+            name, separator, value = item.partition('=')
+            if not separator:
+                raise CommandError(f'Ожидался параметр вида имя=значение: {item}')
+            params.appendlist(name, value)
+        try:
+            since = export.parse_since(options['since'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        exporter = export.CatalogExport(export.EXPORT_MODELS[options['item_type']], params, since=since)
+        count = 0
+        target = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else None
+        try:
+            for line in exporter.lines(options['format']):
+                if target:
+                    target.write(line)
+                else:
+                    self.stdout.write(line, ending='')
+                count += 1
+        finally:
+            if target:
+                target.close()
+
+        if options['format'] == 'csv':
+            count -= 1
+        cursor = exporter.cursor.isoformat() if exporter.cursor else '-'
+        # Итог - в stderr, чтобы не смешивать его с данными в stdout
+        self.stderr.write(f'Выгружено строк: {count}, курсор для --since: {cursor}')
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими монетами, банкнотами, пользователями и коллекциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--coins', type=int, default=1000, help='Количество монет')
+        parser.add_argument('--banknotes', type=int, default=500, help='Количество банкнот')
+        parser.add_argument('--users', type=int, default=50, help='Количество пользователей')
+        parser.add_argument('--collection-items', type=int, default=500, help='Элементов коллекций')
+        parser.add_argument('--seed', type=int, default=synthetic.DEFAULT_SEED, help='Seed генератора')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=synthetic.DEFAULT_BATCH_SIZE,
+            help='Записей в одной пачке (и транзакции)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        generator = synthetic.SyntheticCatalog(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=self.report_progress,
+        )
+        created = generator.generate(
+            coins=options['coins'],
+            banknotes=options['banknotes'],
+            users=options['users'],
+            collection_items=options['collection_items'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {created["users"]}, монет: {created["coins"]}, '
+            f'банкнот: {created["banknotes"]}, элементов коллекций: {created["collection_items"]} '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
+
+    def report_progress(self, stage, done, total):
+        self.stdout.write(f'{stage}: {done}/{total}')
@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from catalog import images
+from catalog.models import Banknote, Coin, News
+
+# Каталоги загрузок (upload_to) предметов и новостей
+UPLOAD_DIRS = ('collectible_images', 'news_images')
+
+# Модели с полем image_derivatives
+IMAGE_MODELS = (Coin, Banknote, News)
+
+# Имен в одном UPDATE ... WHERE image IN (...)
+MARK_BATCH_SIZE = 500
+
+
+def _process(name, force):
+    try:
+        return name, images.generate_derivatives(name, force=force), None
+    except (OSError, Image.DecompressionBombError) as error:
+        return name, 0, str(error)
+
+
+def mark_derivatives(names, ready):
+    """Записывает в предметы и новости, есть ли превью их фото"""
+    names = list(names)
+    for start in range(0, len(names), MARK_BATCH_SIZE):
+        batch = names[start:start + MARK_BATCH_SIZE]
+        for model in IMAGE_MODELS:
+            model.objects.filter(image__in=batch).exclude(image_derivatives=ready).update(image_derivatives=ready)
+
+
+class Command(BaseCommand):
+    help = 'Создает превью (WebP/JPEG) для уже загруженных изображений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Количество процессов'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать превью, даже если они уже есть'
+        )
+
+    def list_images(self, directory=None):
+        """Файлы каталогов загрузок, включая подкаталоги хранилища по хешу"""
+        for directory in ([directory] if directory else UPLOAD_DIRS):
+            if not default_storage.exists(directory):
+                continue
+            subdirectories, filenames = default_storage.listdir(directory)
+            for filename in filenames:
+                if not filename.startswith('.'):
+                    yield f'{directory}/{filename}'
+            for subdirectory in subdirectories:
+                yield from self.list_images(f'{directory}/{subdirectory}')
+
+    def handle(self, *args, **options):
+        names = list(self.list_images())
+        force = options['force']
+        written = 0
+        ready, failed = [], []
+        # Ресайз упирается в CPU, поэтому файлы обрабатываются в отдельных процессах
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            for name, count, error in executor.map(_process, names, [force] * len(names)):
+                if error:
+                    failed.append(name)
+                    self.stderr.write(f'{name}: {error}')
+                else:
+                    ready.append(name)
+                written += count
+        mark_derivatives(ready, True)
+        mark_derivatives(failed, False)
+        self.stdout.write(self.style.SUCCESS(
+            f'Изображений: {len(names)}, создано превью: {written}, ошибок: {len(failed)}'
+        ))
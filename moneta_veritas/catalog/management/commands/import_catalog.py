@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import importer
+
+
+class Command(BaseCommand):
+    help = 'Импортирует монеты и банкноты из JSON (фикстура), JSON Lines или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу')
+        parser.add_argument(
+            '--format',
+            choices=importer.FORMATS,
+            help='Формат файла (по умолчанию - по расширению)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=importer.DEFAULT_BATCH_SIZE,
+            help='Количество предметов в одной транзакции'
+        )
+        parser.add_argument(
+            '--type',
+            choices=sorted(importer.ITEM_MODELS),
+            help='Тип предметов для записей без колонки type'
+        )
+        parser.add_argument('--author', help='Имя пользователя - автора записей')
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            try:
+                author = get_user_model().objects.get(username=options['author'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'Пользователь {options["author"]} не найден')
+
+        try:
+            fmt = options['format'] or importer.detect_format(options['path'])
+            catalog_importer = importer.CatalogImporter(
+                batch_size=options['batch_size'],
+                item_type=options['type'],
+                author=author,
+                progress=self.report_progress,
+            )
+            stats = catalog_importer.run(importer.open_records(options['path'], fmt))
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано: {stats["read"]}, создано: {stats["created"]}, '
+            f'пропущено: {stats["skipped"]}, новых записей справочников: {stats["references_created"]}'
+        ))
+
+    def report_progress(self, stats):
+        self.stdout.write(
+            f'Обработано {stats["read"]}: создано {stats["created"]}, пропущено {stats["skipped"]}'
+        )
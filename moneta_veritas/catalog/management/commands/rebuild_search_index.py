@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from catalog import search
+from catalog.models import Banknote, Coin, News
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый поисковый индекс каталога'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество записей, вставляемых за один запрос'
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stderr.write('Полнотекстовый индекс поддерживается только для SQLite.')
+            return
+        total = search.rebuild([Coin, Banknote, News], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано предметов: {total}'))
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from catalog import benchmarks, synthetic
+from moneta_veritas import slow_queries
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку и число SQL-запросов всех страниц каталога, коллекций '
+        'и главной на синтетических данных и сравнивает с базовым файлом'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default=','.join(map(str, benchmarks.DEFAULT_SIZES)),
+            help='Размеры каталога (монет) через запятую'
+        )
+        parser.add_argument('--repeat', type=int, default=benchmarks.DEFAULT_REPEAT, help='Прогонов на страницу')
+        parser.add_argument('--seed', type=int, default=synthetic.DEFAULT_SEED, help='Seed генератора')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Файл базовых значений')
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Записать результаты как новые базовые значения'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=benchmarks.DEFAULT_TOLERANCE,
+            help='Допустимый рост задержки (доля от базовой)'
+        )
+
+    @slow_queries.disabled()
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes: ожидались числа через запятую')
+        missing = benchmarks.missing_cases()
+        if missing:
+            raise CommandError(f'Нет сценария замера для: {", ".join(missing)}')
+
+        baseline = benchmarks.load_baseline(options['baseline'])
+        results = {}
+        regressions = []
+        setup_test_environment()
+        # Кеш сайта не очищается замерами: на время команды - свой кеш
+        isolated_cache = override_settings(CACHES=benchmarks.BENCHMARK_CACHES)
+        isolated_cache.enable()
+        try:
+            for size in sizes:
+                results[str(size)] = self.run_size(size, options)
+                self.report(size, results[str(size)], baseline.get(str(size), {}))
+                regressions.extend(
+                    f'[{size}] {problem}'
+                    for problem in benchmarks.compare(
+                        results[str(size)], baseline.get(str(size), {}), tolerance=options['tolerance']
+                    )
+                )
+        finally:
+            isolated_cache.disable()
+            teardown_test_environment()
+
+        if options['update_baseline']:
+            baseline.update(results)
+            benchmarks.save_baseline(options['baseline'], baseline)
+            self.stdout.write(self.style.SUCCESS(f'Базовые значения записаны в {options["baseline"]}'))
+            return
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run_size(self, size, options):
+        """Отдельная тестовая база на каждый размер: рабочие данные не затрагиваются"""
+        old_name = connection.settings_dict['NAME']
+        old_test_name = connection.settings_dict['TEST'].get('NAME')
+        directory = None
+        if connection.vendor == 'sqlite':
+            # Файл, а не база в памяти: замер включает диск и журнал
+            directory = tempfile.mkdtemp(prefix='run_benchmarks_')
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directory, f'benchmark_{size}.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            started = time.perf_counter()
+            data = benchmarks.BenchmarkData(size, options['seed'])
+            self.stdout.write(f'Размер {size}: данные созданы за {time.perf_counter() - started:.1f} с')
+            return benchmarks.measure(data, repeat=options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict['TEST']['NAME'] = old_test_name
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def report(self, size, results, baseline):
+        for name, result in sorted(results.items()):
+            base = baseline.get(name)
+            was = f' (было {base["ms"]:.1f} мс, {base["queries"]} запр.)' if base else ''
+            self.stdout.write(
+                f'  {name:40} {result["status"]} {result["ms"]:8.1f} мс {result["queries"]:3} запр.{was}'
+            )
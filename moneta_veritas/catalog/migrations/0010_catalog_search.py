@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS catalog_search USING fts5("
+        "item_type UNINDEXED, item_id UNINDEXED, title, body, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO catalog_search (item_type, item_id, title, body) "
+        "SELECT 'coin', id, name, "
+        "COALESCE(description, '') || ' ' || COALESCE(denomination, '') "
+        "FROM catalog_coin"
+    )
+    schema_editor.execute(
+        "INSERT INTO catalog_search (item_type, item_id, title, body) "
+        "SELECT 'banknote', id, name, "
+        "COALESCE(description, '') || ' ' || COALESCE(denomination, '') || ' ' || COALESCE(serial_number, '') "
+        "FROM catalog_banknote"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS catalog_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_news'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.0 on 2026-10-17 14:26
+
+import unicodedata
+
+from django.db import migrations, models
+
+SEARCH_FIELDS = {
+    'coin': ('name', 'description', 'denomination'),
+    'banknote': ('name', 'description', 'denomination', 'serial_number'),
+    'news': ('title', 'content'),
+}
+
+BATCH_SIZE = 500
+
+
+def normalize_text(text):
+    # Копия catalog.search.normalize_text на момент миграции: изменения
+    # кода приложения не должны менять то, что делает старая миграция
+    text = unicodedata.normalize('NFKC', text or '')
+    return text.casefold().replace('ё', 'е')
+
+
+def fill_search_text(apps, schema_editor):
+    index = schema_editor.connection.vendor == 'sqlite'
+    with schema_editor.connection.cursor() as cursor:
+        if index:
+            # Перестраиваем индекс по нормализованному тексту, добавляем новости
+            cursor.execute('DELETE FROM catalog_search')
+        for model_name, fields in SEARCH_FIELDS.items():
+            model = apps.get_model('catalog', model_name)
+            changed = []
+            for instance in model.objects.only('pk', *fields).iterator(chunk_size=BATCH_SIZE):
+                instance.search_text = normalize_text(
+                    ' '.join(str(getattr(instance, field) or '') for field in fields)
+                )
+                changed.append(instance)
+                if len(changed) >= BATCH_SIZE:
+                    save_batch(model, model_name, fields, changed, cursor, index)
+                    changed = []
+            if changed:
+                save_batch(model, model_name, fields, changed, cursor, index)
+
+
+def save_batch(model, model_name, fields, instances, cursor, index):
+    model.objects.bulk_update(instances, ['search_text'])
+    if index:
+        cursor.executemany(
+            'INSERT INTO catalog_search (item_type, item_id, title, body) VALUES (%s, %s, %s, %s)',
+            [
+                (model_name, instance.pk, normalize_text(getattr(instance, fields[0])), instance.search_text)
+                for instance in instances
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_catalog_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banknote',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст для поиска'),
+        ),
+        migrations.AddField(
+            model_name='coin',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст для поиска'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст для поиска'),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+    ]
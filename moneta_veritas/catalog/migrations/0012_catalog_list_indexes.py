@@ -0,0 +1,107 @@
+# Generated by Django 5.2 on 2026-10-17 14:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_search_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='banknote',
+            options={'ordering': ['-created_at'], 'verbose_name': 'банкнота', 'verbose_name_plural': 'банкноты'},
+        ),
+        migrations.AlterModelOptions(
+            name='coin',
+            options={'ordering': ['-created_at'], 'verbose_name': 'монета', 'verbose_name_plural': 'монеты'},
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='banknote_pub_created'),
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['name'], name='banknote_pub_name'),
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['year'], name='banknote_pub_year'),
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['denomination'], name='banknote_pub_denomination'),
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['country', '-created_at'], name='banknote_pub_country'),
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['currency', '-created_at'], name='banknote_pub_currency'),
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_on_main', True)), fields=['-created_at'], name='banknote_pub_main'),
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(fields=['author', '-created_at'], name='banknote_author_created'),
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['width'], name='banknote_pub_width'),
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['height'], name='banknote_pub_height'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='coin_pub_created'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['name'], name='coin_pub_name'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['year'], name='coin_pub_year'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['denomination'], name='coin_pub_denomination'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['country', '-created_at'], name='coin_pub_country'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['currency', '-created_at'], name='coin_pub_currency'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_on_main', True)), fields=['-created_at'], name='coin_pub_main'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['author', '-created_at'], name='coin_author_created'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['material', '-created_at'], name='coin_pub_material'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['mint', '-created_at'], name='coin_pub_mint'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['diameter'], name='coin_pub_diameter'),
+        ),
+    ]
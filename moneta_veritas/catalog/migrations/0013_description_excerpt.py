@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-17 14:35
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+# Копия catalog.models.EXCERPT_LENGTH на момент миграции: длина колонки
+# и обрезка описания должны совпадать с тем, что пишет save()
+EXCERPT_LENGTH = 60
+
+BATCH_SIZE = 500
+
+
+def fill_description_excerpt(apps, schema_editor):
+    for model_name in ('coin', 'banknote'):
+        model = apps.get_model('catalog', model_name)
+        changed = []
+        for instance in model.objects.only('pk', 'description').iterator(chunk_size=BATCH_SIZE):
+            instance.description_excerpt = Truncator(instance.description or '').chars(EXCERPT_LENGTH)
+            changed.append(instance)
+            if len(changed) >= BATCH_SIZE:
+                model.objects.bulk_update(changed, ['description_excerpt'])
+                changed = []
+        if changed:
+            model.objects.bulk_update(changed, ['description_excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_catalog_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banknote',
+            name='description_excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=EXCERPT_LENGTH, verbose_name='Краткое описание'),
+        ),
+        migrations.AddField(
+            model_name='coin',
+            name='description_excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=EXCERPT_LENGTH, verbose_name='Краткое описание'),
+        ),
+        migrations.RunPython(fill_description_excerpt, migrations.RunPython.noop),
+    ]
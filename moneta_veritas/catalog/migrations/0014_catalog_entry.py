@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2026-10-17 14:37
+
+import django.db.models.deletion
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+
+def register_items(apps, schema_editor):
+    CatalogEntry = apps.get_model('catalog', 'CatalogEntry')
+    Coin = apps.get_model('catalog', 'Coin')
+    Banknote = apps.get_model('catalog', 'Banknote')
+
+    # Прежний адрес /catalog/<id>/ находил в первую очередь монету,
+    # поэтому монеты сохраняют свои id, а банкноты получают новые
+    coins = list(Coin.objects.only('pk'))
+    CatalogEntry.objects.bulk_create(
+        [CatalogEntry(pk=coin.pk, item_type='coin') for coin in coins], batch_size=500
+    )
+    for coin in coins:
+        coin.catalog_entry_id = coin.pk
+    Coin.objects.bulk_update(coins, ['catalog_entry'], batch_size=500)
+
+    banknotes = list(Banknote.objects.only('pk'))
+    start = max((coin.pk for coin in coins), default=0) + 1
+    CatalogEntry.objects.bulk_create(
+        [CatalogEntry(pk=start + number, item_type='banknote') for number in range(len(banknotes))],
+        batch_size=500
+    )
+    for number, banknote in enumerate(banknotes):
+        banknote.catalog_entry_id = start + number
+    Banknote.objects.bulk_update(banknotes, ['catalog_entry'], batch_size=500)
+
+    # id заданы явно - сдвигаем последовательность (в SQLite не требуется)
+    with schema_editor.connection.cursor() as cursor:
+        for sql in schema_editor.connection.ops.sequence_reset_sql(no_style(), [CatalogEntry]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0013_description_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_type', models.CharField(choices=[('coin', 'Монета'), ('banknote', 'Банкнота')], max_length=20, verbose_name='Тип предмета')),
+            ],
+            options={
+                'verbose_name': 'запись каталога',
+                'verbose_name_plural': 'Записи каталога',
+            },
+        ),
+        migrations.AddField(
+            model_name='banknote',
+            name='catalog_entry',
+            field=models.OneToOneField(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s', to='catalog.catalogentry', verbose_name='Запись каталога'),
+        ),
+        migrations.AddField(
+            model_name='coin',
+            name='catalog_entry',
+            field=models.OneToOneField(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s', to='catalog.catalogentry', verbose_name='Запись каталога'),
+        ),
+        migrations.RunPython(register_items, migrations.RunPython.noop),
+    ]
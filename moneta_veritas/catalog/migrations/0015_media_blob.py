@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-17 14:42
+
+import catalog.storage
+import catalog.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0014_catalog_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Имя файла')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'медиафайл',
+                'verbose_name_plural': 'Медиафайлы',
+            },
+        ),
+        migrations.AlterField(
+            model_name='banknote',
+            name='image',
+            field=models.ImageField(blank=True, storage=catalog.storage.ContentAddressedStorage(), upload_to='collectible_images', validators=[catalog.validators.validate_image_size, catalog.validators.validate_image_extension], verbose_name='Фото'),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='image',
+            field=models.ImageField(blank=True, storage=catalog.storage.ContentAddressedStorage(), upload_to='collectible_images', validators=[catalog.validators.validate_image_size, catalog.validators.validate_image_extension], verbose_name='Фото'),
+        ),
+        migrations.AlterField(
+            model_name='news',
+            name='image',
+            field=models.ImageField(blank=True, storage=catalog.storage.ContentAddressedStorage(), upload_to='news_images', validators=[catalog.validators.validate_image_size, catalog.validators.validate_image_extension], verbose_name='Изображение'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 14:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0015_media_blob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['updated_at'], name='banknote_pub_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['updated_at'], name='coin_pub_updated'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-17 15:33
+
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+# Последняя производная, которую пишет catalog/images.py (detail, JPEG).
+# Схема имен скопирована, чтобы миграция не зависела от текущего кода.
+LAST_DERIVATIVE = 'derivatives/{root}_detail.jpg'
+
+BATCH_SIZE = 500
+
+
+def mark_existing_derivatives(apps, schema_editor):
+    """Отмечает записи, для фото которых превью уже созданы"""
+    for model_name in ('Coin', 'Banknote', 'News'):
+        model = apps.get_model('catalog', model_name)
+        batch = []
+        for item in model.objects.exclude(image='').only('pk', 'image').iterator(chunk_size=BATCH_SIZE):
+            root = os.path.splitext(item.image.name)[0]
+            if default_storage.exists(LAST_DERIVATIVE.format(root=root)):
+                item.image_derivatives = True
+                batch.append(item)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, ['image_derivatives'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['image_derivatives'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0016_export_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banknote',
+            name='image_derivatives',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Превью созданы'),
+        ),
+        migrations.AddField(
+            model_name='coin',
+            name='image_derivatives',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Превью созданы'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_derivatives',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Превью созданы'),
+        ),
+        migrations.RunPython(mark_existing_derivatives, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-17 15:36
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0017_image_derivatives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_id', models.PositiveBigIntegerField(verbose_name='Запись каталога')),
+                ('item_type', models.CharField(choices=[('coin', 'Монета'), ('banknote', 'Банкнота')], max_length=20, verbose_name='Тип предмета')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'удаленный предмет',
+                'verbose_name_plural': 'Удаленные предметы',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='banknote',
+            index=models.Index(condition=models.Q(('is_published', True), _negated=True), fields=['updated_at'], name='banknote_unpub_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(condition=models.Q(('is_published', True), _negated=True), fields=['updated_at'], name='coin_unpub_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='deleteditem',
+            index=models.Index(fields=['item_type', 'deleted_at'], name='deleteditem_type_deleted'),
+        ),
+    ]
@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import PermissionDenied
+from django.db import models
 from django.shortcuts import get_object_or_404
 
+from .facets import get_facets
+from .filters import get_filterset
+from .pagination import CursorPage, CursorPaginator, InvalidCursor
+
 
 class AuthorRequiredMixin(UserPassesTestMixin):
     """Миксин для проверки авторства"""
@@ -14,16 +20,86 @@ class AuthorRequiredMixin(UserPassesTestMixin):
         raise PermissionDenied("У вас нет прав для выполнения этого действия.")
 
 
+def published_or_own(queryset, user):
+    """Опубликованные объекты и свои объекты пользователя"""
+    if user.is_authenticated:
+        # Показываем все свои объекты и опубликованные чужие
+        return queryset.filter(
+            models.Q(is_published=True) |
+            models.Q(author=user)
+        )
+    # Для неавторизованных - только опубликованные
+    return queryset.filter(is_published=True)
+
+
 class AuthorOrPublishedMixin:
     """Миксин для отображения только опубликованных или своих объектов"""
     
     def get_queryset(self):
-        queryset = super().get_queryset()
-        if self.request.user.is_authenticated:
-            # Показываем все свои объекты и опубликованные чужие
-            return queryset.filter(
-                models.Q(is_published=True) | 
-                models.Q(author=self.request.user)
-            )
-        # Для неавторизованных - только опубликованные
-        return queryset.filter(is_published=True)
\ No newline at end of file
+        return published_or_own(super().get_queryset(), self.request.user)
+
+
+class FilteredListMixin(AuthorOrPublishedMixin):
+    """Миксин списка предметов с декларативными фильтрами (catalog/filters.py)"""
+
+    @property
+    def filterset(self):
+        if not hasattr(self, '_filterset'):
+            self._filterset = get_filterset(self.model, self.request.GET)
+        return self._filterset
+
+    def get_queryset(self):
+        queryset = self.filterset.apply(super().get_queryset())
+        queryset = self.model.card_queryset(queryset)
+        self.ordering_key = self.filterset.ordering
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filterset'] = self.filterset
+        context['search_params'] = self.filterset.values()
+        context['facets'] = get_facets(self.object_list, self.filterset, self.request.user)
+        return context
+
+
+class CursorPaginationMixin:
+    """Миксин курсорной пагинации для ListView.
+
+    Включается настройкой CATALOG_CURSOR_PAGINATION или параметром ?cursor=.
+    Представление должно записать текущую сортировку в self.ordering_key.
+    """
+    cursor_param = 'cursor'
+    ordering_key = '-created_at'
+
+    def use_cursor_pagination(self):
+        return (
+            getattr(settings, 'CATALOG_CURSOR_PAGINATION', False) or
+            self.cursor_param in self.request.GET
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, self.ordering_key)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_param))
+        except InvalidCursor:
+            page = paginator.page()
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_cursor_url(self, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        params[self.cursor_param] = cursor
+        return f'?{params.urlencode()}'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        if isinstance(page, CursorPage):
+            context['cursor_mode'] = True
+            context['next_page_url'] = self.get_cursor_url(page.next_cursor)
+            context['previous_page_url'] = self.get_cursor_url(page.previous_cursor)
+        return context
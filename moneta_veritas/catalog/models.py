@@ -1,5 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import Truncator
+from .search import build_search_text
+from .storage import media_storage
 from .validators import validate_year, validate_image_size, validate_image_extension
 
 User = get_user_model()
@@ -50,6 +55,84 @@ class Mint(models.Model):
         return self.title
 
 
+class CatalogEntry(models.Model):
+    """Глобальный идентификатор предмета каталога.
+
+    У монет и банкнот свои последовательности id, поэтому общие ссылки
+    (страница предмета, коллекции, поиск) используют id этой таблицы.
+    Предмет находится одним запросом через select_related('coin', 'banknote').
+    """
+    ITEM_TYPES = [
+        ('coin', 'Монета'),
+        ('banknote', 'Банкнота'),
+    ]
+
+    item_type = models.CharField(max_length=20, choices=ITEM_TYPES, verbose_name='Тип предмета')
+
+    class Meta:
+        verbose_name = 'запись каталога'
+        verbose_name_plural = 'Записи каталога'
+
+    def __str__(self):
+        return f'{self.item_type} #{self.pk}'
+
+    def get_item(self):
+        """Монета или банкнота, на которую указывает запись"""
+        return getattr(self, self.item_type, None)
+
+    def get_absolute_url(self):
+        return reverse('catalog:catalog_detail', args=[self.pk])
+
+
+class DeletedItem(models.Model):
+    """Удаленный предмет каталога.
+
+    Запись остается после удаления монеты или банкноты, чтобы
+    инкрементальная выгрузка (catalog/export.py) сообщила о нем.
+    """
+    entry_id = models.PositiveBigIntegerField(verbose_name='Запись каталога')
+    item_type = models.CharField(max_length=20, choices=CatalogEntry.ITEM_TYPES, verbose_name='Тип предмета')
+    deleted_at = models.DateTimeField(default=timezone.now, verbose_name='Дата удаления')
+
+    class Meta:
+        verbose_name = 'удаленный предмет'
+        verbose_name_plural = 'Удаленные предметы'
+        indexes = [
+            models.Index(fields=['item_type', 'deleted_at'], name='deleteditem_type_deleted'),
+        ]
+
+    def __str__(self):
+        return f'{self.item_type} #{self.entry_id}'
+
+
+class MediaBlob(models.Model):
+    """Файл контентно-адресуемого хранилища и число ссылок на него"""
+    name = models.CharField(max_length=255, unique=True, verbose_name='Имя файла')
+    ref_count = models.PositiveIntegerField(default=0, verbose_name='Число ссылок')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+
+    class Meta:
+        verbose_name = 'медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count})'
+
+
+# Условие видимости, общее для частичных индексов каталога
+PUBLISHED = models.Q(is_published=True)
+
+# Длина краткого описания в карточках списков. Миграция 0013 заполнила
+# поле со своей копией значения: при изменении правила нужна миграция
+# с пересчетом description_excerpt
+EXCERPT_LENGTH = 60
+
+
+def build_excerpt(text):
+    """Краткое описание для карточки (как truncatechars в шаблоне)"""
+    return Truncator(text or '').chars(EXCERPT_LENGTH)
+
+
 class CollectibleItem(models.Model):
     name = models.CharField(max_length=200, verbose_name='Название')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, blank=True, null=True, verbose_name='Категория')
@@ -64,6 +147,7 @@ class CollectibleItem(models.Model):
     image = models.ImageField(
         'Фото',
         upload_to='collectible_images',
+        storage=media_storage,
         blank=True,
         validators=[validate_image_size, validate_image_extension]
     )
@@ -77,14 +161,90 @@ class CollectibleItem(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
     is_published = models.BooleanField(default=True, verbose_name='Опубликовано')
     is_on_main = models.BooleanField(default=False, verbose_name='На главной странице')
+    catalog_entry = models.OneToOneField(
+        CatalogEntry,
+        on_delete=models.CASCADE,
+        null=True,
+        editable=False,
+        related_name='%(class)s',
+        verbose_name='Запись каталога'
+    )
+    search_text = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Текст для поиска'
+    )
+    description_excerpt = models.CharField(
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Краткое описание'
+    )
+    # Превью фото созданы (catalog/images.py); шаблоны не проверяют файлы
+    image_derivatives = models.BooleanField(default=False, editable=False, verbose_name='Превью созданы')
+
+    # Поля, попадающие в поиск (первое - заголовок); задаются в наследниках
+    search_fields = ('name',)
+    # Колонки, которые нужны карточке в списках (включая поля сортировки)
+    card_fields = (
+        'id', 'name', 'image', 'image_derivatives', 'year', 'denomination', 'currency', 'description_excerpt',
+        'is_published', 'created_at', 'catalog_entry', 'author__id', 'author__username',
+    )
     
     class Meta:
         abstract = True
         ordering = ['-created_at']
+        # Частичные индексы под запросы списков: в SQLite фильтр
+        # is_published=True компилируется в "WHERE is_published", поэтому
+        # индекс с тем же условием используется для поиска и сортировки
+        indexes = [
+            models.Index(fields=['-created_at'], condition=PUBLISHED, name='%(class)s_pub_created'),
+            models.Index(fields=['name'], condition=PUBLISHED, name='%(class)s_pub_name'),
+            models.Index(fields=['year'], condition=PUBLISHED, name='%(class)s_pub_year'),
+            models.Index(fields=['denomination'], condition=PUBLISHED, name='%(class)s_pub_denomination'),
+            models.Index(fields=['country', '-created_at'], condition=PUBLISHED, name='%(class)s_pub_country'),
+            models.Index(fields=['currency', '-created_at'], condition=PUBLISHED, name='%(class)s_pub_currency'),
+            models.Index(
+                fields=['-created_at'],
+                condition=PUBLISHED & models.Q(is_on_main=True),
+                name='%(class)s_pub_main'
+            ),
+            models.Index(fields=['author', '-created_at'], name='%(class)s_author_created'),
+            # Инкрементальная выгрузка по курсору since (catalog/export.py)
+            models.Index(fields=['updated_at'], condition=PUBLISHED, name='%(class)s_pub_updated'),
+            models.Index(fields=['updated_at'], condition=~PUBLISHED, name='%(class)s_unpub_updated'),
+        ]
     
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Нормализуем текст при сохранении, чтобы не делать этого при поиске
+        self.search_text = build_search_text(self)
+        self.description_excerpt = build_excerpt(self.description)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_text', 'description_excerpt'}
+        if self.catalog_entry_id is not None:
+            super().save(*args, **kwargs)
+            return
+        # Новый предмет регистрируется в каталоге в той же транзакции
+        with transaction.atomic():
+            self.catalog_entry = CatalogEntry.objects.create(item_type=self._meta.model_name)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'catalog_entry'}
+            super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse('catalog:catalog_detail', args=[self.catalog_entry_id])
+
+    @classmethod
+    def card_queryset(cls, queryset):
+        """Только колонки карточек списка и автор одним JOIN"""
+        return queryset.select_related('author').only(*cls.card_fields)
+
 
 class Coin(CollectibleItem):
     denomination = models.CharField(max_length=50, verbose_name='Номинал')
@@ -111,9 +271,16 @@ class Coin(CollectibleItem):
         help_text='Диаметр в миллиметрах'
     )
 
-    class Meta:
+    search_fields = ('name', 'description', 'denomination')
+
+    class Meta(CollectibleItem.Meta):
         verbose_name = 'монета'
         verbose_name_plural = 'монеты'
+        indexes = CollectibleItem.Meta.indexes + [
+            models.Index(fields=['material', '-created_at'], condition=PUBLISHED, name='coin_pub_material'),
+            models.Index(fields=['mint', '-created_at'], condition=PUBLISHED, name='coin_pub_mint'),
+            models.Index(fields=['diameter'], condition=PUBLISHED, name='coin_pub_diameter'),
+        ]
     
     def __str__(self):
         return self.name
@@ -128,9 +295,15 @@ class Banknote(CollectibleItem):
     width = models.IntegerField(blank=True, null=True, verbose_name='Ширина (мм)')
     height = models.IntegerField(blank=True, null=True, verbose_name='Высота (мм)')
 
-    class Meta:
+    search_fields = ('name', 'description', 'denomination', 'serial_number')
+
+    class Meta(CollectibleItem.Meta):
         verbose_name = 'банкнота'
         verbose_name_plural = 'банкноты'
+        indexes = CollectibleItem.Meta.indexes + [
+            models.Index(fields=['width'], condition=PUBLISHED, name='banknote_pub_width'),
+            models.Index(fields=['height'], condition=PUBLISHED, name='banknote_pub_height'),
+        ]
     
     def __str__(self):
         return self.name
@@ -150,9 +323,19 @@ class News(models.Model):
     image = models.ImageField(
         'Изображение',
         upload_to='news_images',
+        storage=media_storage,
         blank=True,
         validators=[validate_image_size, validate_image_extension]
     )
+    image_derivatives = models.BooleanField(default=False, editable=False, verbose_name='Превью созданы')
+    search_text = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Текст для поиска'
+    )
+
+    search_fields = ('title', 'content')
 
     class Meta:
         verbose_name = 'новость'
@@ -162,5 +345,12 @@ class News(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.search_text = build_search_text(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('catalog:news_detail', args=[self.pk])
\ No newline at end of file
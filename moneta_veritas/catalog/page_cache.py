@@ -0,0 +1,148 @@
+# catalog/page_cache.py
+"""
+Кеш HTML-страниц каталога для анонимных посетителей.
+
+Ключ страницы складывается из пути, каноничной строки запроса и текущих
+поколений моделей, от которых страница зависит. Сигналы save/delete
+увеличивают поколение модели (см. catalog/signals.py), поэтому после
+изменения монеты устаревают только страницы, зависящие от монет, а старые
+записи просто истекают по таймауту. Карточки показывают имена авторов,
+поэтому списки зависят и от пользователей ('user'), а фасеты - от
+категорий ('category'). Авторизованные пользователи всегда
+получают свежую персональную страницу.
+
+Декоратор работает и с async-представлениями (catalog/async_views.py):
+тогда кеш читается и пишется через асинхронный API.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+GENERATION_KEY = 'catalog:generation:{}'
+PAGE_KEY = 'catalog:page:{}:{}'
+
+# Параметры, само наличие которых меняет страницу: пустой ?cursor=
+# включает курсорную пагинацию (CursorPaginationMixin)
+PRESENCE_PARAMS = frozenset({'cursor'})
+
+
+def get_generations(names):
+    """Текущие поколения моделей (один запрос к кешу)"""
+    keys = [GENERATION_KEY.format(name) for name in names]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(name):
+    """Делает устаревшими все страницы, зависящие от модели"""
+    key = GENERATION_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен из кеша - начинаем с нового уникального значения
+        cache.set(key, time.time_ns(), None)
+
+
+def canonical_query(request):
+    """Строка запроса с отсортированными непустыми параметрами (и PRESENCE_PARAMS)"""
+    return '&'.join(
+        f'{key}={value}'
+        for key, values in sorted(request.GET.lists())
+        for value in sorted(values)
+        if value != '' or key in PRESENCE_PARAMS
+    )
+
+
+def is_cacheable(request, user=None):
+    """Кешируются только GET/HEAD анонимов без сессии и flash-сообщений"""
+    user = user if user is not None else request.user
+    return (
+        request.method in ('GET', 'HEAD') and
+        not user.is_authenticated and
+        settings.SESSION_COOKIE_NAME not in request.COOKIES and
+        'messages' not in request.COOKIES
+    )
+
+
+def page_key(request, dependencies):
+    generations = get_generations(dependencies)
+    raw = repr((canonical_query(request), generations))
+    return PAGE_KEY.format(request.path, hashlib.md5(raw.encode()).hexdigest())
+
+
+def should_store(request, response):
+    """Можно ли положить ответ в общий кеш"""
+    # Страницы с CSRF-токеном или cookie персональны
+    if response.status_code != 200 or response.cookies:
+        return False
+    return not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+
+
+def get_timeout(timeout):
+    return timeout if timeout is not None else getattr(settings, 'CATALOG_PAGE_CACHE_TIMEOUT', 600)
+
+
+def cache_anonymous_page(*dependencies, timeout=None):
+    """Декоратор представления: кеширует страницу для анонимов.
+
+    dependencies - имена моделей (model_name), изменение которых
+    должно сбрасывать страницу.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return _async_decorator(view, dependencies, timeout)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable(request):
+                return view(request, *args, **kwargs)
+
+            key = page_key(request, dependencies)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view(request, *args, **kwargs)
+
+            def store(response):
+                if should_store(request, response):
+                    cache.set(key, (response.content, response['Content-Type']), get_timeout(timeout))
+
+            if hasattr(response, 'add_post_render_callback'):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+            return response
+        return wrapper
+    return decorator
+
+
+def _async_decorator(view, dependencies, timeout):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # request.user ленивый и синхронный: пользователя получаем через auser()
+        if not is_cacheable(request, await request.auser()):
+            return await view(request, *args, **kwargs)
+
+        key = await sync_to_async(page_key)(request, dependencies)
+        cached = await cache.aget(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        # async-представления возвращают уже отрисованный ответ
+        response = await view(request, *args, **kwargs)
+        if should_store(request, response):
+            await cache.aset(key, (response.content, response['Content-Type']), get_timeout(timeout))
+        return response
+    return wrapper
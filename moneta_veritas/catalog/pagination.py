@@ -0,0 +1,162 @@
+# catalog/pagination.py
+"""
+Курсорная (keyset) пагинация для списков каталога.
+
+Вместо OFFSET страница выбирается условием "после ключа (sort_key, id)",
+поэтому глубокие страницы стоят столько же, сколько первая, а COUNT(*)
+по всей выборке не выполняется. Курсоры подписаны и непрозрачны для клиента.
+"""
+from django.core import signing
+from django.db.models import F, Q
+
+CURSOR_SALT = 'catalog.cursor'
+
+
+class InvalidCursor(Exception):
+    """Курсор поврежден или относится к другой сортировке"""
+
+
+class CursorPage:
+    """Страница курсорной пагинации"""
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинатор, выбирающий страницы по ключу (sort_key, id).
+
+    ordering - поле сортировки с необязательным '-' (как в order_by),
+    может быть и аннотацией (например, search_rank).
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.ordering = ordering
+        self.nullable = self._is_nullable()
+
+    def _is_nullable(self):
+        try:
+            return self.queryset.model._meta.get_field(self.field).null
+        except Exception:
+            # Аннотации (search_rank) не бывают NULL
+            return False
+
+    def _to_python(self, value):
+        if value is None:
+            return None
+        try:
+            return self.queryset.model._meta.get_field(self.field).to_python(value)
+        except Exception:
+            return value
+
+    def encode_cursor(self, obj, direction):
+        value = getattr(obj, self.field)
+        if value is not None and not isinstance(value, (int, float, str)):
+            value = value.isoformat()
+        return signing.dumps(
+            {'o': self.ordering, 'v': value, 'pk': obj.pk, 'd': direction},
+            salt=CURSOR_SALT,
+            compress=True
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            raise InvalidCursor(cursor)
+        if data.get('o') != self.ordering or data.get('d') not in ('next', 'prev'):
+            raise InvalidCursor(cursor)
+        return self._to_python(data['v']), data['pk'], data['d']
+
+    def _order_by(self, descending, nulls_first):
+        """Сортировка в порядке обхода (NULL - явно в начале или в конце)"""
+        modifiers = {}
+        if self.nullable:
+            modifiers = {'nulls_first': True} if nulls_first else {'nulls_last': True}
+        field = F(self.field)
+        pk = F('pk')
+        if descending:
+            return field.desc(**modifiers), pk.desc()
+        return field.asc(**modifiers), pk.asc()
+
+    def _seek(self, value, pk, descending, nulls_first):
+        """Условие "строго после (value, pk)" в порядке обхода"""
+        lookup = 'lt' if descending else 'gt'
+        if value is None:
+            condition = Q(**{f'{self.field}__isnull': True, f'pk__{lookup}': pk})
+            if nulls_first:
+                condition |= Q(**{f'{self.field}__isnull': False})
+            return condition
+        # Внешнее условие field >= value (<=) дает SQLite границу диапазона
+        # по индексу, вместо просмотра индекса с самого начала
+        condition = Q(**{f'{self.field}__{lookup}e': value}) & (
+            Q(**{f'{self.field}__{lookup}': value}) |
+            Q(**{self.field: value, f'pk__{lookup}': pk})
+        )
+        if self.nullable and not nulls_first:
+            condition |= Q(**{f'{self.field}__isnull': True})
+        return condition
+
+    def _prepare(self, cursor):
+        """Queryset страницы (с запасом в одну строку) и позиция курсора"""
+        # NULL меньше любых значений, как в SQLite по умолчанию
+        descending, nulls_first = self.descending, not self.descending
+        position = None
+        if cursor:
+            position = self.decode_cursor(cursor)
+
+        backwards = position is not None and position[2] == 'prev'
+        if backwards:
+            # Идем в обратном порядке и разворачиваем результат
+            descending, nulls_first = not descending, not nulls_first
+
+        queryset = self.queryset.order_by(*self._order_by(descending, nulls_first))
+        if position is not None:
+            queryset = queryset.filter(self._seek(position[0], position[1], descending, nulls_first))
+        return queryset[:self.per_page + 1], position, backwards
+
+    def _make_page(self, rows, position, backwards):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = self.encode_cursor(rows[-1], 'next')
+            if (has_more and backwards) or (position is not None and not backwards):
+                previous_cursor = self.encode_cursor(rows[0], 'prev')
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def page(self, cursor=None):
+        """Возвращает страницу после (или перед) позицией курсора"""
+        queryset, position, backwards = self._prepare(cursor)
+        return self._make_page(list(queryset), position, backwards)
+
+    async def apage(self, cursor=None):
+        """Асинхронный вариант page() для async-представлений"""
+        queryset, position, backwards = self._prepare(cursor)
+        return self._make_page([row async for row in queryset], position, backwards)
@@ -0,0 +1,175 @@
+# catalog/query_budgets.py
+"""
+Бюджеты SQL-запросов страниц: сколько запросов и сколько суммарного
+времени SQL может потратить каждый именованный маршрут.
+
+Бюджет задается для трех вариантов посетителя: аноним, вошедший
+пользователь без своих записей и владелец (автор предметов, новости
+и элемента коллекции). Замер идет на синтетическом каталоге
+BUDGET_FIXTURE_SIZE монет с холодными кешами - как в catalog/benchmarks.py,
+откуда берутся и сценарии запросов.
+
+Проверку запускает тестовый раннер (moneta_veritas/test_runner.py)
+при полном прогоне тестов или с флагом --query-budgets. Превышение
+числа запросов роняет тест, в сообщении перечисляются все запросы
+страницы - так видно, какой запрос повторяется (N+1). Если страница
+законно стала делать больше запросов, бюджет в QUERY_BUDGETS
+увеличивается в том же изменении.
+
+Время SQL зависит от машины и ее загрузки, поэтому его превышение
+роняет тест только при явном --query-budgets (enforce_sql_time), а при
+полном прогоне лишь пишется в лог предупреждением.
+"""
+import logging
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+
+from . import benchmarks
+
+User = get_user_model()
+
+# Размер каталога, на котором заданы бюджеты
+BUDGET_FIXTURE_SIZE = 50
+BUDGET_SEED = 42
+
+logger = logging.getLogger(__name__)
+
+# Суммарное время SQL по умолчанию (мс); с запасом на медленные машины
+DEFAULT_SQL_MS = 50
+
+VARIANTS = ('anonymous', 'authenticated', 'owner')
+
+
+class Budget:
+    """Предел для одного варианта страницы"""
+
+    def __init__(self, queries, sql_ms=DEFAULT_SQL_MS):
+        self.queries = queries
+        self.sql_ms = sql_ms
+
+    def __repr__(self):
+        return f'Budget(queries={self.queries}, sql_ms={self.sql_ms})'
+
+
+def budget(anonymous, authenticated, owner=None, sql_ms=DEFAULT_SQL_MS):
+    """Бюджеты трех вариантов; у владельца по умолчанию - как у вошедшего"""
+    owner = authenticated if owner is None else owner
+    return {
+        'anonymous': Budget(anonymous, sql_ms),
+        'authenticated': Budget(authenticated, sql_ms),
+        'owner': Budget(owner, sql_ms),
+    }
+
+
+# Аноним на закрытых страницах получает редирект на вход или 403,
+# вошедший без прав - 403; бюджет ограничивает и эти ответы.
+QUERY_BUDGETS = {
+    'homepage:index': budget(3, 5),
+    'catalog:catalog_list': budget(2, 4),
+    'catalog:catalog_detail': budget(1, 3),
+    'catalog:coin_list': budget(6, 8),
+    'catalog:coin_create': budget(0, 6),
+    'catalog:coin_edit': budget(2, 4, 9),
+    'catalog:coin_delete': budget(2, 4, 7),
+    'catalog:banknote_list': budget(4, 6),
+    'catalog:banknote_create': budget(0, 4),
+    'catalog:banknote_edit': budget(2, 4, 7),
+    'catalog:banknote_delete': budget(2, 4, 7),
+    # Три курсора (опубликованные, снятые, удаленные) + справочники + строки
+    'catalog:catalog_export': budget(8, 8),
+    'catalog:news_list': budget(3, 5),
+    'catalog:news_detail': budget(2, 4),
+    'catalog:news_create': budget(0, 2),
+    'catalog:news_edit': budget(0, 4),
+    'catalog:news_delete': budget(0, 2, 4),
+    'usercollections:my_collection': budget(0, 3, 4),
+    'usercollections:add_to_collection': budget(0, 7),
+    'usercollections:add_item': budget(0, 4),
+    'usercollections:edit_item': budget(2, 4, 6),
+    'usercollections:remove_item': budget(2, 4, 7),
+}
+
+
+def missing_budgets():
+    """Маршруты без бюджета хотя бы для одного варианта"""
+    return [
+        name for name in benchmarks.collect_url_names()
+        if set(QUERY_BUDGETS.get(name, ())) != set(VARIANTS)
+    ]
+
+
+def sql_time_ms(queries):
+    return sum(float(query['time']) for query in queries) * 1000
+
+
+def check(name, variant, client, data, limit=None, enforce_sql_time=False):
+    """Замер одного варианта; возвращает описание превышения или None"""
+    limit = limit or QUERY_BUDGETS[name][variant]
+    response, queries, _ = benchmarks.fetch(client, name, data)
+    spent_ms = sql_time_ms(queries)
+    problems = []
+    if response.status_code >= 500:
+        problems.append(f'ответ {response.status_code}')
+    if len(queries) > limit.queries:
+        problems.append(f'запросов {len(queries)} при бюджете {limit.queries}')
+    if spent_ms > limit.sql_ms:
+        message = f'SQL {spent_ms:.1f} мс при бюджете {limit.sql_ms} мс'
+        if enforce_sql_time:
+            problems.append(message)
+        else:
+            logger.warning('%s (%s): %s', name, variant, message)
+    if not problems:
+        return None
+    listing = '\n'.join(
+        f'  {number}. [{float(query["time"]) * 1000:.1f} мс] {query["sql"]}'
+        for number, query in enumerate(queries, 1)
+    )
+    return f'{name} ({variant}): {", ".join(problems)}\n{listing}'
+
+
+@contextmanager
+def quiet_request_log():
+    """403 для чужих записей ожидаемы, их трассировки не нужны в выводе тестов"""
+    logger = logging.getLogger('django.request')
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+
+
+class QueryBudgetTest(TestCase):
+    """Страницы укладываются в бюджеты QUERY_BUDGETS"""
+    # Включается раннером при явном --query-budgets
+    enforce_sql_time = False
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = benchmarks.BenchmarkData(BUDGET_FIXTURE_SIZE, BUDGET_SEED)
+        cls.member = User.objects.create(username='budget-member')
+
+    def make_clients(self):
+        clients = {variant: Client(REMOTE_ADDR=benchmarks.REMOTE_ADDR) for variant in VARIANTS}
+        clients['authenticated'].force_login(self.member)
+        clients['owner'].force_login(self.data.user)
+        return clients
+
+    def test_every_url_has_budget(self):
+        """Бюджет задан для каждого маршрута и каждого варианта"""
+        self.assertEqual(missing_budgets(), [])
+
+    def test_pages_within_budget(self):
+        """Число запросов (и с --query-budgets время SQL) не превышают бюджет"""
+        clients = self.make_clients()
+        with quiet_request_log():
+            for name in benchmarks.collect_url_names():
+                for variant in VARIANTS:
+                    with self.subTest(url=name, variant=variant):
+                        problem = check(
+                            name, variant, clients[variant], self.data, enforce_sql_time=self.enforce_sql_time
+                        )
+                        if problem:
+                            self.fail(problem)
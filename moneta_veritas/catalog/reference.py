@@ -0,0 +1,78 @@
+# catalog/reference.py
+"""
+Кеш справочников (Category, Country, Material, Mint) в памяти процесса.
+
+Каждая таблица загружается один раз на процесс. Актуальность проверяется
+по общему счетчику версий в кеше Django: сигналы save/delete увеличивают
+его, и все воркеры, использующие общий бэкенд кеша, перечитывают таблицы.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'catalog:reference:version'
+
+_lock = threading.Lock()
+_tables = {}
+_version = None
+
+
+def get_version():
+    """Текущая версия справочников (None, если кеш ее не хранит)"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version(**kwargs):
+    """Помечает справочники устаревшими во всех процессах"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Ключ вытеснен из кеша - начинаем с нового уникального значения
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _load(model):
+    queryset = model._default_manager.all()
+    if model._meta.model_name == 'mint':
+        queryset = queryset.select_related('country')
+    rows = tuple(queryset)
+    return rows, {obj.pk: obj for obj in rows}
+
+
+def _get(model):
+    global _version
+    version = get_version()
+    with _lock:
+        if version is None or version != _version:
+            _tables.clear()
+            _version = version
+        table = _tables.get(model)
+    if table is None:
+        table = _load(model)
+        with _lock:
+            if _version == version and version is not None:
+                _tables[model] = table
+    return table
+
+
+def get_table(model):
+    """Все строки справочника (в порядке модели по умолчанию)"""
+    return _get(model)[0]
+
+
+def get_map(model):
+    """Строки справочника по первичному ключу"""
+    return _get(model)[1]
+
+
+def clear():
+    """Сбрасывает кеш текущего процесса"""
+    global _version
+    with _lock:
+        _tables.clear()
+        _version = None
@@ -0,0 +1,180 @@
+# catalog/search.py
+"""
+Полнотекстовый поиск по каталогу на базе SQLite FTS5.
+
+Индекс хранится в виртуальной таблице catalog_search и синхронизируется
+сигналами при сохранении и удалении предметов (см. catalog/signals.py).
+Полная перестройка: python manage.py rebuild_search_index
+
+Текст индексируется в нормализованном виде (см. normalize_text): регистр
+сворачивается с учетом Unicode, "ё" заменяется на "е". Так же нормализуется
+и поисковый запрос, поэтому "монета" находит "Монета", а "елка" - "Ёлка".
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'catalog_search'
+
+# Веса колонок для bm25: заголовок важнее остального текста
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_available():
+    """Проверяет, поддерживает ли текущая база индекс FTS5"""
+    return connection.vendor == 'sqlite'
+
+
+def item_type(model):
+    """Тип предмета в индексе ('coin', 'banknote', 'news')"""
+    return model._meta.model_name
+
+
+def normalize_text(text):
+    """Нормализует текст для поиска: NFKC, casefold, ё -> е"""
+    text = unicodedata.normalize('NFKC', text or '')
+    return text.casefold().replace('ё', 'е')
+
+
+def build_search_text(instance):
+    """Собирает нормализованный текст предмета для колонки search_text"""
+    return normalize_text(
+        ' '.join(str(getattr(instance, field) or '') for field in instance.search_fields)
+    )
+
+
+def build_match_query(query):
+    """Преобразует пользовательский запрос в безопасное выражение MATCH.
+
+    Каждое слово берется в кавычки и ищется по префиксу,
+    слова объединяются через AND.
+    """
+    tokens = TOKEN_RE.findall(normalize_text(query))
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def build_document(instance):
+    """Возвращает нормализованные (заголовок, текст) для индексации предмета"""
+    title = normalize_text(getattr(instance, instance.search_fields[0]))
+    return title, instance.search_text or build_search_text(instance)
+
+
+def index_item(instance):
+    """Добавляет или обновляет предмет в поисковом индексе"""
+    if not is_available():
+        return
+    title, body = build_document(instance)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE item_type = %s AND item_id = %s',
+            [item_type(type(instance)), instance.pk]
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (item_type, item_id, title, body) '
+            f'VALUES (%s, %s, %s, %s)',
+            [item_type(type(instance)), instance.pk, title, body]
+        )
+
+
+def index_items(instances):
+    """Добавляет в индекс новые предметы одним запросом (после bulk_create)"""
+    if not is_available() or not instances:
+        return
+    with connection.cursor() as cursor:
+        _insert_rows(cursor, [
+            (item_type(type(instance)), instance.pk, *build_document(instance))
+            for instance in instances
+        ])
+
+
+def remove_item(instance):
+    """Удаляет предмет из поискового индекса"""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE item_type = %s AND item_id = %s',
+            [item_type(type(instance)), instance.pk]
+        )
+
+
+def rebuild(models, batch_size=500):
+    """Полностью перестраивает индекс для переданных моделей.
+
+    Возвращает количество проиндексированных предметов.
+    """
+    if not is_available():
+        return 0
+    total = 0
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE item_type = %s',
+                [item_type(model)]
+            )
+            rows = []
+            queryset = model.objects.only('pk', 'search_text', *model.search_fields)
+            for instance in queryset.iterator(chunk_size=batch_size):
+                rows.append((item_type(model), instance.pk, *build_document(instance)))
+                if len(rows) >= batch_size:
+                    _insert_rows(cursor, rows)
+                    total += len(rows)
+                    rows = []
+            if rows:
+                _insert_rows(cursor, rows)
+                total += len(rows)
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def _insert_rows(cursor, rows):
+    cursor.executemany(
+        f'INSERT INTO {SEARCH_TABLE} (item_type, item_id, title, body) '
+        f'VALUES (%s, %s, %s, %s)',
+        rows
+    )
+
+
+def search_queryset(queryset, query):
+    """Фильтрует queryset по поисковому запросу.
+
+    Таблица индекса присоединяется к основному запросу, поэтому условия
+    видимости и фильтры выборки применяются до ранжирования и ничего не
+    отсекают. Добавляет аннотацию search_rank (bm25: чем меньше, тем
+    релевантнее), по которой можно сортировать выдачу.
+    """
+    model = queryset.model
+    if not is_available():
+        # Без FTS5 ищем подстроку в заранее нормализованной колонке
+        return queryset.filter(search_text__contains=normalize_text(query)).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    match = build_match_query(query)
+    if not match:
+        return queryset.none().annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+    qn = connection.ops.quote_name
+    pk = f'{qn(model._meta.db_table)}.{qn(model._meta.pk.column)}'
+    return queryset.extra(
+        tables=[SEARCH_TABLE],
+        where=[
+            f'{SEARCH_TABLE}.item_id = {pk}',
+            f'{SEARCH_TABLE} MATCH %s',
+            f'{SEARCH_TABLE}.item_type = %s',
+        ],
+        params=[match, item_type(model)],
+    ).annotate(
+        search_rank=RawSQL(
+            f'bm25({SEARCH_TABLE}, 0, 0, %s, %s)',
+            [TITLE_WEIGHT, BODY_WEIGHT],
+            output_field=FloatField()
+        )
+    )
@@ -0,0 +1,180 @@
+# catalog/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+from PIL import Image
+
+from . import images, page_cache, reference, search, storage
+from .models import Banknote, CatalogEntry, Category, Coin, Country, DeletedItem, Material, Mint, News, User
+
+# Предметы добавлены в обход save() (bulk_create в import_catalog):
+# sender - модель, instances - созданные объекты
+items_bulk_created = Signal()
+
+
+@receiver(post_save, sender=Coin)
+@receiver(post_save, sender=Banknote)
+@receiver(post_save, sender=News)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Обновляет поисковый индекс после сохранения предмета"""
+    if raw:
+        # loaddata: индекс перестраивается командой rebuild_search_index
+        return
+    search.index_item(instance)
+
+
+@receiver(post_delete, sender=Coin)
+@receiver(post_delete, sender=Banknote)
+@receiver(post_delete, sender=News)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Удаляет предмет из поискового индекса"""
+    search.remove_item(instance)
+
+
+@receiver(post_save, sender=Coin)
+@receiver(post_save, sender=Banknote)
+@receiver(post_save, sender=News)
+def create_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Создает превью загруженного изображения и отмечает, что они есть"""
+    if raw:
+        return
+    ready = False
+    if instance.image:
+        try:
+            images.generate_derivatives(instance.image.name)
+            ready = True
+        except (OSError, Image.DecompressionBombError):
+            # Поврежденный или слишком большой файл: шаблоны покажут оригинал
+            pass
+    if instance.image_derivatives != ready:
+        instance.image_derivatives = ready
+        sender.objects.filter(pk=instance.pk).update(image_derivatives=ready)
+
+
+def _image_name(instance):
+    """Имя файла фото без обращения к базе (None, если поле отложено)"""
+    if 'image' not in instance.__dict__:
+        return None
+    value = instance.__dict__['image']
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Coin)
+@receiver(post_init, sender=Banknote)
+@receiver(post_init, sender=News)
+def remember_image(sender, instance, **kwargs):
+    """Запоминает сохраненное фото, чтобы заметить его замену"""
+    instance._stored_image = _image_name(instance) if instance.pk else ''
+
+
+@receiver(post_save, sender=Coin)
+@receiver(post_save, sender=Banknote)
+@receiver(post_save, sender=News)
+def count_image_references(sender, instance, created, raw=False, **kwargs):
+    """Обновляет счетчики ссылок на файлы при смене фото"""
+    if raw:
+        return
+    previous, current = instance._stored_image, _image_name(instance)
+    if current is None or previous is None or previous == current:
+        return
+    storage.acquire(current)
+    storage.release(previous)
+    instance._stored_image = current
+
+
+@receiver(post_delete, sender=Coin)
+@receiver(post_delete, sender=Banknote)
+@receiver(post_delete, sender=News)
+def release_image(sender, instance, **kwargs):
+    """Снимает ссылку удаленного предмета на файл"""
+    storage.release(_image_name(instance) or instance._stored_image)
+
+
+@receiver(post_delete, sender=Coin)
+@receiver(post_delete, sender=Banknote)
+def remove_catalog_entry(sender, instance, **kwargs):
+    """Удаляет глобальную запись каталога вместе с предметом"""
+    if instance.catalog_entry_id is not None:
+        CatalogEntry.objects.filter(pk=instance.catalog_entry_id).delete()
+        # Для инкрементальной выгрузки (catalog/export.py)
+        DeletedItem.objects.create(entry_id=instance.catalog_entry_id, item_type=sender._meta.model_name)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=Material)
+@receiver(post_save, sender=Mint)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=Material)
+@receiver(post_delete, sender=Mint)
+def invalidate_reference_cache(sender, **kwargs):
+    """Сбрасывает кеш справочников во всех процессах"""
+    reference.bump_version()
+    # Повторно после коммита: другой воркер мог успеть перечитать
+    # справочник до фиксации транзакции
+    transaction.on_commit(reference.bump_version)
+
+
+# Модели, от которых зависят закешированные страницы (catalog/page_cache.py)
+PAGE_CACHE_MODELS = (Coin, Banknote, News, Category, Country, Material, Mint)
+
+
+def invalidate_pages(sender, **kwargs):
+    """Сбрасывает страницы, зависящие от измененной модели"""
+    name = sender._meta.model_name
+    page_cache.bump_generation(name)
+    transaction.on_commit(lambda: page_cache.bump_generation(name))
+
+
+@receiver(items_bulk_created)
+def invalidate_pages_after_import(sender, **kwargs):
+    """Сбрасывает страницы после массового импорта"""
+    invalidate_pages(sender)
+
+
+for model in PAGE_CACHE_MODELS:
+    post_save.connect(invalidate_pages, sender=model, dispatch_uid=f'page_cache_save_{model._meta.model_name}')
+    post_delete.connect(invalidate_pages, sender=model, dispatch_uid=f'page_cache_delete_{model._meta.model_name}')
+
+
+# Справочник -> модели предметов со ссылкой на него
+REFERENCE_DEPENDENTS = {
+    Category: (Coin, Banknote),
+    Country: (Coin, Banknote),
+    Material: (Coin,),
+    Mint: (Coin,),
+}
+
+
+def invalidate_dependent_items(sender, **kwargs):
+    """Сбрасывает поколения предметов, ссылающихся на справочник.
+
+    Удаление записи справочника обнуляет ссылки предметов одним UPDATE
+    (SET_NULL) без сигналов предметов, а фасеты (catalog/facets.py)
+    кешируются по поколению модели предметов.
+    """
+    for model in REFERENCE_DEPENDENTS[sender]:
+        invalidate_pages(model)
+
+
+for model in REFERENCE_DEPENDENTS:
+    post_save.connect(
+        invalidate_dependent_items, sender=model, dispatch_uid=f'dependent_items_save_{model._meta.model_name}'
+    )
+    post_delete.connect(
+        invalidate_dependent_items, sender=model, dispatch_uid=f'dependent_items_delete_{model._meta.model_name}'
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, created=False, update_fields=None, **kwargs):
+    """Сбрасывает страницы с именами авторов при смене имени пользователя"""
+    # У нового пользователя еще нет записей, а вход сохраняет только
+    # last_login - страницы от этого не меняются
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    invalidate_pages(sender)
+
+
+post_delete.connect(invalidate_pages, sender=User, dispatch_uid='page_cache_delete_user')
@@ -0,0 +1,117 @@
+# catalog/storage.py
+"""
+Контентно-адресуемое хранилище медиа.
+
+Загружаемый файл потоком пишется во временный файл с одновременным
+подсчетом SHA-256 и сохраняется под именем своего хеша:
+collectible_images/ab/ab12...ef.jpg. Одинаковые фото хранятся один раз,
+а содержимое по адресу никогда не меняется, поэтому его можно кешировать
+навсегда (см. serve_media). Сколько предметов ссылается на файл, считает
+таблица MediaBlob (см. catalog/signals.py); файл без ссылок удаляется.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+HASH_ALGORITHM = 'sha256'
+
+# Путь файла из этого хранилища (и производных от него превью)
+HASHED_NAME_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(_\w+)?\.\w+$')
+
+# Год - максимальный срок, который понимают браузеры и прокси
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, сохраняющее файлы под хешем их содержимого"""
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save: совпадение означает дубликат
+        return name
+
+    def hashed_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], f'{digest}{extension}').replace('\\', '/')
+
+    def _save(self, name, content):
+        os.makedirs(self.location, exist_ok=True)
+        digest = hashlib.new(HASH_ALGORITHM)
+        handle, temporary = tempfile.mkstemp(dir=self.location, prefix='.upload-')
+        try:
+            with os.fdopen(handle, 'wb') as target:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    target.write(chunk)
+
+            name = self.hashed_name(name, digest.hexdigest())
+            path = self.path(name)
+            if os.path.exists(path):
+                # Такой файл уже загружен - второй экземпляр не нужен
+                os.remove(temporary)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temporary, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return name
+
+
+media_storage = ContentAddressedStorage()
+
+
+def acquire(name):
+    """Учитывает новую ссылку на файл хранилища"""
+    from .models import MediaBlob
+
+    if not name or not HASHED_NAME_RE.search(name):
+        return
+    MediaBlob.objects.get_or_create(name=name)
+    MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+
+def release(name):
+    """Снимает ссылку; файл без ссылок удаляется после коммита"""
+    from . import images
+    from .models import MediaBlob
+
+    if not name or not HASHED_NAME_RE.search(name):
+        # Файлы, загруженные до хранилища, не учитываются
+        return
+    MediaBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    if not MediaBlob.objects.filter(name=name, ref_count=0).delete()[0]:
+        return
+
+    def remove_files():
+        # Файл могли загрузить заново, пока транзакция была открыта
+        if MediaBlob.objects.filter(name=name).exists():
+            return
+        for target in [name, *images.all_derivative_names(name)]:
+            media_storage.delete(target)
+
+    transaction.on_commit(remove_files)
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """Отдает медиа; файлы с хешем в имени - с бессрочным кешированием.
+
+    Используется при DEBUG. В продакшене те же заголовки ставит прокси
+    для путей вида <каталог>/xx/<sha256>.<ext>.
+    """
+    response = serve(request, path, document_root=document_root, show_indexes=show_indexes)
+    if response.status_code == 200 and HASHED_NAME_RE.search(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
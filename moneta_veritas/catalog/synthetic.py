@@ -0,0 +1,232 @@
+# catalog/synthetic.py
+"""
+Генератор синтетических данных каталога: python manage.py generate_catalog_data
+
+Создает справочники, пользователей, монеты, банкноты и элементы коллекций
+правдоподобного вида - от сотен до миллионов записей. Предметы пишутся
+пачками через insert_items (catalog/importer.py), поэтому расход памяти
+не зависит от объема. Генератор детерминирован: с одинаковым seed
+получаются одинаковые данные, что нужно для сравнимых замеров
+(catalog/benchmarks.py).
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from usercollections.models import UserCollectionItem
+
+from .importer import insert_items
+from .models import Banknote, Category, Coin, Country, Material, Mint
+
+User = get_user_model()
+
+DEFAULT_SEED = 42
+DEFAULT_BATCH_SIZE = 2000
+
+# Страна -> (валюта, слово номинала, монетные дворы)
+COUNTRIES = {
+    'Россия': ('RUB', 'рублей', ('ММД', 'СПМД')),
+    'СССР': ('SUR', 'рублей', ('ММД', 'ЛМД')),
+    'США': ('USD', 'долларов', ('Филадельфия', 'Денвер', 'Сан-Франциско')),
+    'Германия': ('EUR', 'евро', ('Берлин', 'Мюнхен', 'Гамбург')),
+    'Франция': ('EUR', 'евро', ('Монетный двор Парижа',)),
+    'Великобритания': ('GBP', 'фунтов', ('Королевский монетный двор',)),
+    'Канада': ('CAD', 'долларов', ('Королевский канадский МД',)),
+    'Китай': ('CNY', 'юаней', ('Шэньян', 'Шанхай')),
+    'Япония': ('JPY', 'иен', ('Осака',)),
+    'Казахстан': ('KZT', 'тенге', ('Казахстанский МД',)),
+}
+MATERIALS = ('Серебро', 'Золото', 'Медь-никель', 'Латунь', 'Бронза', 'Сталь', 'Биметалл', 'Алюминий')
+COIN_CATEGORIES = ('Юбилейные монеты', 'Инвестиционные монеты', 'Оборотные монеты')
+BANKNOTE_CATEGORIES = ('Памятные банкноты', 'Оборотные банкноты')
+
+COIN_DENOMINATIONS = (1, 2, 3, 5, 10, 25, 50, 100)
+BANKNOTE_DENOMINATIONS = (5, 10, 50, 100, 200, 500, 1000, 2000, 5000)
+
+SERIES = (
+    'Красная книга', 'Города воинской славы', 'Олимпийские игры', 'Освоение космоса',
+    'Выдающиеся личности', 'Памятники архитектуры', 'Животный мир', 'Знаки зодиака',
+    'Древние города', 'Великие полководцы', 'Годовщина Победы', 'Национальные парки',
+)
+SUBJECTS = (
+    'Амурский тигр', 'Байкал', 'Кремль', 'Гагарин', 'Великий Новгород', 'Сочи', 'Белый медведь',
+    'Эльбрус', 'Петергоф', 'Суворов', 'Кутузов', 'Соболь', 'Лось', 'Камчатка', 'Ладога',
+    'Орел', 'Севастополь', 'Казань', 'Ярославль', 'Владимир', 'Псков', 'Тула', 'Курск',
+)
+PHRASES = (
+    'Выпущена ограниченным тиражом.',
+    'Качество чеканки - пруф.',
+    'Аверс украшен гербом страны.',
+    'На реверсе изображен {subject}.',
+    'Входит в серию "{series}".',
+    'Гурт рифленый.',
+    'Сохранность - UNC.',
+    'Пользуется спросом у коллекционеров.',
+    'Тираж частично отчеканен с цветным покрытием.',
+    'Поставляется в капсуле и с сертификатом подлинности.',
+)
+
+# Доли опубликованных предметов и предметов на главной
+PUBLISHED_RATE = 0.95
+ON_MAIN_RATE = 0.002
+
+# Предметы создаются за последние годы, чтобы сортировка по дате была осмысленной
+CREATED_SPAN_DAYS = 5 * 365
+
+
+class SyntheticCatalog:
+    """Генератор данных с фиксированным seed"""
+
+    def __init__(self, seed=DEFAULT_SEED, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        self.random = random.Random(seed)
+        self.seed = seed
+        self.batch_size = max(batch_size, 1)
+        self.progress = progress
+        self.now = timezone.now()
+        self.references = None
+
+    def report(self, stage, done, total):
+        if self.progress:
+            self.progress(stage, done, total)
+
+    def ensure_references(self):
+        """Справочники из списков выше (существующие переиспользуются)"""
+        countries = {title: Country.objects.get_or_create(title=title)[0] for title in COUNTRIES}
+        mints = {
+            title: [Mint.objects.get_or_create(title=mint, country=countries[title])[0] for mint in mint_titles]
+            for title, (_, _, mint_titles) in COUNTRIES.items()
+        }
+        self.references = {
+            'countries': list(countries.values()),
+            'mints': mints,
+            'materials': [Material.objects.get_or_create(title=title)[0] for title in MATERIALS],
+            'coin_categories': [Category.objects.get_or_create(title=title)[0] for title in COIN_CATEGORIES],
+            'banknote_categories': [Category.objects.get_or_create(title=title)[0] for title in BANKNOTE_CATEGORIES],
+        }
+        return self.references
+
+    def create_users(self, count):
+        """Пользователи synthetic-<seed>-<n> с общим паролем (уже созданные пропускаются)"""
+        password = make_password(f'synthetic-{self.seed}')
+        prefix = f'synthetic-{self.seed}-'
+        for start in range(0, count, self.batch_size):
+            users = [
+                User(username=f'{prefix}{number}', password=password, email=f'{prefix}{number}@example.com')
+                for number in range(start, min(start + self.batch_size, count))
+            ]
+            User.objects.bulk_create(users, ignore_conflicts=True)
+            self.report('users', start + len(users), count)
+        return list(User.objects.filter(username__startswith=prefix).order_by('pk').values_list('pk', flat=True))
+
+    def created_at(self):
+        # Квадрат случайного числа смещает даты к настоящему времени
+        return self.now - timedelta(days=CREATED_SPAN_DAYS * self.random.random() ** 2)
+
+    def description(self, series, subject):
+        phrases = self.random.sample(PHRASES, self.random.randint(2, 4))
+        return ' '.join(phrases).format(series=series, subject=subject)
+
+    def common_fields(self, categories, denominations, author_ids):
+        country = self.random.choice(self.references['countries'])
+        currency, word, _ = COUNTRIES[country.title]
+        series = self.random.choice(SERIES)
+        subject = self.random.choice(SUBJECTS)
+        denomination = self.random.choice(denominations)
+        year = 2025 - int(125 * self.random.random() ** 2)
+        return country, {
+            'name': f"{denomination} {word} '{series} - {subject}' {year}",
+            'description': self.description(series, subject),
+            'denomination': str(denomination),
+            'currency': currency,
+            'year': year,
+            'country': country,
+            'category': self.random.choice(categories),
+            'author_id': self.random.choice(author_ids) if author_ids else None,
+            'is_published': self.random.random() < PUBLISHED_RATE,
+            'is_on_main': self.random.random() < ON_MAIN_RATE,
+        }
+
+    def build_coin(self, author_ids):
+        country, fields = self.common_fields(self.references['coin_categories'], COIN_DENOMINATIONS, author_ids)
+        return Coin(
+            material=self.random.choice(self.references['materials']),
+            mint=self.random.choice(self.references['mints'][country.title]),
+            weight=Decimal(self.random.randint(1500, 35000)) / 1000,
+            diameter=Decimal(self.random.randint(1500, 4000)) / 100,
+            **fields
+        )
+
+    def build_banknote(self, author_ids):
+        _, fields = self.common_fields(self.references['banknote_categories'], BANKNOTE_DENOMINATIONS, author_ids)
+        letters = 'АБВГЕИКЛМНПСТ'
+        return Banknote(
+            serial_number=(
+                f'{self.random.choice(letters)}{self.random.choice(letters)} '
+                f'{self.random.randint(0, 9999999):07d}'
+            ),
+            width=self.random.randint(120, 170),
+            height=self.random.randint(60, 80),
+            **fields
+        )
+
+    def create_items(self, model, count, author_ids):
+        """Предметы пачками; возвращает их id"""
+        build = self.build_coin if model is Coin else self.build_banknote
+        ids = []
+        for start in range(0, count, self.batch_size):
+            instances = [build(author_ids) for _ in range(min(self.batch_size, count - start))]
+            created_at = [self.created_at() for _ in instances]
+            insert_items(model, instances, created_at, batch_size=self.batch_size)
+            ids.extend(instance.pk for instance in instances)
+            self.report(model._meta.model_name, start + len(instances), count)
+        return ids
+
+    def create_collection_items(self, count, user_ids, coin_ids, banknote_ids):
+        """Коллекции: предметы распределяются по пользователям без повторов"""
+        if not user_ids or not (coin_ids or banknote_ids):
+            return 0
+        per_user = -(-count // len(user_ids))
+        created = 0
+        batch = []
+        for user_id in user_ids:
+            size = min(per_user, count - created - len(batch))
+            if size <= 0:
+                break
+            coins = min(len(coin_ids), int(size * 0.7) if banknote_ids else size)
+            banknotes = min(len(banknote_ids), size - coins)
+            batch.extend(
+                UserCollectionItem(user_id=user_id, coin_id=pk)
+                for pk in self.random.sample(coin_ids, coins)
+            )
+            batch.extend(
+                UserCollectionItem(user_id=user_id, banknote_id=pk)
+                for pk in self.random.sample(banknote_ids, banknotes)
+            )
+            if len(batch) >= self.batch_size:
+                UserCollectionItem.objects.bulk_create(batch, ignore_conflicts=True)
+                created += len(batch)
+                batch = []
+                self.report('collection_items', created, count)
+        if batch:
+            UserCollectionItem.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            self.report('collection_items', created, count)
+        return created
+
+    def generate(self, coins=0, banknotes=0, users=0, collection_items=0):
+        """Создает данные и возвращает количество созданных записей"""
+        self.ensure_references()
+        user_ids = self.create_users(users) if users else []
+        coin_ids = self.create_items(Coin, coins, user_ids)
+        banknote_ids = self.create_items(Banknote, banknotes, user_ids)
+        items = self.create_collection_items(collection_items, user_ids, coin_ids, banknote_ids)
+        return {
+            'users': len(user_ids),
+            'coins': len(coin_ids),
+            'banknotes': len(banknote_ids),
+            'collection_items': items,
+        }
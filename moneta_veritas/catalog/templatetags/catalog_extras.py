@@ -0,0 +1,32 @@
+from django import template
+
+from catalog import images
+
+register = template.Library()
+
+
+@register.filter
+def facet_count(counts, value):
+    """Количество предметов для значения фасета (0, если их нет)"""
+    if not counts:
+        return 0
+    return counts.get(value, 0)
+
+
+@register.inclusion_tag('includes/responsive_image.html')
+def responsive_image(image, alt='', css_class='', style='', size='card'):
+    """Картинка с производными WebP/JPEG через srcset (или оригинал)"""
+    # Флаг ставится при создании превью (catalog/signals.py)
+    ready = getattr(getattr(image, 'instance', None), 'image_derivatives', False)
+    srcsets = images.derivative_srcsets(image.name) if ready else None
+    return {
+        'image': image,
+        'srcsets': srcsets,
+        'src': image.storage.url(images.derivative_name(image.name, size, 'jpeg')) if srcsets else image.url,
+        'sizes': images.SIZES_ATTRIBUTE[size],
+        'alt': alt,
+        'css_class': css_class,
+        'style': style,
+        # Картинки карточек ниже первого экрана грузятся лениво
+        'lazy': size == 'card',
+    }
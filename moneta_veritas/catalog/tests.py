@@ -1,9 +1,44 @@
 from django.test import TestCase
 
-from django.test import TestCase
+import csv
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse, QueryDict
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
 from django.core.exceptions import ValidationError
-from catalog.models import Category, Country, Material, Mint, Coin, Banknote
-from django.db import IntegrityError
+from django.core.management import call_command
+from django.urls import resolve, reverse
+from django.utils.http import http_date
+from catalog import async_views, benchmarks, images, importer, query_budgets, reference, search
+from catalog.storage import serve_media
+from catalog.export import CatalogExport
+from catalog.facets import compute_facets
+from catalog.filters import CoinFilterSet
+from catalog.forms import CoinForm
+from catalog.mixins import published_or_own
+from catalog.pagination import CursorPaginator
+from catalog.synthetic import SyntheticCatalog
+from catalog.models import CatalogEntry, MediaBlob, Category, Country, Material, Mint, Coin, Banknote, News
+from catalog.views import BanknoteListView, CoinListView
+from moneta_veritas import database, metrics, profiling, slow_queries
+from moneta_veritas.instrumentation import RequestTiming
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, connections
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
 
 
 class CategoryModelTest(TestCase):
@@ -42,4 +77,2013 @@ class CategoryModelTest(TestCase):
         max_length = Category._meta.get_field('title').max_length
         
         # Assert
-        self.assertEqual(max_length, 50)
\ No newline at end of file
+        self.assertEqual(max_length, 50)
+
+def served_ids(model, query):
+    """id, которые поиск отдает анониму: опубликованные, по search_rank"""
+    queryset = published_or_own(model.objects.all(), AnonymousUser())
+    return list(search.search_queryset(queryset, query).order_by('search_rank', 'pk').values_list('pk', flat=True))
+
+
+class SearchIndexTest(TestCase):
+    """Тесты полнотекстового поиска по каталогу"""
+
+    def setUp(self):
+        self.country = Country.objects.create(title="Россия")
+        self.coin = Coin.objects.create(
+            name="Георгий Победоносец",
+            description="Инвестиционная монета из серебра",
+            country=self.country,
+            denomination="3 рубля",
+            year=2020
+        )
+        self.other_coin = Coin.objects.create(
+            name="Соболь",
+            description="Памятная монета, на реверсе Георгий",
+            country=self.country,
+            denomination="25 рублей",
+            year=2021
+        )
+
+    def test_search_ranks_title_matches_first(self):
+        """Совпадение в названии выше совпадения в описании"""
+        # Act
+        ids = served_ids(Coin, "георгий")
+
+        # Assert
+        self.assertEqual(ids, [self.coin.pk, self.other_coin.pk])
+
+    def test_index_follows_save_and_delete(self):
+        """Индекс синхронизируется при сохранении и удалении"""
+        # Arrange
+        self.coin.name = "Червонец"
+        self.coin.save()
+
+        # Act & Assert
+        self.assertIn(self.coin.pk, served_ids(Coin, "червон"))
+        self.coin.delete()
+        self.assertEqual(served_ids(Coin, "червон"), [])
+
+    def test_rebuild_restores_index(self):
+        """Команда перестройки восстанавливает индекс"""
+        # Arrange
+        Coin.objects.filter(pk=self.coin.pk).update(name="Сеятель")
+
+        # Act
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        # Assert
+        self.assertEqual(served_ids(Coin, "сеятель"), [self.coin.pk])
+
+    def test_coin_list_orders_by_relevance(self):
+        """Список монет при поиске сортируется по релевантности"""
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'), {'q': 'Георгий'})
+
+        # Assert
+        self.assertEqual(list(response.context['coin_list']), [self.coin, self.other_coin])
+
+    def test_hidden_and_filtered_items_do_not_use_up_results(self):
+        """Скрытые и отфильтрованные предметы не вытесняют видимые из выдачи"""
+        # Arrange: тысяча более релевантных скрытых предметов
+        hidden = Coin.objects.bulk_create([
+            Coin(name="Георгий Георгий", country=self.country, denomination="1", is_published=False)
+            for _ in range(1000)
+        ])
+        search.index_items(hidden)
+        Coin.objects.create(name="Георгий Георгий старый", country=self.country, denomination="1", year=1900)
+
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'), {'q': 'Георгий', 'year_from': 2000})
+
+        # Assert
+        self.assertEqual(list(response.context['coin_list']), [self.coin, self.other_coin])
+
+    def test_yo_and_ye_match_each_other(self):
+        """Запрос с "ё" находит текст с "е" и наоборот"""
+        # Arrange
+        coin = Coin.objects.create(name="Ёлочная игрушка", country=self.country, denomination="1")
+
+        # Act & Assert
+        self.assertEqual(served_ids(Coin, "елочная"), [coin.pk])
+        self.assertEqual(served_ids(Coin, "ЁЛОЧНАЯ"), [coin.pk])
+
+    def test_unpublished_items_are_not_served(self):
+        """Неопубликованный предмет есть в индексе, но анониму не отдается"""
+        # Arrange
+        self.coin.is_published = False
+        self.coin.save()
+
+        # Act
+        ids = served_ids(Coin, "георгий")
+
+        # Assert
+        self.assertEqual(ids, [self.other_coin.pk])
+        ranked = search.search_queryset(Coin.objects.all(), "георгий").order_by('search_rank')
+        self.assertEqual(list(ranked.values_list('pk', flat=True)), [self.coin.pk, self.other_coin.pk])
+
+    def test_relevance_sort_paginates_by_cursor(self):
+        """Выдача по релевантности листается курсором без повторов"""
+        # Arrange
+        for number in range(3):
+            Coin.objects.create(name=f"Георгий {number}", country=self.country, denomination="1")
+        paginator = CursorPaginator(search.search_queryset(Coin.objects.all(), 'георгий'), 2, 'search_rank')
+
+        # Act
+        first = paginator.page(None)
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+
+        # Assert
+        seen = [coin.pk for page in (first, second, third) for coin in page]
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+        self.assertFalse(third.has_next())
+
+    def test_query_without_words_returns_nothing(self):
+        """Запрос без слов не порождает некорректного выражения MATCH"""
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'), {'q': '"*'})
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['coin_list']), 0)
+
+
+class NormalizedSearchTest(TestCase):
+    """Тесты поиска по нормализованному тексту (кириллица, ё)"""
+
+    def setUp(self):
+        self.country = Country.objects.create(title="Россия")
+        self.author = User.objects.create_user(username='editor', password='testpass123')
+
+    def test_search_text_is_filled_on_save(self):
+        """search_text заполняется при сохранении"""
+        # Arrange & Act
+        coin = Coin.objects.create(
+            name="Ёлочная МОНЕТА",
+            country=self.country,
+            denomination="1 рубль"
+        )
+
+        # Assert
+        self.assertEqual(coin.search_text, "елочная монета  1 рубль")
+
+    def test_search_is_case_insensitive_for_cyrillic(self):
+        """Строчный запрос находит название с заглавной буквы"""
+        # Arrange
+        coin = Coin.objects.create(name="Монета Победы", country=self.country, denomination="2 рубля")
+
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'), {'q': 'монета'})
+
+        # Assert
+        self.assertEqual(list(response.context['coin_list']), [coin])
+
+    def test_search_treats_yo_as_ye(self):
+        """Запрос с "е" находит текст с "ё" и наоборот"""
+        # Arrange
+        banknote = Banknote.objects.create(
+            name="Банкнота", description="Зелёная", country=self.country, denomination="3 рубля"
+        )
+
+        # Act
+        by_e = self.client.get(reverse('catalog:banknote_list'), {'q': 'зеленая'})
+        by_yo = self.client.get(reverse('catalog:banknote_list'), {'q': 'ЗЕЛЁНАЯ'})
+
+        # Assert
+        self.assertEqual(list(by_e.context['banknote_list']), [banknote])
+        self.assertEqual(list(by_yo.context['banknote_list']), [banknote])
+
+    def test_news_search_uses_index(self):
+        """Поиск новостей выполняется по индексу"""
+        # Arrange
+        news = News.objects.create(title="Новый Выпуск", content="Серебряный рубль", author=self.author)
+
+        # Act
+        response = self.client.get(reverse('catalog:news_list'), {'q': 'СЕРЕБРЯНЫЙ'})
+
+        # Assert
+        self.assertEqual(list(response.context['news_list']), [news])
+
+
+class CatalogIndexUsageTest(TestCase):
+    """EXPLAIN-проверка: фильтры списков каталога используют индексы"""
+
+    SORTS = ['-created_at', 'created_at', 'name', '-name', 'year', '-year', 'denomination']
+    COMMON_FILTERS = [
+        {},
+        {'country': '1'},
+        {'currency': 'RUB'},
+        {'year_from': '1990'},
+        {'year_to': '2000'},
+        {'year_from': '1990', 'year_to': '2000'},
+    ]
+    COIN_FILTERS = COMMON_FILTERS + [
+        {'material': '1'},
+        {'mint': '1'},
+        {'diameter_from': '20'},
+        {'diameter_from': '20', 'diameter_to': '30'},
+    ]
+    BANKNOTE_FILTERS = COMMON_FILTERS + [
+        {'width_from': '100'},
+        {'width_from': '100', 'width_to': '160'},
+        {'height_to': '80'},
+    ]
+    # Фильтры по равенству, для которых сортировка по умолчанию идет по индексу
+    SORTED_BY_INDEX = [{}, {'country': '1'}, {'currency': 'RUB'}, {'material': '1'}, {'mint': '1'}]
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get_plan(self, view_class, params):
+        request = self.factory.get('/', params)
+        request.user = AnonymousUser()
+        view = view_class()
+        view.setup(request)
+        return view.get_queryset().explain()
+
+    def assert_uses_index(self, view_class, filters):
+        table = view_class.model._meta.db_table
+        for params in filters:
+            for sort in self.SORTS:
+                with self.subTest(view=view_class.__name__, params=params, sort=sort):
+                    plan = self.get_plan(view_class, {**params, 'sort': sort})
+                    scans = [line for line in plan.splitlines() if f'SCAN {table}' in line]
+                    self.assertTrue(
+                        all('USING' in line for line in scans),
+                        f'Полный просмотр таблицы:\n{plan}'
+                    )
+                    if params in self.SORTED_BY_INDEX and sort in ('-created_at', 'created_at'):
+                        self.assertNotIn('TEMP B-TREE', plan)
+                    if not params:
+                        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_coin_list_filters_use_indexes(self):
+        """Каждая комбинация фильтров coin_list использует индекс"""
+        self.assert_uses_index(CoinListView, self.COIN_FILTERS)
+
+    def test_banknote_list_filters_use_indexes(self):
+        """Каждая комбинация фильтров banknote_list использует индекс"""
+        self.assert_uses_index(BanknoteListView, self.BANKNOTE_FILTERS)
+
+
+class CursorPaginationTest(TestCase):
+    """Тесты курсорной пагинации списков каталога"""
+
+    def setUp(self):
+        self.country = Country.objects.create(title="Россия")
+        for number in range(30):
+            Coin.objects.create(
+                name=f"Монета {number % 7}",
+                country=self.country,
+                denomination=f"{number % 5} рублей",
+                # Часть годов пустая, чтобы проверить обработку NULL
+                year=None if number % 4 == 0 else 1990 + number % 6
+            )
+
+    def walk(self, sort):
+        """Проходит все страницы вперед, затем назад"""
+        url = reverse('catalog:coin_list')
+        response = self.client.get(url, {'sort': sort, 'cursor': ''})
+        pages = [list(response.context['coin_list'])]
+        while response.context['next_page_url']:
+            response = self.client.get(url + response.context['next_page_url'])
+            pages.append(list(response.context['coin_list']))
+        backward = [list(response.context['coin_list'])]
+        while response.context['previous_page_url']:
+            response = self.client.get(url + response.context['previous_page_url'])
+            backward.insert(0, list(response.context['coin_list']))
+        return pages, backward
+
+    def test_every_sort_visits_all_items_once(self):
+        """Для каждой сортировки курсоры обходят все предметы по порядку"""
+        for sort in ['-created_at', 'created_at', 'name', '-name', 'year', '-year', 'denomination']:
+            with self.subTest(sort=sort):
+                # Act
+                pages, backward = self.walk(sort)
+
+                # Assert
+                items = [coin for page in pages for coin in page]
+                self.assertEqual(len(pages), 3)
+                self.assertEqual(len(items), 30)
+                self.assertEqual(len(set(coin.pk for coin in items)), 30)
+                self.assertEqual(backward, pages)
+                keys = [getattr(coin, sort.lstrip('-')) for coin in items]
+                present = [key for key in keys if key is not None]
+                expected = sorted(present, reverse=sort.startswith('-'))
+                self.assertEqual(present, expected)
+
+    def test_cursor_mode_skips_count(self):
+        """В курсорном режиме не выполняется COUNT(*)"""
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('catalog:coin_list'), {'cursor': ''})
+
+        # Assert
+        self.assertTrue(response.context['cursor_mode'])
+        self.assertFalse(any('COUNT(*)' in query['sql'] for query in queries.captured_queries))
+
+    def test_tampered_cursor_starts_from_first_page(self):
+        """Поврежденный курсор не ломает страницу"""
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'), {'cursor': 'garbage'})
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['coin_list']), 12)
+
+
+class FacetCountsTest(TestCase):
+    """Тесты фасетных счетчиков фильтров"""
+
+    def setUp(self):
+        cache.clear()
+        self.russia = Country.objects.create(title="Россия")
+        self.usa = Country.objects.create(title="США")
+        self.silver = Material.objects.create(title="Серебро")
+        self.mint = Mint.objects.create(title="ММД", country=self.russia)
+        Coin.objects.create(name="Рубль", country=self.russia, denomination="1", currency="RUB",
+                            year=1995, material=self.silver, mint=self.mint)
+        Coin.objects.create(name="Полтина", country=self.russia, denomination="50", currency="RUB",
+                            year=2003, material=self.silver)
+        Coin.objects.create(name="Доллар", country=self.usa, denomination="1", currency="USD", year=2001)
+        Coin.objects.create(name="Черновик", country=self.usa, denomination="1", is_published=False)
+
+    def test_facets_count_published_items(self):
+        """Счетчики учитывают только видимые предметы"""
+        # Act
+        facets = compute_facets(Coin.objects.filter(is_published=True))
+
+        # Assert
+        self.assertEqual(facets['country'], {self.russia.pk: 2, self.usa.pk: 1})
+        self.assertEqual(facets['material'], {self.silver.pk: 2})
+        self.assertEqual(facets['mint'], {self.mint.pk: 1})
+        self.assertEqual(facets['currency'], {'RUB': 2, 'USD': 1})
+        self.assertEqual(facets['decade'], {1990: 1, 2000: 2})
+
+    def test_facets_are_computed_in_one_query(self):
+        """Все фасеты считаются одним запросом"""
+        # Act & Assert
+        with self.assertNumQueries(1):
+            compute_facets(Coin.objects.filter(is_published=True))
+
+    def test_list_view_exposes_facets_for_current_filters(self):
+        """Список монет отдает фасеты для текущей выборки"""
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'), {'q': 'рубль', 'currency': 'RUB'})
+
+        # Assert
+        self.assertEqual(response.context['facets']['country'], {self.russia.pk: 1})
+        self.assertContains(response, "Серебро (1)")
+
+    def test_facets_are_cached_by_signature(self):
+        """Повторный запрос с теми же фильтрами берет фасеты из кеша"""
+        # Arrange
+        url = reverse('catalog:banknote_list')
+        self.client.get(url, {'country': str(self.usa.pk), 'page': '1'})
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'page': '2', 'country': str(self.usa.pk)})
+
+        # Assert
+        self.assertFalse(any('UNION ALL' in query['sql'] for query in queries.captured_queries))
+
+    def test_facets_recomputed_after_item_change(self):
+        """Изменение предметов сразу делает закешированные фасеты устаревшими"""
+        # Arrange
+        url = reverse('catalog:coin_list')
+        self.client.get(url)
+        Coin.objects.create(name="Цент", country=self.usa, denomination="1", currency="USD", year=2005)
+
+        # Act
+        response = self.client.get(url)
+
+        # Assert
+        self.assertEqual(response.context['facets']['country'], {self.russia.pk: 2, self.usa.pk: 2})
+
+    def test_facets_recomputed_after_reference_delete(self):
+        """Удаление материала (SET_NULL у монет) сразу убирает его из фасетов"""
+        # Arrange
+        url = reverse('catalog:coin_list')
+        self.client.get(url)
+
+        # Act
+        self.silver.delete()
+        response = self.client.get(url)
+
+        # Assert
+        self.assertEqual(response.context['facets']['material'], {})
+
+
+class ReferenceCacheTest(TestCase):
+    """Тесты кеша справочников"""
+
+    def setUp(self):
+        cache.clear()
+        reference.clear()
+        self.russia = Country.objects.create(title="Россия")
+        self.silver = Material.objects.create(title="Серебро")
+        Mint.objects.create(title="ММД", country=self.russia)
+
+    def test_second_render_does_not_query_reference_tables(self):
+        """Повторный рендер списка не читает справочники из базы"""
+        # Arrange
+        url = reverse('catalog:coin_list')
+        self.client.get(url)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        # Assert
+        self.assertContains(response, "Россия")
+        tables = ('"catalog_country"', '"catalog_material"', '"catalog_mint"')
+        self.assertFalse(any(
+            query['sql'].startswith('SELECT') and any(f'FROM {table}' in query['sql'] for table in tables)
+            for query in queries.captured_queries
+        ))
+
+    def test_save_invalidates_cached_table(self):
+        """Изменение справочника сбрасывает кеш"""
+        # Arrange
+        reference.get_table(Country)
+
+        # Act
+        self.russia.title = "Российская Федерация"
+        self.russia.save()
+
+        # Assert
+        self.assertEqual([c.title for c in reference.get_table(Country)], ["Российская Федерация"])
+
+    def test_form_validates_cached_choice(self):
+        """Форма строит варианты из кеша, принимает известное значение и отклоняет неизвестное"""
+        # Arrange
+        reference.get_table(Material)
+        data = {'name': "Рубль", 'denomination': "1", 'currency': "RUB",
+                'country': str(self.russia.pk), 'material': str(self.silver.pk)}
+
+        # Act
+        form = CoinForm(data=data)
+        with self.assertNumQueries(0):
+            widget = str(CoinForm()['material'])
+        invalid = CoinForm(data={**data, 'material': '999'})
+
+        # Assert
+        self.assertIn("Серебро", widget)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['material'], self.silver)
+        self.assertFalse(invalid.is_valid())
+        self.assertIn('material', invalid.errors)
+
+
+class FilterSetTest(TestCase):
+    """Тесты декларативных фильтров списков"""
+
+    def setUp(self):
+        cache.clear()
+        self.russia = Country.objects.create(title="Россия")
+        self.usa = Country.objects.create(title="США")
+        self.china = Country.objects.create(title="Китай")
+        Coin.objects.create(name="Рубль", country=self.russia, denomination="1", year=1995)
+        Coin.objects.create(name="Доллар", country=self.usa, denomination="1", year=2001)
+        Coin.objects.create(name="Юань", country=self.china, denomination="1", year=2010)
+
+    def test_invalid_values_are_ignored(self):
+        """Некорректные значения отбрасываются, а не попадают в filter()"""
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'), {'year_from': 'abc', 'diameter_to': 'x'})
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['coin_list']), 3)
+        self.assertEqual(response.context['filterset'].cleaned, {})
+
+    def test_out_of_range_integers_are_ignored(self):
+        """Числа вне диапазона INTEGER отбрасываются, как и нечисловые значения"""
+        # Act
+        page = self.client.get(reverse('catalog:coin_list'), {'country': '99999999999999999999'})
+        api = self.client.get(reverse('api:coin_list'), {'country': '-99999999999999999999'})
+
+        # Assert
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(len(page.context['coin_list']), 3)
+        self.assertEqual(page.context['filterset'].cleaned, {})
+        self.assertEqual(api.status_code, 200)
+
+    def test_multiple_values_become_in(self):
+        """Повторяющийся параметр фильтрует по нескольким значениям"""
+        # Arrange
+        params = QueryDict(f'country={self.russia.pk}&country={self.usa.pk}&year_to=2005')
+
+        # Act
+        filterset = CoinFilterSet(params)
+        names = set(filterset.apply(Coin.objects.all()).values_list('name', flat=True))
+        sql = str(filterset.apply(Coin.objects.all()).query)
+
+        # Assert
+        self.assertEqual(names, {"Рубль", "Доллар"})
+        self.assertIn(' IN (', sql)
+
+    def test_signature_is_canonical(self):
+        """Сигнатура не зависит от порядка, мусора, страницы и сортировки"""
+        # Arrange
+        first = CoinFilterSet(QueryDict('country=2&country=1&year_from=1990&page=3'))
+        second = CoinFilterSet(QueryDict('year_from=1990&country=1&country=2&country=x&sort=name'))
+        other = CoinFilterSet(QueryDict('country=1&year_from=1990'))
+
+        # Act & Assert
+        self.assertEqual(first.signature(), second.signature())
+        self.assertNotEqual(first.signature(), other.signature())
+
+    def test_unknown_sort_falls_back_to_default(self):
+        """Неизвестная сортировка заменяется сортировкой по умолчанию"""
+        # Act
+        filterset = CoinFilterSet(QueryDict('sort=password'))
+
+        # Assert
+        self.assertEqual(filterset.ordering, '-created_at')
+
+
+class ListPageQueriesTest(TestCase):
+    """Количество запросов на страницу списка не зависит от числа карточек"""
+
+    def setUp(self):
+        cache.clear()
+        reference.clear()
+        russia = Country.objects.create(title="Россия")
+        for number in range(12):
+            author = User.objects.create(username=f'author{number}')
+            Coin.objects.create(name=f"Монета {number}", country=russia, denomination="1",
+                                description="Очень длинное описание монеты " * 5, author=author)
+            Banknote.objects.create(name=f"Банкнота {number}", country=russia, denomination="1",
+                                    description="Описание", author=author)
+
+    def test_coin_list_queries(self):
+        """Список монет: COUNT, страница с авторами, фасеты, справочники"""
+        # Act & Assert
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('catalog:coin_list'))
+        self.assertContains(response, "author11")
+
+    def test_banknote_list_queries(self):
+        """Список банкнот: COUNT, страница с авторами, фасеты, страны"""
+        # Act & Assert
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('catalog:banknote_list'))
+        self.assertContains(response, "author11")
+
+    def test_list_loads_excerpt_instead_of_description(self):
+        """Страница читает краткое описание, а не полный текст"""
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('catalog:coin_list'))
+
+        # Assert
+        page_sql = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT "catalog_coin"."id"'))
+        self.assertNotIn('"catalog_coin"."description",', page_sql)
+        self.assertIn('"auth_user"."username"', page_sql)
+        self.assertContains(response, "Очень длинное описание монеты Очень длинное описание монеты…")
+
+
+class CatalogEntryTest(TestCase):
+    """Тесты глобального реестра предметов каталога"""
+
+    def setUp(self):
+        self.country = Country.objects.create(title="Россия")
+        self.coin = Coin.objects.create(name="Рубль", country=self.country, denomination="1")
+        self.banknote = Banknote.objects.create(name="Сто рублей", country=self.country, denomination="100")
+
+    def test_items_get_distinct_global_ids(self):
+        """Монета и банкнота с одинаковым pk получают разные глобальные id"""
+        # Assert
+        self.assertEqual(self.coin.pk, self.banknote.pk)
+        self.assertNotEqual(self.coin.catalog_entry_id, self.banknote.catalog_entry_id)
+        self.assertEqual(self.banknote.catalog_entry.item_type, 'banknote')
+
+    def test_banknote_detail_is_one_query(self):
+        """Страница банкноты открывается одним запросом и не подменяется монетой"""
+        # Arrange
+        url = self.banknote.get_absolute_url()
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        # Assert
+        self.assertEqual(response.context['banknote'], self.banknote)
+        self.assertNotIn('coin', response.context)
+        catalog_queries = [q for q in queries.captured_queries if 'catalog_' in q['sql']]
+        self.assertEqual(len(catalog_queries), 1)
+
+    def test_unpublished_item_is_hidden(self):
+        """Неопубликованный чужой предмет недоступен"""
+        # Arrange
+        self.coin.is_published = False
+        self.coin.save()
+
+        # Act
+        response = self.client.get(self.coin.get_absolute_url())
+
+        # Assert
+        self.assertEqual(response.status_code, 404)
+
+    def test_delete_removes_entry(self):
+        """Удаление предмета удаляет его запись в реестре"""
+        # Arrange
+        entry_id = self.coin.catalog_entry_id
+
+        # Act
+        self.coin.delete()
+
+        # Assert
+        self.assertFalse(CatalogEntry.objects.filter(pk=entry_id).exists())
+
+
+class AnonymousPageCacheTest(TestCase):
+    """Тесты кеша страниц для анонимных посетителей"""
+
+    def setUp(self):
+        cache.clear()
+        reference.clear()
+        self.country = Country.objects.create(title="Россия")
+        self.coin = Coin.objects.create(name="Рубль", country=self.country, denomination="1")
+
+    def test_repeated_anonymous_request_is_served_from_cache(self):
+        """Повторный анонимный запрос с теми же параметрами не обращается к базе"""
+        # Arrange
+        url = reverse('catalog:coin_list')
+        self.client.get(url, {'currency': 'RUB', 'country': str(self.country.pk)})
+
+        # Act
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{url}?country={self.country.pk}&currency=RUB')
+
+        # Assert
+        self.assertContains(response, "Рубль")
+
+    def test_item_change_invalidates_page(self):
+        """Изменение монеты сбрасывает закешированный список"""
+        # Arrange
+        url = reverse('catalog:coin_list')
+        self.client.get(url)
+
+        # Act
+        self.coin.name = "Полтина"
+        self.coin.save()
+        response = self.client.get(url)
+
+        # Assert
+        self.assertContains(response, "Полтина")
+
+    def test_unrelated_change_keeps_page(self):
+        """Изменение новостей не сбрасывает список монет"""
+        # Arrange
+        url = reverse('catalog:coin_list')
+        self.client.get(url)
+
+        author = User.objects.create(username='editor')
+
+        # Act
+        News.objects.create(title="Новость", content="Текст", author=author)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_authenticated_user_gets_fresh_page(self):
+        """Авторизованный пользователь не получает страницу из кеша"""
+        # Arrange
+        url = reverse('catalog:coin_list')
+        user = User.objects.create(username='collector')
+        Coin.objects.create(name="Черновик", country=self.country, denomination="1",
+                            author=user, is_published=False)
+        self.client.get(url)
+
+        # Act
+        self.client.force_login(user)
+        response = self.client.get(url)
+
+        # Assert
+        self.assertContains(response, "Черновик")
+
+    def test_empty_cursor_does_not_poison_page(self):
+        """Страница с пустым ?cursor= (курсорный режим) не подменяет обычную в кеше"""
+        # Arrange
+        url = reverse('catalog:banknote_list')
+        for number in range(BanknoteListView.paginate_by + 1):
+            Banknote.objects.create(name=f"Банкнота {number}", country=self.country, denomination="100")
+        self.client.get(url, {'cursor': ''})
+
+        # Act
+        response = self.client.get(url)
+
+        # Assert
+        self.assertContains(response, '?page=2')
+
+    def test_username_change_invalidates_page(self):
+        """Смена имени автора сбрасывает список, а вход пользователя - нет"""
+        # Arrange
+        url = reverse('catalog:coin_list')
+        author = User.objects.create(username='collector')
+        Coin.objects.create(name="Полтина", country=self.country, denomination="50", author=author)
+        self.client.get(url)
+        author.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        # Act
+        author.username = 'numismatist'
+        author.save()
+        response = self.client.get(url)
+
+        # Assert
+        self.assertContains(response, 'numismatist')
+
+
+class MediaRootMixin:
+    """Временный MEDIA_ROOT и генерация тестовых фото"""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.country = Country.objects.create(title="Россия")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def upload(self, name='coin.png', size=(1600, 900)):
+        buffer = BytesIO()
+        Image.new('RGBA', size, (200, 150, 50, 255)).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageDerivativesTest(MediaRootMixin, TestCase):
+    """Тесты производных изображений"""
+
+    def test_upload_creates_derivatives(self):
+        """Загрузка фото создает превью всех размеров и форматов"""
+        # Act
+        coin = Coin.objects.create(name="Рубль", country=self.country, denomination="1", image=self.upload())
+
+        # Assert
+        for size, side in images.DERIVATIVE_SIZES.items():
+            for fmt in images.DERIVATIVE_FORMATS:
+                with Image.open(f'{self.media_root}/{images.derivative_name(coin.image.name, size, fmt)}') as image:
+                    self.assertEqual(max(image.size), side)
+
+    def test_list_uses_srcset(self):
+        """Карточки списка ссылаются на превью через srcset"""
+        # Arrange
+        Coin.objects.create(name="Рубль", country=self.country, denomination="1", image=self.upload())
+
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'))
+
+        # Assert
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '_card.webp 400w')
+
+    def test_backfill_command(self):
+        """Команда создает превью для файлов, загруженных раньше"""
+        # Arrange
+        coin = Coin.objects.create(name="Рубль", country=self.country, denomination="1", image=self.upload())
+        shutil.rmtree(f'{self.media_root}/{images.DERIVATIVES_DIR}')
+        out = StringIO()
+
+        # Act
+        call_command('generate_image_derivatives', workers=1, stdout=out)
+
+        # Assert
+        self.assertTrue(images.has_derivatives(coin.image.name))
+        self.assertIn('создано превью: 4', out.getvalue())
+        coin.refresh_from_db()
+        self.assertTrue(coin.image_derivatives)
+
+    def test_decompression_bomb_keeps_original(self):
+        """Слишком большое фото сохраняется без превью, а не роняет запрос"""
+        # Arrange
+        bomb = Image.DecompressionBombError('слишком много пикселей')
+
+        # Act
+        with mock.patch.object(images, 'generate_derivatives', side_effect=bomb):
+            coin = Coin.objects.create(name="Рубль", country=self.country, denomination="1", image=self.upload())
+
+        # Assert
+        coin.refresh_from_db()
+        self.assertFalse(coin.image_derivatives)
+        response = self.client.get(reverse('catalog:coin_list'))
+        self.assertNotContains(response, 'type="image/webp"')
+
+    def test_list_does_not_stat_storage(self):
+        """Список берет наличие превью из базы, а не из файловой системы"""
+        # Arrange
+        for number in range(3):
+            Coin.objects.create(name=f"Рубль {number}", country=self.country, denomination="1", image=self.upload())
+
+        # Act
+        with mock.patch.object(FileSystemStorage, 'exists', side_effect=AssertionError('storage.exists()')):
+            response = self.client.get(reverse('catalog:coin_list'))
+
+        # Assert
+        self.assertContains(response, '_card.webp 400w', count=3)
+
+
+class ContentAddressedStorageTest(MediaRootMixin, TestCase):
+    """Тесты контентно-адресуемого хранилища медиа"""
+
+    def test_identical_uploads_share_one_file(self):
+        """Одинаковые фото разных авторов хранятся одним файлом"""
+        # Act
+        first = Coin.objects.create(name="Рубль", country=self.country, denomination="1", image=self.upload('a.png'))
+        second = Coin.objects.create(name="Рубль", country=self.country, denomination="1", image=self.upload('b.png'))
+
+        # Assert
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^collectible_images/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 2)
+
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется только вместе с последней ссылкой"""
+        # Arrange
+        first = Coin.objects.create(name="Рубль", country=self.country, denomination="1", image=self.upload())
+        second = Banknote.objects.create(name="Сто", country=self.country, denomination="100", image=self.upload())
+        name = first.image.name
+
+        # Act & Assert
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(first.image.storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(first.image.storage.exists(name))
+        self.assertFalse(images.has_derivatives(name))
+
+    def test_hashed_media_is_immutable(self):
+        """Файлы с хешем в имени отдаются с бессрочным кешированием"""
+        # Arrange
+        coin = Coin.objects.create(name="Рубль", country=self.country, denomination="1", image=self.upload())
+        request = RequestFactory().get('/media/')
+
+        # Act
+        response = serve_media(request, coin.image.name, document_root=self.media_root)
+
+        # Assert
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+
+class CatalogImportTest(TestCase):
+    """Тесты массового импорта каталога"""
+
+    FIXTURE = """[
+        {"model": "catalog.country", "pk": 7, "fields": {"title": "Россия"}},
+        {"model": "catalog.mint", "pk": 3, "fields": {"title": "Московский монетный двор", "country": 7}},
+        {"model": "auth.user", "pk": 1, "fields": {"username": "admin"}},
+        {"model": "catalog.coin", "pk": 1, "fields": {
+            "name": "Рубль 'Гагарин'", "country": 7, "mint": 3, "year": 2011, "denomination": "1",
+            "weight": "7.500", "description": "Памятная монета", "is_on_main": true,
+            "created_at": "2020-01-02T03:04:05Z"
+        }},
+        {"model": "catalog.banknote", "pk": 1, "fields": {
+            "name": "Сто рублей", "country": 7, "year": 2014, "denomination": "100"
+        }}
+    ]"""
+
+    def setUp(self):
+        self.country = Country.objects.create(title="Россия")
+
+    def run_import(self, text, fmt, **kwargs):
+        return importer.CatalogImporter(**kwargs).run(importer.READERS[fmt](StringIO(text)))
+
+    def test_fixture_import_resolves_references_by_title(self):
+        """Ссылки фикстуры сопоставляются со справочниками по названию"""
+        # Act
+        stats = self.run_import(self.FIXTURE, 'json')
+
+        # Assert
+        coin = Coin.objects.get()
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual(coin.country, self.country)
+        self.assertEqual(coin.mint.title, "Московский монетный двор")
+        self.assertEqual(Country.objects.count(), 1)
+        self.assertEqual(coin.created_at.year, 2020)
+        self.assertEqual(coin.description_excerpt, "Памятная монета")
+        self.assertEqual(coin.catalog_entry.get_item(), coin)
+        self.assertEqual(Banknote.objects.get().catalog_entry.item_type, 'banknote')
+
+    def test_import_is_idempotent(self):
+        """Повторный импорт не создает дубликатов"""
+        # Arrange
+        self.run_import(self.FIXTURE, 'json')
+
+        # Act
+        stats = self.run_import(self.FIXTURE, 'json', batch_size=1)
+
+        # Assert
+        self.assertEqual(stats['created'], 0)
+        self.assertEqual(stats['skipped'], 2)
+        self.assertEqual(Coin.objects.count(), 1)
+        self.assertEqual(CatalogEntry.objects.count(), 2)
+
+    def test_flat_records_create_missing_references(self):
+        """Плоские записи создают недостающие справочники"""
+        # Arrange
+        text = (
+            '{"type": "coin", "name": "Доллар", "country": "США", "material": "Серебро", "denomination": "1"}\n'
+            '{"type": "coin", "name": "Цент", "country": "сша", "material": "Медь", "denomination": "1"}\n'
+        )
+
+        # Act
+        stats = self.run_import(text, 'jsonl')
+
+        # Assert
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual(Country.objects.filter(title="США").count(), 1)
+        self.assertEqual(set(Material.objects.values_list('title', flat=True)), {"Серебро", "Медь"})
+
+    def test_csv_import_uses_type_option(self):
+        """CSV без колонки type импортируется с типом из параметра"""
+        # Arrange
+        text = "name,country,denomination,width,is_published\nПятьсот,Россия,500,150,false\n"
+
+        # Act
+        self.run_import(text, 'csv', item_type='banknote')
+
+        # Assert
+        banknote = Banknote.objects.get()
+        self.assertEqual(banknote.width, 150)
+        self.assertFalse(banknote.is_published)
+
+    def test_imported_items_are_searchable(self):
+        """Импортированные предметы попадают в поисковый индекс"""
+        # Act
+        self.run_import(self.FIXTURE, 'json')
+
+        # Assert
+        coin = Coin.objects.get()
+        self.assertEqual(served_ids(Coin, "гагарин"), [coin.pk])
+
+    def test_import_resets_featured_block(self):
+        """Импорт предмета для главной сбрасывает ее кеш"""
+        # Arrange
+        from homepage import featured
+        self.assertEqual(featured.get_featured()['coins'], [])
+
+        # Act
+        self.run_import(self.FIXTURE, 'json')
+
+        # Assert
+        self.assertEqual(len(featured.get_featured()['coins']), 1)
+
+    def test_json_stream_reads_items_across_chunks(self):
+        """Потоковое чтение JSON не зависит от размера порции"""
+        # Act
+        items = list(importer.iter_json_array(StringIO(self.FIXTURE), chunk_size=7))
+
+        # Assert
+        self.assertEqual(len(items), 5)
+        self.assertEqual(items[3]['fields']['year'], 2011)
+
+    def test_command_reports_progress(self):
+        """Команда выводит прогресс и итог"""
+        # Arrange
+        path = os.path.join(tempfile.mkdtemp(), 'catalog.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.FIXTURE)
+        out = StringIO()
+
+        # Act
+        call_command('import_catalog', path, stdout=out)
+
+        # Assert
+        self.assertIn('создано: 2', out.getvalue())
+        self.assertEqual(Coin.objects.count(), 1)
+
+
+class CatalogExportTest(TestCase):
+    """Тесты потоковой выгрузки каталога"""
+
+    def setUp(self):
+        self.russia = Country.objects.create(title="Россия")
+        self.usa = Country.objects.create(title="США")
+        self.ruble = Coin.objects.create(name="Рубль", country=self.russia, denomination="1", year=2000)
+        self.dollar = Coin.objects.create(name="Доллар", country=self.usa, denomination="1", year=1990)
+        Coin.objects.create(name="Черновик", country=self.russia, denomination="2", is_published=False)
+
+    def read_jsonl(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_csv_export_streams_published_items(self):
+        """CSV содержит заголовок и только опубликованные предметы"""
+        # Act
+        response = self.client.get(reverse('catalog:catalog_export', args=['coins', 'csv']))
+
+        # Assert
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['name'] for row in rows], ["Рубль", "Доллар"])
+        self.assertEqual(rows[0]['country'], "Россия")
+        self.assertEqual(rows[0]['id'], str(self.ruble.catalog_entry_id))
+
+    def test_export_reuses_list_filters(self):
+        """Выгрузка понимает параметры фильтров списка"""
+        # Act
+        response = self.client.get(
+            reverse('catalog:catalog_export', args=['coins', 'jsonl']), {'country': self.usa.pk}
+        )
+
+        # Assert
+        self.assertEqual([row['name'] for row in self.read_jsonl(response)], ["Доллар"])
+
+    def test_since_cursor_returns_only_changes(self):
+        """Курсор since возвращает только измененные после него предметы"""
+        # Arrange
+        url = reverse('catalog:catalog_export', args=['coins', 'jsonl'])
+        cursor = self.client.get(url)['X-Export-Cursor']
+        self.ruble.name = "Новый рубль"
+        self.ruble.save()
+
+        # Act
+        response = self.client.get(url, {'since': cursor})
+
+        # Assert
+        rows = self.read_jsonl(response)
+        self.assertEqual([row['name'] for row in rows], ["Новый рубль"])
+        self.assertEqual(response['X-Export-Cursor'], rows[-1]['updated_at'])
+
+    def test_since_cursor_reports_removed_items(self):
+        """Снятые с публикации и удаленные после since предметы приходят надгробиями"""
+        # Arrange
+        url = reverse('catalog:catalog_export', args=['coins', 'jsonl'])
+        cursor = self.client.get(url)['X-Export-Cursor']
+        ruble_id, dollar_id = self.ruble.catalog_entry_id, self.dollar.catalog_entry_id
+        self.ruble.is_published = False
+        self.ruble.save()
+        self.dollar.delete()
+
+        # Act
+        response = self.client.get(url, {'since': cursor})
+
+        # Assert
+        rows = self.read_jsonl(response)
+        self.assertEqual([(row['id'], row['deleted']) for row in rows], [(ruble_id, True), (dollar_id, True)])
+        self.assertEqual(response['X-Export-Cursor'], rows[-1]['updated_at'])
+        self.assertEqual(self.read_jsonl(self.client.get(url, {'since': response['X-Export-Cursor']})), [])
+
+    def test_csv_tombstone_has_only_id(self):
+        """В CSV у надгробия заполнены только id, updated_at и deleted"""
+        # Arrange
+        url = reverse('catalog:catalog_export', args=['coins', 'csv'])
+        cursor = self.client.get(url)['X-Export-Cursor']
+        entry_id = self.dollar.catalog_entry_id
+        self.dollar.delete()
+
+        # Act
+        response = self.client.get(url, {'since': cursor})
+
+        # Assert
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['id'], rows[0]['deleted'], rows[0]['name']), (str(entry_id), 'True', ''))
+
+    def test_invalid_since_is_rejected(self):
+        """Некорректный since - ошибка 400"""
+        # Act
+        response = self.client.get(reverse('catalog:catalog_export', args=['coins', 'csv']), {'since': 'вчера'})
+
+        # Assert
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_format_is_not_found(self):
+        """Неизвестный тип или формат - 404"""
+        # Act
+        response = self.client.get(reverse('catalog:catalog_export', args=['coins', 'xml']))
+
+        # Assert
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_query_count_is_constant(self):
+        """Число запросов не зависит от количества строк"""
+        # Arrange
+        catalog_export = CatalogExport(Coin, QueryDict(), chunk_size=1)
+        list(catalog_export.rows())
+        for number in range(5):
+            Coin.objects.create(name=f"Монета {number}", country=self.russia, denomination="5")
+        catalog_export = CatalogExport(Coin, QueryDict(), chunk_size=100)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(catalog_export.rows())
+
+        # Assert
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(len(queries), 1)
+
+    def test_command_writes_file(self):
+        """Команда пишет выгрузку в файл"""
+        # Arrange
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'coins.jsonl')
+
+        # Act
+        call_command('export_catalog', 'coins', '--format', 'jsonl', '--output', path,
+                     '--filter', 'year_from=1995', stderr=StringIO())
+
+        # Assert
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual([json.loads(line)['name'] for line in file], ["Рубль"])
+
+
+class CatalogApiTest(TestCase):
+    """Тесты JSON API каталога"""
+
+    def setUp(self):
+        self.country = Country.objects.create(title="Россия")
+        self.coins = [
+            Coin.objects.create(name=f"Монета {number}", country=self.country, denomination="1", year=2000 + number)
+            for number in range(3)
+        ]
+        Coin.objects.create(name="Черновик", country=self.country, denomination="1", is_published=False)
+        self.url = reverse('api:coin_list')
+
+    def test_list_returns_selected_fields(self):
+        """fields= оставляет в ответе только запрошенные поля"""
+        # Act
+        response = self.client.get(self.url, {'fields': 'name,country'})
+
+        # Assert
+        results = response.json()['results']
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], {'name': "Монета 2", 'country': "Россия"})
+
+    def test_unknown_field_is_bad_request(self):
+        """Неизвестное поле - ошибка 400"""
+        # Act
+        response = self.client.get(self.url, {'fields': 'name,secret'})
+
+        # Assert
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_uses_filters_and_cursor(self):
+        """Фильтры списка и курсор работают как в HTML-списке"""
+        # Act
+        first = self.client.get(self.url, {'year_from': 2001, 'sort': 'year', 'limit': 1, 'fields': 'year'}).json()
+        second = self.client.get(first['next']).json()
+
+        # Assert
+        self.assertEqual(first['results'], [{'year': 2001}])
+        self.assertEqual(second['results'], [{'year': 2002}])
+        self.assertIsNone(second['next'])
+
+    def test_not_modified_skips_serialization(self):
+        """Совпавший ETag дает 304 без запросов к базе"""
+        # Arrange
+        etag = self.client.get(self.url)['ETag']
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(len(queries), 0)
+
+    def test_list_does_not_scan_selection(self):
+        """Страница списка читает только свои строки, без подсчета всей выборки"""
+        # Arrange
+        first = self.client.get(self.url, {'limit': 1}).json()
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first['next'])
+
+        # Assert
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'])
+        self.assertIn('LIMIT', queries[0]['sql'])
+
+    def test_etag_changes_after_delete(self):
+        """Удаление предмета меняет ETag списка"""
+        # Arrange
+        response = self.client.get(self.url)
+        self.coins[-1].delete()
+
+        # Act
+        updated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        # Assert
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(len(updated.json()['results']), 2)
+
+    def test_etag_changes_after_update(self):
+        """Изменение предмета меняет ETag"""
+        # Arrange
+        response = self.client.get(self.url)
+        coin = self.coins[0]
+        coin.name = "Новое название"
+        coin.save()
+
+        # Act
+        updated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        # Assert
+        self.assertEqual(updated.status_code, 200)
+        self.assertNotEqual(updated['ETag'], response['ETag'])
+
+    def test_list_has_no_last_modified(self):
+        """Список без Last-Modified: после удаления If-Modified-Since не дает 304"""
+        # Arrange
+        response = self.client.get(self.url)
+        # Самое позднее updated_at списка - прежнее значение Last-Modified
+        since = http_date(max(coin.updated_at for coin in self.coins).timestamp())
+        self.coins[0].delete()
+
+        # Act
+        updated = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since)
+
+        # Assert
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(len(updated.json()['results']), 2)
+
+    def test_detail_by_catalog_id(self):
+        """Деталь доступна по id каталога и поддерживает 304"""
+        # Arrange
+        coin = self.coins[0]
+        url = reverse('api:coin_detail', args=[coin.catalog_entry_id])
+
+        # Act
+        response = self.client.get(url, {'fields': 'id,name'})
+        cached = self.client.get(url, {'fields': 'id,name'}, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        # Assert
+        self.assertEqual(response.json(), {'id': coin.catalog_entry_id, 'name': coin.name})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_unpublished_detail_is_not_found(self):
+        """Неопубликованный предмет в API не виден"""
+        # Arrange
+        draft = Coin.objects.get(name="Черновик")
+
+        # Act
+        response = self.client.get(reverse('api:coin_detail', args=[draft.catalog_entry_id]))
+
+        # Assert
+        self.assertEqual(response.status_code, 404)
+
+    def test_references_change_etag(self):
+        """Новая запись справочника меняет ETag справочников"""
+        # Arrange
+        url = reverse('api:references')
+        response = self.client.get(url)
+
+        # Act
+        Material.objects.create(title="Серебро")
+        updated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        # Assert
+        self.assertEqual(response.json()['countries'], [{'id': self.country.pk, 'title': "Россия"}])
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(updated.json()['materials'][0]['title'], "Серебро")
+
+
+class AsyncViewsTest(TestCase):
+    """Тесты async-представлений, которые обслуживают запросы через ASGI"""
+
+    def setUp(self):
+        self.author = User.objects.create(username="author")
+        self.country = Country.objects.create(title="Россия")
+        self.coin = Coin.objects.create(
+            name="Рубль", country=self.country, denomination="1", author=self.author
+        )
+        self.draft = Coin.objects.create(
+            name="Черновик", country=self.country, denomination="2", author=self.author, is_published=False
+        )
+        self.news = News.objects.create(title="Новость", content="Текст", author=self.author)
+
+    async def test_asgi_requests_use_async_views(self):
+        """Через ASGI список монет обслуживает async-представление"""
+        # Act
+        response = await self.async_client.get(reverse('catalog:coin_list'))
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.resolver_match.func.view_class, async_views.CoinListView)
+        self.assertContains(response, "Рубль")
+        self.assertNotContains(response, "Черновик")
+
+    async def test_async_list_matches_sync_context(self):
+        """Async-список отдает те же предметы, что и синхронный"""
+        # Act
+        async_response = await self.async_client.get(reverse('catalog:coin_list'), {'cursor': ''})
+
+        # Assert
+        self.assertEqual([coin.name for coin in async_response.context['coin_list']], ["Рубль"])
+        self.assertTrue(async_response.context['cursor_mode'])
+        self.assertIn('facets', async_response.context)
+
+    async def test_async_search_builds_queryset_inline(self):
+        """Поиск в async-списках работает без выноса в поток и видит свои черновики"""
+        # Arrange
+        await self.async_client.aforce_login(self.author)
+
+        # Act
+        coins = await self.async_client.get(reverse('catalog:coin_list'), {'q': 'черновик'})
+        news = await self.async_client.get(reverse('catalog:news_list'), {'q': 'текст'})
+
+        # Assert
+        self.assertEqual([coin.name for coin in coins.context['coin_list']], ["Черновик"])
+        self.assertEqual(list(news.context['news_list']), [self.news])
+
+    async def test_async_detail_hides_unpublished(self):
+        """Async-деталь скрывает чужие черновики"""
+        # Act
+        published = await self.async_client.get(reverse('catalog:catalog_detail', args=[self.coin.catalog_entry_id]))
+        draft = await self.async_client.get(reverse('catalog:catalog_detail', args=[self.draft.catalog_entry_id]))
+
+        # Assert
+        self.assertEqual(published.status_code, 200)
+        self.assertEqual(published.context['coin'], self.coin)
+        self.assertEqual(draft.status_code, 404)
+
+    async def test_async_news_and_homepage(self):
+        """Новости и главная работают через async-представления"""
+        # Act
+        news_list = await self.async_client.get(reverse('catalog:news_list'))
+        news_detail = await self.async_client.get(reverse('catalog:news_detail', args=[self.news.pk]))
+        homepage = await self.async_client.get(reverse('homepage:index'))
+
+        # Assert
+        self.assertContains(news_list, "Новость")
+        self.assertEqual(news_detail.context['news'], self.news)
+        self.assertEqual(homepage.status_code, 200)
+
+    async def test_async_cursor_page_matches_sync(self):
+        """apage() возвращает ту же страницу, что и page()"""
+        # Arrange
+        paginator = CursorPaginator(Coin.objects.all(), 1, '-created_at')
+
+        # Act
+        page = await paginator.apage()
+
+        # Assert
+        self.assertEqual(page.object_list, [self.draft])
+        self.assertTrue(page.has_next())
+
+    def test_wsgi_requests_keep_sync_views(self):
+        """Обычный (WSGI) запрос по-прежнему идет в синхронное представление"""
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'))
+
+        # Assert
+        self.assertEqual(response.resolver_match.func.view_class, CoinListView)
+
+
+class SyntheticDataTest(TestCase):
+    """Тесты генератора синтетических данных и набора замеров"""
+
+    def test_generator_creates_requested_counts(self):
+        """Генератор создает заданное количество записей вместе с записями каталога"""
+        # Act
+        created = SyntheticCatalog(seed=1, batch_size=7).generate(
+            coins=20, banknotes=10, users=3, collection_items=9
+        )
+
+        # Assert
+        self.assertEqual(created, {'users': 3, 'coins': 20, 'banknotes': 10, 'collection_items': 9})
+        self.assertEqual(CatalogEntry.objects.count(), 30)
+        self.assertFalse(Coin.objects.filter(catalog_entry__isnull=True).exists())
+        self.assertTrue(served_ids(Coin, Coin.objects.first().name.split()[0]))
+
+    def test_generator_is_deterministic(self):
+        """С одинаковым seed получаются одинаковые предметы"""
+        # Arrange
+        generators = [SyntheticCatalog(seed=5), SyntheticCatalog(seed=5)]
+        for generator in generators:
+            generator.ensure_references()
+
+        # Act
+        coins = [
+            [(coin.name, coin.year, coin.country_id, coin.weight) for coin in map(generator.build_coin, [[]] * 5)]
+            for generator in generators
+        ]
+
+        # Assert
+        self.assertEqual(coins[0], coins[1])
+
+    def test_generator_keeps_created_at(self):
+        """Даты создания распределены по прошлому, а не равны моменту вставки"""
+        # Act
+        SyntheticCatalog(seed=2).generate(coins=10)
+
+        # Assert
+        self.assertGreater(Coin.objects.values('created_at').distinct().count(), 1)
+
+    def test_every_url_has_benchmark_case(self):
+        """Для каждого маршрута каталога, коллекций и главной описан сценарий замера"""
+        # Act
+        missing = benchmarks.missing_cases()
+
+        # Assert
+        self.assertEqual(missing, [])
+        self.assertIn('catalog:coin_list', benchmarks.collect_url_names())
+
+    def test_measure_covers_all_urls(self):
+        """Замер на маленьком каталоге проходит по всем страницам без ошибок"""
+        # Arrange
+        data = benchmarks.BenchmarkData(10, seed=3)
+
+        # Act
+        results = benchmarks.measure(data, repeat=1)
+
+        # Assert
+        self.assertEqual(set(results), set(benchmarks.collect_url_names()))
+        self.assertEqual(benchmarks.compare(results, {}), [])
+
+    def test_compare_detects_regressions(self):
+        """Рост числа запросов - всегда регрессия, рост задержки - сверх допуска"""
+        # Arrange
+        baseline = {
+            'a': {'ms': 10.0, 'queries': 3, 'status': 200},
+            'b': {'ms': 100.0, 'queries': 3, 'status': 200},
+            'c': {'ms': 100.0, 'queries': 3, 'status': 200},
+        }
+        results = {
+            'a': {'ms': 14.0, 'queries': 4, 'status': 200},
+            'b': {'ms': 140.0, 'queries': 3, 'status': 200},
+            'c': {'ms': 160.0, 'queries': 2, 'status': 200},
+            'd': {'ms': 1.0, 'queries': 1, 'status': 500},
+        }
+
+        # Act
+        regressions = benchmarks.compare(results, baseline, tolerance=0.5)
+
+        # Assert
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith('a: запросов 4'))
+        self.assertTrue(regressions[1].startswith('c: 160.0'))
+        self.assertTrue(regressions[2].startswith('d: ответ 500'))
+
+
+class QueryBudgetCheckTest(TestCase):
+    """Тесты проверки бюджетов SQL-запросов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = benchmarks.BenchmarkData(5, seed=4)
+
+    def test_over_budget_lists_queries(self):
+        """Превышение бюджета описывается вместе со всеми запросами страницы"""
+        # Act
+        problem = query_budgets.check(
+            'catalog:coin_list', 'anonymous', self.client, self.data, limit=query_budgets.Budget(1)
+        )
+
+        # Assert
+        self.assertIn('catalog:coin_list (anonymous): запросов', problem)
+        self.assertIn('при бюджете 1', problem)
+        self.assertIn('SELECT COUNT(*)', problem)
+
+    def test_within_budget(self):
+        """Страница в пределах бюджета не дает замечаний"""
+        # Act
+        problem = query_budgets.check('catalog:coin_list', 'anonymous', self.client, self.data)
+
+        # Assert
+        self.assertIsNone(problem)
+
+    def test_sql_time_is_reported_by_default(self):
+        """Превышение времени SQL без --query-budgets только пишется в лог"""
+        # Arrange
+        limit = query_budgets.Budget(100, sql_ms=-1)
+
+        # Act
+        with self.assertLogs('catalog.query_budgets', 'WARNING') as logs:
+            problem = query_budgets.check('catalog:coin_list', 'anonymous', self.client, self.data, limit=limit)
+
+        # Assert
+        self.assertIsNone(problem)
+        self.assertIn('catalog:coin_list (anonymous): SQL', logs.output[0])
+
+    def test_sql_time_enforced_on_request(self):
+        """С enforce_sql_time превышение времени SQL роняет проверку"""
+        # Act
+        problem = query_budgets.check(
+            'catalog:coin_list', 'anonymous', self.client, self.data,
+            limit=query_budgets.Budget(100, sql_ms=-1), enforce_sql_time=True
+        )
+
+        # Assert
+        self.assertIn('при бюджете -1 мс', problem)
+
+    def test_runner_adds_budget_tests(self):
+        """Раннер добавляет проверку бюджетов к полному прогону и по флагу"""
+        # Arrange
+        from moneta_veritas.test_runner import BUDGET_TESTS, QueryBudgetRunner
+        label = 'catalog.tests.CategoryModelTest'
+
+        # Act
+        plain = QueryBudgetRunner(verbosity=0).build_suite([label])
+        forced = QueryBudgetRunner(verbosity=0, query_budgets=True).build_suite([label])
+
+        # Assert
+        plain_ids = {test.id() for test in plain}
+        forced_ids = {test.id() for test in forced}
+        self.assertFalse(any(test_id.startswith(BUDGET_TESTS) for test_id in plain_ids))
+        self.assertIn(f'{BUDGET_TESTS}.test_pages_within_budget', forced_ids)
+
+
+class ServerTimingTest(TestCase):
+    """Тесты замеров запроса в заголовке Server-Timing и логе"""
+
+    def setUp(self):
+        cache.clear()
+        reference.clear()
+        russia = Country.objects.create(title="Россия")
+        self.coin = Coin.objects.create(name="Монета", country=russia, denomination="1")
+
+    @staticmethod
+    def parse(header):
+        metrics = {}
+        for part in header.split(', '):
+            name, *params = part.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def test_header_counts_queries_and_templates(self):
+        """Заголовок содержит число SQL-запросов и время шаблона"""
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('catalog:coin_list'))
+
+        # Assert
+        metrics = self.parse(response['Server-Timing'])
+        self.assertEqual(metrics['db']['desc'], f'"{len(queries)} queries"')
+        self.assertGreater(float(metrics['tpl']['dur']), 0)
+        self.assertGreaterEqual(float(metrics['total']['dur']), float(metrics['tpl']['dur']))
+
+    def test_cache_hits_and_misses(self):
+        """Повторный запрос анонима берется из кеша страниц"""
+        # Arrange
+        self.client.get(reverse('catalog:coin_list'))
+
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'))
+
+        # Assert
+        metrics = self.parse(response['Server-Timing'])
+        self.assertEqual(metrics['db']['desc'], '"0 queries"')
+        self.assertRegex(metrics['cache']['desc'], r'"[1-9]\d* hits 0 misses"')
+
+    def test_structured_log_line(self):
+        """Строка лога - JSON с именем представления и счетчиками"""
+        # Act
+        with self.assertLogs('moneta_veritas.requests', 'INFO') as logs:
+            self.client.get(reverse('catalog:catalog_detail', args=[self.coin.catalog_entry_id]))
+
+        # Assert
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'catalog:catalog_detail')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(logs.records[0].timing, record)
+        self.assertGreater(record['db_queries'], 0)
+
+    async def test_async_request_has_header(self):
+        """Запросы через ASGI тоже получают заголовок"""
+        # Act
+        response = await self.async_client.get(reverse('catalog:news_list'))
+
+        # Assert
+        metrics = self.parse(response['Server-Timing'])
+        self.assertNotEqual(metrics['db']['desc'], '"0 queries"')
+
+
+@override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN='secret-token')
+class MetricsTest(TestCase):
+    """Тесты метрик запросов и эндпоинта Prometheus"""
+
+    def setUp(self):
+        cache.clear()
+        reference.clear()
+        metrics.REGISTRY.reset()
+        russia = Country.objects.create(title="Россия")
+        self.coin = Coin.objects.create(name="Монета", country=russia, denomination="1")
+
+    def test_requests_recorded_by_view_status_and_auth(self):
+        """Запросы попадают в гистограмму с представлением, статусом и состоянием входа"""
+        # Arrange
+        user = User.objects.create_user(username='viewer', password='password')
+        member = self.client_class()
+        member.force_login(user)
+
+        # Act
+        self.client.get(reverse('catalog:coin_list'))
+        self.client.get(reverse('catalog:coin_list'))
+        member.get(reverse('usercollections:my_collection'))
+        body = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret-token').content.decode()
+
+        # Assert
+        self.assertIn(
+            'moneta_http_request_duration_seconds_count'
+            '{view="catalog:coin_list",status="200",auth="anonymous"} 2',
+            body
+        )
+        self.assertIn('view="usercollections:my_collection",status="200",auth="authenticated"', body)
+        self.assertIn('# TYPE moneta_db_queries_per_request histogram', body)
+        self.assertIn('moneta_cache_hits_total{view="catalog:coin_list"}', body)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Корзины гистограммы накопительные, +Inf равна числу наблюдений"""
+        # Arrange
+        registry = metrics.Registry()
+        histogram = registry.histogram('latency', 'Задержка', ('view',), buckets=(0.1, 1.0))
+
+        # Act
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(('a',), value)
+        body = registry.render()
+
+        # Assert
+        self.assertIn('latency_bucket{view="a",le="0.1"} 2', body)
+        self.assertIn('latency_bucket{view="a",le="1.0"} 3', body)
+        self.assertIn('latency_bucket{view="a",le="+Inf"} 4', body)
+        self.assertIn('latency_sum{view="a"} 3.65', body)
+
+    def test_processes_aggregated_through_directory(self):
+        """Снимки нескольких процессов в METRICS_DIR суммируются"""
+        # Arrange
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        worker = metrics.Registry(directory)
+        worker.counter('requests', 'Запросы', ('view',)).inc(('a',), 3)
+        worker.flush()
+        os.replace(worker.path, os.path.join(directory, 'other-worker.json'))
+        current = metrics.Registry(directory)
+        current.counter('requests', 'Запросы', ('view',)).inc(('a',), 2)
+
+        # Act
+        body = current.render()
+
+        # Assert
+        self.assertIn('requests{view="a"} 5', body)
+
+    def test_concurrent_observations_not_lost(self):
+        """Наблюдения из нескольких потоков не теряются"""
+        # Arrange
+        request = RequestFactory().get('/')
+        request.resolver_match = resolve(reverse('catalog:coin_list'))
+        response = HttpResponse()
+        timing = RequestTiming()
+        timing.finished = timing.started
+
+        def work():
+            for _ in range(2000):
+                metrics.observe(request, response, timing)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        self.assertIn(
+            'moneta_http_request_duration_seconds_count'
+            '{view="catalog:coin_list",status="200",auth="anonymous"} 16000',
+            metrics.REGISTRY.render()
+        )
+
+    def test_endpoint_hidden_from_outside(self):
+        """Эндпоинт виден персоналу и по токену, но не по адресу 127.0.0.1 за прокси"""
+        # Arrange
+        staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        outsider = self.client_class(REMOTE_ADDR='192.0.2.1')
+        proxied = self.client_class(REMOTE_ADDR='127.0.0.1')
+        admin = self.client_class(REMOTE_ADDR='192.0.2.1')
+        admin.force_login(staff)
+
+        # Act
+        hidden = outsider.get(reverse('metrics'))
+        wrong_token = outsider.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        local = proxied.get(reverse('metrics'))
+        shown = admin.get(reverse('metrics'))
+        scraped = outsider.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret-token')
+
+        # Assert
+        self.assertEqual(hidden.status_code, 404)
+        self.assertEqual(wrong_token.status_code, 404)
+        self.assertEqual(local.status_code, 404)
+        self.assertEqual(shown.status_code, 200)
+        self.assertEqual(shown['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertEqual(scraped.status_code, 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_endpoint_open_to_allowed_ips(self):
+        """Адреса из METRICS_ALLOWED_IPS получают метрики без входа"""
+        # Act
+        response = self.client_class(REMOTE_ADDR='10.0.0.5').get(reverse('metrics'))
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+
+
+class SlowQueryLogTest(TestCase):
+    """Тесты журнала медленных SQL-запросов"""
+
+    def setUp(self):
+        cache.clear()
+        reference.clear()
+        slow_queries._plans.clear()
+        self.russia = Country.objects.create(title="Россия")
+        Coin.objects.create(name="Монета", country=self.russia, denomination="1", year=2001)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_logs_view_params_and_plan(self):
+        """В журнал попадают представление, параметры и план запроса"""
+        # Act
+        with self.assertLogs('moneta_veritas.slow_queries', 'WARNING') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('catalog:coin_list'), {'country': self.russia.pk, 'year_from': 2000})
+
+        # Assert
+        entries = [record.slow_query for record in logs.records]
+        page = next(entry for entry in entries if entry['sql'].startswith('SELECT "catalog_coin"."id"'))
+        self.assertEqual(page['view'], 'catalog:coin_list')
+        self.assertIn(repr(self.russia.pk), page['params'])
+        self.assertTrue(any('catalog_coin' in line for line in page['plan']))
+        # EXPLAIN не считается запросом страницы
+        self.assertFalse(any(query['sql'].startswith('EXPLAIN') for query in queries.captured_queries))
+        self.assertEqual(len(entries), len(queries.captured_queries))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled_without_threshold(self):
+        """Без порога журнал не пишется"""
+        # Act & Assert
+        with self.assertNoLogs('moneta_veritas.slow_queries', 'WARNING'):
+            self.client.get(reverse('catalog:coin_list'))
+
+    def test_disabled_in_test_runs(self):
+        """Тестовый раннер выключает журнал: тесты не пишут в slow_queries.log"""
+        # Assert
+        self.assertIsNone(slow_queries.get_threshold_ms())
+
+    def test_same_shape_for_different_in_lists(self):
+        """Запросы, отличающиеся длиной списка IN, имеют одну форму"""
+        # Act
+        short = slow_queries.normalize('SELECT * FROM t WHERE id IN (%s, %s)')
+        long = slow_queries.normalize('SELECT *\n FROM t WHERE id IN (%s,%s, %s, %s)')
+
+        # Assert
+        self.assertEqual(short, long)
+        self.assertEqual(slow_queries.fingerprint(short), slow_queries.fingerprint(long))
+
+    def test_command_shows_top_shapes(self):
+        """Команда группирует повторы и сортирует формы по суммарному времени"""
+        # Arrange
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'slow.log')
+        entries = [
+            {'fingerprint': 'a', 'ms': 150, 'view': 'catalog:coin_list', 'sql': 'SELECT a',
+             'params': ['1'], 'plan': ['SCAN catalog_coin']},
+            {'fingerprint': 'a', 'ms': 300, 'view': 'catalog:coin_list', 'sql': 'SELECT a',
+             'params': ['2'], 'plan': None},
+            {'fingerprint': 'b', 'ms': 200, 'view': 'catalog:news_list', 'sql': 'SELECT b',
+             'params': [], 'plan': None},
+        ]
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('не JSON\n')
+            file.writelines(json.dumps(entry) + '\n' for entry in entries)
+        out = StringIO()
+
+        # Act
+        call_command('slow_queries', log=path, top=1, stdout=out)
+
+        # Assert
+        output = out.getvalue()
+        self.assertIn('[a] повторов 2, всего 450.0 мс, худший 300.0 мс', output)
+        self.assertIn('Параметры худшего: 2', output)
+        self.assertIn('| SCAN catalog_coin', output)
+        self.assertNotIn('[b]', output)
+
+
+class ProfilingTest(TestCase):
+    """Тесты профилирования отдельных запросов"""
+
+    def setUp(self):
+        cache.clear()
+        reference.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(PROFILE_DIR=directory, PROFILE_RING_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.directory = directory
+        self.staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        self.user = User.objects.create_user(username='viewer', password='password')
+        Coin.objects.create(name="Монета", country=Country.objects.create(title="Россия"), denomination="1", year=2001)
+
+    def test_staff_flag_saves_profile(self):
+        """Персонал с ?_profile=1 получает профиль: pstats, стеки и описание"""
+        # Arrange
+        self.client.force_login(self.staff)
+
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'), {'_profile': '1'})
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile']
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            [f'{profile_id}.collapsed', f'{profile_id}.json', f'{profile_id}.prof'],
+        )
+        meta = profiling.get_profile(profile_id)
+        self.assertEqual(meta['view'], 'catalog:coin_list')
+        self.assertEqual(meta['requested_by'], 'staff')
+
+    def test_flag_ignored_for_regular_user(self):
+        """Обычному пользователю ?_profile=1 ничего не дает"""
+        # Arrange
+        self.client.force_login(self.user)
+
+        # Act
+        response = self.client.get(reverse('catalog:coin_list'), {'_profile': '1'})
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_signed_token_profiles_any_request(self):
+        """Подписанный токен включает профиль и для анонимного запроса, поддельный - нет"""
+        # Arrange
+        token = profiling.make_token(self.staff)
+
+        # Act
+        profiled = self.client.get(reverse('catalog:coin_list'), HTTP_X_PROFILE_TOKEN=token)
+        forged = self.client.get(reverse('catalog:coin_list'), HTTP_X_PROFILE_TOKEN=token + 'x')
+
+        # Assert
+        meta = profiling.get_profile(profiled['X-Profile'])
+        self.assertIsNone(meta['user'])
+        self.assertEqual(meta['requested_by'], 'staff')
+        self.assertNotIn('X-Profile', forged)
+
+    def test_ring_keeps_latest_profiles(self):
+        """Хранятся только последние PROFILE_RING_SIZE профилей"""
+        # Arrange
+        self.client.force_login(self.staff)
+
+        # Act
+        ids = [
+            self.client.get(reverse('catalog:coin_list'), {'_profile': '1'})['X-Profile']
+            for _ in range(3)
+        ]
+
+        # Assert
+        self.assertEqual([profile['id'] for profile in profiling.list_profiles()], sorted(ids[1:], reverse=True))
+        self.assertEqual(len(os.listdir(self.directory)), 6)
+
+    def test_stack_sampler_collapses_stacks(self):
+        """Выборочный профилировщик пишет стеки потока в свернутом формате"""
+        # Arrange
+        sampler = profiling.StackSampler(threading.get_ident(), 0.001)
+        finished = threading.Event()
+
+        # Act
+        sampler.start()
+        while not sampler.stacks and not finished.wait(0.001):
+            pass
+        sampler.stop()
+
+        # Assert
+        line = sampler.collapsed().splitlines()[0]
+        self.assertIn('test_stack_sampler_collapses_stacks (tests.py:', line)
+        self.assertRegex(line, r' \d+$')
+
+    def test_admin_pages_for_staff_only(self):
+        """Список, разбор и файлы профилей доступны только персоналу"""
+        # Arrange
+        self.client.force_login(self.staff)
+        profile_id = self.client.get(reverse('catalog:coin_list'), {'_profile': '1'})['X-Profile']
+
+        # Act
+        listing = self.client.get(reverse('profiles'))
+        detail = self.client.get(reverse('profile', args=[profile_id]))
+        download = self.client.get(reverse('profile_download', args=[profile_id, 'collapsed']))
+        token = self.client.post(reverse('profiles'))
+        self.client.force_login(self.user)
+        denied = self.client.get(reverse('profiles'))
+
+        # Assert
+        self.assertContains(listing, profile_id)
+        self.assertContains(detail, 'cumulative')
+        self.assertEqual(download.status_code, 200)
+        self.assertIsNotNone(profiling.check_token(token.context['token']))
+        self.assertEqual(denied.status_code, 302)
+
+    def test_unknown_profile_not_found(self):
+        """Неверный id профиля - 404, а не чтение произвольного файла"""
+        # Arrange
+        self.client.force_login(self.staff)
+
+        # Act & Assert
+        self.assertEqual(self.client.get(reverse('profile', args=['..settings'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('profile', args=['20260101-000000-000000-abcd'])).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse('profile_download', args=['20260101-000000-000000-abcd', 'json'])).status_code,
+            404,
+        )
+
+
+class DatabaseProfileTest(unittest.TestCase):
+    """Тесты профилей настроек SQLite.
+
+    Обычный unittest.TestCase: тесты открывают собственные базы во временном
+    каталоге, а TestCase Django запрещает соединения с алиасами не из DATABASES.
+    """
+
+    def test_production_pragmas_applied_on_connect(self):
+        """Профиль production включает WAL и PRAGMA на каждом новом соединении"""
+        # Arrange
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        alias = 'profile_test'
+        databases = {
+            **connections.settings,
+            alias: database.sqlite_database(os.path.join(directory, 'db.sqlite3'), 'production'),
+        }
+        connections.settings[alias] = connections.configure_settings(databases)[alias]
+        self.addCleanup(connections.settings.pop, alias)
+        self.addCleanup(connections[alias].close)
+
+        # Act
+        with connections[alias].cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'temp_store', 'busy_timeout', 'cache_size'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+
+        # Assert
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'temp_store': 2,
+            'busy_timeout': 5000,
+            'cache_size': -64000,
+        })
+        self.assertEqual(connections[alias].transaction_mode, 'IMMEDIATE')
+        self.assertEqual(connections[alias].settings_dict['CONN_MAX_AGE'], database.DEFAULT_CONN_MAX_AGE)
+
+    def test_default_profile_keeps_django_defaults(self):
+        """Профиль default - голые настройки Django, неизвестный профиль - ошибка"""
+        # Act
+        config = database.sqlite_database('db.sqlite3', 'default')
+
+        # Assert
+        self.assertEqual(config, {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'db.sqlite3'})
+        with self.assertRaises(ValueError):
+            database.sqlite_database('db.sqlite3', 'fast')
+
+    def test_no_persistent_connections_under_asgi(self):
+        """Под ASGI CONN_MAX_AGE всегда 0, иначе - из DB_CONN_MAX_AGE"""
+        # Act & Assert
+        self.assertEqual(database.conn_max_age({}), database.DEFAULT_CONN_MAX_AGE)
+        self.assertEqual(database.conn_max_age({'DB_CONN_MAX_AGE': '60'}), 60)
+        self.assertEqual(database.conn_max_age({'DB_CONN_MAX_AGE': '60', database.ASGI_ENVIRON: '1'}), 0)
+
+    def test_settings_use_default_profile(self):
+        """Без DATABASE_PROFILE база работает с настройками Django по умолчанию"""
+        # Assert
+        self.assertNotIn('init_command', connections.settings['default'].get('OPTIONS', {}))
+
+    def test_bench_command_compares_profiles(self):
+        """Команда bench_sqlite замеряет оба профиля и считает прирост"""
+        # Arrange
+        out = StringIO()
+
+        # Act
+        call_command('bench_sqlite', seconds=0.2, readers=2, writers=2, stdout=out)
+
+        # Assert
+        output = out.getvalue()
+        self.assertIn('   default: чтение', output)
+        self.assertIn('production: чтение', output)
+        self.assertIn('Прирост записи: x', output)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_bench_command_skips_slow_query_log(self):
+        """Синтетические запросы bench_sqlite не попадают в журнал медленных запросов"""
+        # Act & Assert
+        with self.assertNoLogs('moneta_veritas.slow_queries', 'WARNING'):
+            call_command('bench_sqlite', seconds=0.1, readers=1, writers=1, profiles=['default'], stdout=StringIO())
@@ -58,7 +58,7 @@ class CatalogViewTest(TestCase):
     def test_catalog_detail_view_coin(self):
         """Тест детального представления монеты"""
         # Arrange
-        url = reverse('catalog:catalog_detail', args=[self.published_coin.pk])
+        url = reverse('catalog:catalog_detail', args=[self.published_coin.catalog_entry_id])
         
         # Act
         response = self.client.get(url)
@@ -72,7 +72,7 @@ class CatalogViewTest(TestCase):
     def test_catalog_detail_view_banknote(self):
         """Тест детального представления банкноты"""
         # Arrange
-        url = reverse('catalog:catalog_detail', args=[self.published_banknote.pk])
+        url = reverse('catalog:catalog_detail', args=[self.published_banknote.catalog_entry_id])
         
         # Act
         response = self.client.get(url)
@@ -86,7 +86,7 @@ class CatalogViewTest(TestCase):
     def test_catalog_detail_view_unpublished_item(self):
         """Тест детального представления неопубликованного предмета"""
         # Arrange
-        url = reverse('catalog:catalog_detail', args=[self.unpublished_coin.pk])
+        url = reverse('catalog:catalog_detail', args=[self.unpublished_coin.catalog_entry_id])
         
         # Act
         response = self.client.get(url)
@@ -18,6 +18,10 @@ urlpatterns = [
     path('banknotes/create/', views.BanknoteCreateView.as_view(), name='banknote_create'),
     path('banknotes/<int:pk>/edit/', views.BanknoteUpdateView.as_view(), name='banknote_edit'),
     path('banknotes/<int:pk>/delete/', views.BanknoteDeleteView.as_view(), name='banknote_delete'),
+
+    # Выгрузка: /catalog/export/coins.csv?country=1&since=2024-01-01T00:00:00Z
+    path('export/<str:item_type>.<str:fmt>', views.catalog_export, name='catalog_export'),
+
     path('news/', views.NewsListView.as_view(), name='news_list'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='news_detail'),
     path('news/create/', views.NewsCreateView.as_view(), name='news_create'),
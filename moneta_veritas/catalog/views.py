@@ -1,12 +1,17 @@
 # catalog/views.py
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.db.models import Q
+from django.utils.decorators import method_decorator
 
-from .models import Coin, Banknote, News, Category, Country, Material, Mint
+from . import export, reference, search
+from .models import CatalogEntry, Coin, Banknote, News, Category, Country, Material, Mint
 from .forms import CoinForm, BanknoteForm, NewsForm
+from .mixins import CursorPaginationMixin, FilteredListMixin
+from .page_cache import cache_anonymous_page
 
 
 # Главная страница каталога (упрощенная версия)
@@ -27,36 +32,26 @@ class CatalogListView(ListView):
         return context
 
 
-# Детальное представление предмета
+def visible_entries(user):
+    """Записи каталога, видимые пользователю, вместе с предметом"""
+    visible = Q(coin__is_published=True) | Q(banknote__is_published=True)
+    if user.is_authenticated:
+        visible |= Q(coin__author=user) | Q(banknote__author=user)
+    # Один запрос по первичному ключу: предмет и его справочники через JOIN
+    return CatalogEntry.objects.select_related(
+        'coin__author', 'coin__category', 'coin__country', 'coin__material', 'coin__mint',
+        'banknote__author', 'banknote__category', 'banknote__country',
+    ).filter(visible)
+
+
+# Детальное представление предмета по глобальному id (CatalogEntry)
 class CatalogDetailView(DetailView):
     template_name = 'catalog/detail.html'
     context_object_name = 'item'
 
     def get_object(self):
-        pk = self.kwargs.get('pk')
-
-        # Пытаемся найти монету
-        coin = Coin.objects.filter(
-            Q(is_published=True) |
-            Q(author=self.request.user) if self.request.user.is_authenticated else Q(is_published=True),
-            pk=pk
-        ).first()
-
-        if coin:
-            return coin
-
-        # Пытаемся найти банкноту
-        banknote = Banknote.objects.filter(
-            Q(is_published=True) |
-            Q(author=self.request.user) if self.request.user.is_authenticated else Q(is_published=True),
-            pk=pk
-        ).first()
-
-        if banknote:
-            return banknote
-
-        from django.http import Http404
-        raise Http404("Объект не найден")
+        entry = get_object_or_404(visible_entries(self.request.user), pk=self.kwargs.get('pk'))
+        return entry.get_item()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -67,189 +62,56 @@ class CatalogDetailView(DetailView):
         return context
 
 
-# Список монет с поиском и фильтрами
-class CoinListView(ListView):
+# Список монет с поиском и фильтрами (см. CoinFilterSet)
+@method_decorator(cache_anonymous_page('coin', 'country', 'material', 'mint', 'category', 'user'), name='dispatch')
+class CoinListView(FilteredListMixin, CursorPaginationMixin, ListView):
     model = Coin
     template_name = 'catalog/coin_list.html'
     context_object_name = 'coin_list'
     paginate_by = 12
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-
-        # Базовая фильтрация по правам доступа
-        if self.request.user.is_authenticated:
-            queryset = queryset.filter(
-                Q(is_published=True) |
-                Q(author=self.request.user)
-            )
-        else:
-            queryset = queryset.filter(is_published=True)
-
-        # Поиск по тексту
-        search_query = self.request.GET.get('q')
-        if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(denomination__icontains=search_query)
-            )
-
-        # Фильтр по стране
-        country = self.request.GET.get('country')
-        if country:
-            queryset = queryset.filter(country_id=country)
-
-        # Фильтр по валюте
-        currency = self.request.GET.get('currency')
-        if currency:
-            queryset = queryset.filter(currency=currency)
-
-        # Фильтр по году (от и до)
-        year_from = self.request.GET.get('year_from')
-        year_to = self.request.GET.get('year_to')
-        if year_from:
-            queryset = queryset.filter(year__gte=year_from)
-        if year_to:
-            queryset = queryset.filter(year__lte=year_to)
-
-        # Фильтр по материалу
-        material = self.request.GET.get('material')
-        if material:
-            queryset = queryset.filter(material_id=material)
-
-        # Фильтр по монетному двору
-        mint = self.request.GET.get('mint')
-        if mint:
-            queryset = queryset.filter(mint_id=mint)
-
-        # Фильтр по диаметру
-        diameter_from = self.request.GET.get('diameter_from')
-        diameter_to = self.request.GET.get('diameter_to')
-        if diameter_from:
-            queryset = queryset.filter(diameter__gte=diameter_from)
-        if diameter_to:
-            queryset = queryset.filter(diameter__lte=diameter_to)
-
-        # Сортировка
-        sort_by = self.request.GET.get('sort', '-created_at')
-        if sort_by in ['-created_at', 'created_at', 'name', '-name', 'year', '-year', 'denomination']:
-            queryset = queryset.order_by(sort_by)
-
-        return queryset
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Добавляем данные для фильтров
-        context['countries'] = Country.objects.all()
-        context['materials'] = Material.objects.all()
-        context['mints'] = Mint.objects.all()
-
-        # Сохраняем параметры поиска
-        context['search_params'] = {
-            'q': self.request.GET.get('q', ''),
-            'country': self.request.GET.get('country', ''),
-            'currency': self.request.GET.get('currency', ''),
-            'year_from': self.request.GET.get('year_from', ''),
-            'year_to': self.request.GET.get('year_to', ''),
-            'material': self.request.GET.get('material', ''),
-            'mint': self.request.GET.get('mint', ''),
-            'diameter_from': self.request.GET.get('diameter_from', ''),
-            'diameter_to': self.request.GET.get('diameter_to', ''),
-            'sort': self.request.GET.get('sort', '-created_at'),
-        }
+        context['countries'] = reference.get_table(Country)
+        context['materials'] = reference.get_table(Material)
+        context['mints'] = reference.get_table(Mint)
         return context
 
 
-# Список банкнот с поиском и фильтрами
-class BanknoteListView(ListView):
+# Список банкнот с поиском и фильтрами (см. BanknoteFilterSet)
+@method_decorator(cache_anonymous_page('banknote', 'country', 'category', 'user'), name='dispatch')
+class BanknoteListView(FilteredListMixin, CursorPaginationMixin, ListView):
     model = Banknote
     template_name = 'catalog/banknote_list.html'
     context_object_name = 'banknote_list'
     paginate_by = 12
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-
-        # Базовая фильтрация по правам доступа
-        if self.request.user.is_authenticated:
-            queryset = queryset.filter(
-                Q(is_published=True) |
-                Q(author=self.request.user)
-            )
-        else:
-            queryset = queryset.filter(is_published=True)
-
-        # Поиск по тексту
-        search_query = self.request.GET.get('q')
-        if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(denomination__icontains=search_query) |
-                Q(serial_number__icontains=search_query)
-            )
-
-        # Фильтр по стране
-        country = self.request.GET.get('country')
-        if country:
-            queryset = queryset.filter(country_id=country)
-
-        # Фильтр по валюте
-        currency = self.request.GET.get('currency')
-        if currency:
-            queryset = queryset.filter(currency=currency)
-
-        # Фильтр по году (от и до)
-        year_from = self.request.GET.get('year_from')
-        year_to = self.request.GET.get('year_to')
-        if year_from:
-            queryset = queryset.filter(year__gte=year_from)
-        if year_to:
-            queryset = queryset.filter(year__lte=year_to)
-
-        # Фильтр по размеру (ширина)
-        width_from = self.request.GET.get('width_from')
-        width_to = self.request.GET.get('width_to')
-        if width_from:
-            queryset = queryset.filter(width__gte=width_from)
-        if width_to:
-            queryset = queryset.filter(width__lte=width_to)
-
-        # Фильтр по размеру (высота)
-        height_from = self.request.GET.get('height_from')
-        height_to = self.request.GET.get('height_to')
-        if height_from:
-            queryset = queryset.filter(height__gte=height_from)
-        if height_to:
-            queryset = queryset.filter(height__lte=height_to)
-
-        # Сортировка
-        sort_by = self.request.GET.get('sort', '-created_at')
-        if sort_by in ['-created_at', 'created_at', 'name', '-name', 'year', '-year', 'denomination']:
-            queryset = queryset.order_by(sort_by)
-
-        return queryset
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['countries'] = Country.objects.all()
-
-        context['search_params'] = {
-            'q': self.request.GET.get('q', ''),
-            'country': self.request.GET.get('country', ''),
-            'currency': self.request.GET.get('currency', ''),
-            'year_from': self.request.GET.get('year_from', ''),
-            'year_to': self.request.GET.get('year_to', ''),
-            'width_from': self.request.GET.get('width_from', ''),
-            'width_to': self.request.GET.get('width_to', ''),
-            'height_from': self.request.GET.get('height_from', ''),
-            'height_to': self.request.GET.get('height_to', ''),
-            'sort': self.request.GET.get('sort', '-created_at'),
-        }
+        context['countries'] = reference.get_table(Country)
         return context
 
 
+# Потоковая выгрузка опубликованных предметов (см. catalog/export.py)
+def catalog_export(request, item_type, fmt):
+    model = export.EXPORT_MODELS.get(item_type)
+    if model is None or fmt not in export.EXPORT_FORMATS:
+        raise Http404
+    try:
+        since = export.parse_since(request.GET.get('since'))
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    exporter = export.CatalogExport(model, request.GET, since=since, image_url=request.build_absolute_uri)
+    response = StreamingHttpResponse(exporter.lines(fmt), content_type=export.EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{item_type}.{fmt}"'
+    if exporter.cursor is not None:
+        # Значение since для следующей инкрементальной выгрузки
+        response['X-Export-Cursor'] = exporter.cursor.isoformat()
+    return response
+
+
 # Создание монеты
 class CoinCreateView(LoginRequiredMixin, CreateView):
     model = Coin
@@ -337,6 +199,7 @@ class BanknoteDeleteView(LoginRequiredMixin, DeleteView):
 
 
 # Список новостей
+@method_decorator(cache_anonymous_page('news', 'user'), name='dispatch')
 class NewsListView(ListView):
     model = News
     template_name = 'catalog/news_list.html'
@@ -348,10 +211,7 @@ class NewsListView(ListView):
 
         search_query = self.request.GET.get('q')
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) |
-                Q(content__icontains=search_query)
-            )
+            queryset = search.search_queryset(queryset, search_query)
 
         return queryset.order_by('-created_at')
 
@@ -0,0 +1,170 @@
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from moneta_veritas import slow_queries
+from moneta_veritas.database import PROFILES, sqlite_database
+
+ROWS = 20000
+COLLECTIONS = 200
+PAGE_SIZE = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при одновременных чтении '
+        'и записи с профилями базы default и production (moneta_veritas/database.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5, help='Длительность замера каждого профиля')
+        parser.add_argument('--readers', type=int, default=8, help='Потоков чтения')
+        parser.add_argument('--writers', type=int, default=4, help='Потоков записи')
+        parser.add_argument(
+            '--profile',
+            action='append',
+            dest='profiles',
+            choices=PROFILES,
+            help='Профиль для замера (можно несколько); по умолчанию все'
+        )
+
+    @slow_queries.disabled()
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or list(PROFILES)
+        directory = Path(tempfile.mkdtemp(prefix='bench_sqlite_'))
+        try:
+            results = {
+                profile: self.run_profile(profile, directory, options)
+                for profile in profiles
+            }
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        self.stdout.write(
+            f'Потоков чтения: {options["readers"]}, записи: {options["writers"]}, '
+            f'{options["seconds"]:g} с на профиль'
+        )
+        for profile, result in results.items():
+            self.stdout.write(
+                f'{profile:>10}: чтение {result["reads"] / result["elapsed"]:8.1f} оп/с '
+                f'(p95 {self.percentile(result["read_latencies"], 95):6.1f} мс), '
+                f'запись {result["writes"] / result["elapsed"]:7.1f} оп/с '
+                f'(p95 {self.percentile(result["write_latencies"], 95):6.1f} мс), '
+                f'"database is locked": {result["locked"]}'
+            )
+        if len(results) == len(PROFILES):
+            default, production = results['default'], results['production']
+            for kind, label in (('reads', 'чтения'), ('writes', 'записи')):
+                before = default[kind] / default['elapsed']
+                after = production[kind] / production['elapsed']
+                if before:
+                    self.stdout.write(f'Прирост {label}: x{after / before:.1f}')
+
+    @staticmethod
+    def percentile(values, percent):
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=100)[percent - 1]
+
+    def run_profile(self, profile, directory, options):
+        """Замер одного профиля на отдельном файле базы"""
+        alias = f'bench_{profile}'
+        # Отдельный алиас, чтобы транзакции шли через настройки профиля
+        # (transaction_mode) так же, как у основной базы
+        databases = {**connections.settings, alias: sqlite_database(directory / f'{profile}.sqlite3', profile)}
+        connections.settings[alias] = connections.configure_settings(databases)[alias]
+        try:
+            self.create_schema(alias)
+            return self.run_workload(alias, options)
+        finally:
+            connections[alias].close()
+            # Иначе повторный запуск в том же процессе взял бы соединение
+            # со старым (уже удаленным) файлом
+            del connections[alias]
+            del connections.settings[alias]
+
+    def create_schema(self, alias):
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE item ('
+                'id INTEGER PRIMARY KEY, collection INTEGER NOT NULL, '
+                'name TEXT NOT NULL, views INTEGER NOT NULL DEFAULT 0)'
+            )
+            cursor.execute('CREATE INDEX item_collection ON item (collection, id)')
+            cursor.executemany(
+                'INSERT INTO item (collection, name) VALUES (%s, %s)',
+                [(number % COLLECTIONS, f'Предмет {number}') for number in range(ROWS)],
+            )
+        connections[alias].close()
+
+    def run_workload(self, alias, options):
+        """Потоки чтения и записи, каждая операция - как отдельный HTTP-запрос"""
+        deadline = time.perf_counter() + options['seconds']
+        lock = threading.Lock()
+        result = {'reads': 0, 'writes': 0, 'locked': 0, 'read_latencies': [], 'write_latencies': []}
+
+        def read(number):
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    'SELECT id, name, views FROM item WHERE collection = %s ORDER BY id LIMIT %s',
+                    [number % COLLECTIONS, PAGE_SIZE],
+                )
+                cursor.fetchall()
+                cursor.execute('SELECT COUNT(*) FROM item WHERE collection = %s', [number % COLLECTIONS])
+                cursor.fetchone()
+
+        def write(number):
+            # Как добавление в коллекцию: проверка, затем запись в одной транзакции
+            with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM item WHERE collection = %s', [number % COLLECTIONS])
+                cursor.fetchone()
+                cursor.execute('INSERT INTO item (collection, name) VALUES (%s, %s)', [number % COLLECTIONS, 'Новый'])
+                cursor.execute('UPDATE item SET views = views + 1 WHERE id = %s', [number % ROWS + 1])
+
+        def worker(operation, kind, seed):
+            number = seed
+            latencies = []
+            done = locked = 0
+            try:
+                while time.perf_counter() < deadline:
+                    number += 7919
+                    started = time.perf_counter()
+                    try:
+                        operation(number)
+                    except OperationalError as error:
+                        if 'locked' not in str(error):
+                            raise
+                        locked += 1
+                    else:
+                        done += 1
+                        latencies.append((time.perf_counter() - started) * 1000)
+                    finally:
+                        # Конец запроса: соединение закрывается по CONN_MAX_AGE профиля
+                        connections[alias].close_if_unusable_or_obsolete()
+            finally:
+                connections[alias].close()
+            with lock:
+                result[kind] += done
+                result['locked'] += locked
+                result[f'{kind[:-1]}_latencies'].extend(latencies)
+
+        threads = [
+            threading.Thread(target=worker, args=(read, 'reads', seed)) for seed in range(options['readers'])
+        ] + [
+            threading.Thread(target=worker, args=(write, 'writes', seed)) for seed in range(options['writers'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result['elapsed'] = time.perf_counter() - started
+        if not result['reads'] and not result['writes']:
+            raise CommandError('Ни одна операция не выполнена')
+        return result
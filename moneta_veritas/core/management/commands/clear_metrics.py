@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from moneta_veritas.metrics import REGISTRY
+
+
+class Command(BaseCommand):
+    help = 'Удаляет снимки метрик процессов из METRICS_DIR (перед перезапуском всех воркеров)'
+
+    def handle(self, *args, **options):
+        if REGISTRY.directory is None or not REGISTRY.directory.exists():
+            self.stdout.write('METRICS_DIR не задан или пуст')
+            return
+        removed = 0
+        for path in REGISTRY.directory.glob('*.json'):
+            path.unlink(missing_ok=True)
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(f'Удалено снимков: {removed}'))
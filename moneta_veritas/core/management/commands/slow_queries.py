@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from moneta_veritas import slow_queries
+
+SORT_KEYS = {'total': 'total_ms', 'count': 'count', 'max': 'max_ms'}
+
+
+class Command(BaseCommand):
+    help = 'Самые дорогие формы медленных SQL-запросов из журнала с числом повторов и планом'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Сколько форм показать')
+        parser.add_argument(
+            '--sort',
+            choices=sorted(SORT_KEYS),
+            default='total',
+            help='Порядок: суммарное время, число повторов или худший случай'
+        )
+        parser.add_argument('--view', help='Только запросы этого представления, например catalog:coin_list')
+        parser.add_argument('--log', default=str(settings.SLOW_QUERY_LOG), help='Файл журнала')
+        parser.add_argument('--clear', action='store_true', help='Очистить журнал после вывода')
+
+    def handle(self, *args, **options):
+        shapes = slow_queries.aggregate(slow_queries.read_log(options['log']), view=options['view'])
+        shapes.sort(key=lambda shape: shape[SORT_KEYS[options['sort']]], reverse=True)
+        if not shapes:
+            self.stdout.write('Медленных запросов нет')
+        for number, shape in enumerate(shapes[:options['top']], 1):
+            views = ', '.join(f'{view} ×{count}' for view, count in shape['views'].most_common(3))
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{number}. [{shape["fingerprint"]}] повторов {shape["count"]}, '
+                f'всего {shape["total_ms"]:.1f} мс, худший {shape["max_ms"]:.1f} мс'
+            ))
+            self.stdout.write(f'   Представления: {views}')
+            self.stdout.write(f'   SQL: {shape["sql"]}')
+            if shape['params'] is not None:
+                self.stdout.write(f'   Параметры худшего: {", ".join(shape["params"])}')
+            for line in shape['plan'] or ():
+                self.stdout.write(f'   | {line}')
+        if options['clear']:
+            open(options['log'], 'w').close()
+            self.stdout.write(self.style.SUCCESS('Журнал очищен'))
@@ -0,0 +1,15 @@
+from django.core.management import get_commands
+from django.test import SimpleTestCase
+
+
+class CoreCommandsTest(SimpleTestCase):
+    """Тесты размещения служебных команд"""
+
+    def test_project_commands_in_core(self):
+        """Команды обслуживания проекта принадлежат приложению core, а не каталогу"""
+        # Act
+        commands = get_commands()
+
+        # Assert
+        for name in ('slow_queries', 'clear_metrics', 'bench_sqlite'):
+            self.assertEqual(commands[name], 'core')
@@ -0,0 +1,75 @@
+# homepage/featured.py
+"""
+Материализованный блок "на главной": монеты, банкноты и последние новости.
+
+Структура собирается один раз и хранится в кеше без срока жизни.
+Сигналы (homepage/signals.py) сбрасывают ее, только когда меняется
+предмет, который был или стал избранным, либо публикуется новость,
+поэтому при теплом кеше главная не делает запросов к каталогу.
+"""
+from django.core.cache import cache
+
+from catalog.models import Banknote, Coin, News
+
+FEATURED_KEY = 'homepage:featured'
+
+# Сколько предметов и новостей показывать на главной
+FEATURED_ITEMS_LIMIT = 6
+FEATURED_NEWS_LIMIT = 3
+
+
+def featured_querysets():
+    """Запросы разделов главной страницы (уже с сортировкой и лимитом)"""
+    coins = Coin.card_queryset(Coin.objects.filter(is_published=True, is_on_main=True))
+    banknotes = Banknote.card_queryset(Banknote.objects.filter(is_published=True, is_on_main=True))
+    news = News.objects.filter(is_published=True).select_related('author').order_by('-created_at')
+    return {
+        'coins': coins.order_by('-created_at')[:FEATURED_ITEMS_LIMIT],
+        'banknotes': banknotes.order_by('-created_at')[:FEATURED_ITEMS_LIMIT],
+        'news': news[:FEATURED_NEWS_LIMIT],
+    }
+
+
+def build_featured():
+    """Собирает упорядоченный блок главной страницы из базы"""
+    return {section: list(queryset) for section, queryset in featured_querysets().items()}
+
+
+async def abuild_featured():
+    """Асинхронный вариант build_featured()"""
+    return {
+        section: [obj async for obj in queryset]
+        for section, queryset in featured_querysets().items()
+    }
+
+
+def get_featured():
+    """Блок главной страницы (из кеша или пересобранный)"""
+    featured = cache.get(FEATURED_KEY)
+    if featured is None:
+        featured = build_featured()
+        cache.set(FEATURED_KEY, featured, None)
+    return featured
+
+
+async def aget_featured():
+    """Асинхронный вариант get_featured() для ASGI"""
+    featured = await cache.aget(FEATURED_KEY)
+    if featured is None:
+        featured = await abuild_featured()
+        await cache.aset(FEATURED_KEY, featured, None)
+    return featured
+
+
+def invalidate():
+    """Сбрасывает блок главной страницы"""
+    cache.delete(FEATURED_KEY)
+
+
+def is_featured(instance):
+    """Показан ли предмет или новость сейчас на главной"""
+    featured = cache.get(FEATURED_KEY)
+    if featured is None:
+        return False
+    section = {'coin': 'coins', 'banknote': 'banknotes', 'news': 'news'}[instance._meta.model_name]
+    return any(item.pk == instance.pk for item in featured[section])
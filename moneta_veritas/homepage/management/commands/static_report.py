@@ -0,0 +1,119 @@
+import gzip
+import json
+import time
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Профили сети для оценки времени загрузки: (RTT, секунды; пропускная способность, байт/с)
+NETWORK_PROFILES = {
+    '3g': (0.300, 1.6e6 / 8),
+    '4g': (0.100, 9e6 / 8),
+    'cable': (0.030, 50e6 / 8),
+}
+
+
+class AssetParser(HTMLParser):
+    """Собирает стили, скрипты и иконки страницы"""
+
+    def __init__(self):
+        super().__init__()
+        self.assets = []
+        self.in_head = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'head':
+            self.in_head = True
+        elif tag == 'link' and attrs.get('href') and attrs.get('rel') in ('stylesheet', 'icon'):
+            # Стили блокируют отрисовку где угодно, иконка - нет
+            self.assets.append((attrs['href'], attrs['rel'] == 'stylesheet'))
+        elif tag == 'script' and attrs.get('src'):
+            blocking = self.in_head and 'defer' not in attrs and 'async' not in attrs
+            self.assets.append((attrs['src'], blocking))
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.in_head = False
+
+
+class Command(BaseCommand):
+    help = 'Отчет о размере и времени загрузки критичных ресурсов главной страницы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Вывести отчет в JSON')
+
+    def read_local(self, url):
+        """Содержимое файла статики по URL (None для внешних ресурсов)"""
+        if not url.startswith(settings.STATIC_URL):
+            return None
+        name = url[len(settings.STATIC_URL):].split('?')[0]
+        path = finders.find(name)
+        if path is None and staticfiles_storage.exists(name):
+            path = staticfiles_storage.path(name)
+        if path is None:
+            return None
+        with open(path, 'rb') as source:
+            return source.read()
+
+    def measure(self, client, url, blocking):
+        row = {'url': url, 'blocking': blocking, 'local': url.startswith(settings.STATIC_URL)}
+        data = self.read_local(url)
+        if data is None:
+            return row
+        row['raw'] = len(data)
+        row['gzip'] = len(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            row['br'] = len(brotli.compress(data, quality=11))
+        transfer = min(size for key, size in row.items() if key in ('raw', 'gzip', 'br'))
+        row['transfer'] = transfer
+        row['estimate_ms'] = {
+            name: round((rtt + transfer / throughput) * 1000)
+            for name, (rtt, throughput) in NETWORK_PROFILES.items()
+        }
+        started = time.perf_counter()
+        response = client.get(url)
+        b''.join(getattr(response, 'streaming_content', [response.content]))
+        row['serve_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return row
+
+    def handle(self, *args, **options):
+        # Адрес не из INTERNAL_IPS, чтобы на странице не было debug toolbar
+        client = Client(SERVER_NAME='localhost', REMOTE_ADDR='192.0.2.1')
+        page = client.get(reverse('homepage:index'))
+        parser = AssetParser()
+        parser.feed(page.content.decode())
+        rows = [self.measure(client, url, blocking) for url, blocking in parser.assets]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, ensure_ascii=False, indent=2))
+            return
+
+        for row in rows:
+            mark = 'блокирует' if row['blocking'] else '         '
+            if 'raw' not in row:
+                self.stdout.write(f'{mark}  внешний ресурс  {row["url"]}')
+                continue
+            estimates = ' '.join(f'{name}={ms}мс' for name, ms in row['estimate_ms'].items())
+            self.stdout.write(
+                f'{mark}  {row["raw"]:>8} Б  gzip {row["gzip"]:>7} Б'
+                + (f'  br {row["br"]:>7} Б' if 'br' in row else '')
+                + f'  отдача {row["serve_ms"]} мс  {estimates}  {row["url"]}'
+            )
+        local = [row for row in rows if 'raw' in row]
+        self.stdout.write(self.style.SUCCESS(
+            f'Локальных ресурсов: {len(local)}, '
+            f'передается: {sum(row["transfer"] for row in local)} Б '
+            f'из {sum(row["raw"] for row in local)} Б, '
+            f'внешних: {len(rows) - len(local)}'
+        ))
@@ -0,0 +1,46 @@
+# homepage/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from catalog.models import Banknote, Coin, News
+from catalog.signals import items_bulk_created
+
+from . import featured
+
+
+def _invalidate():
+    featured.invalidate()
+    # Повторно после коммита: блок мог быть пересобран до фиксации транзакции
+    transaction.on_commit(featured.invalidate)
+
+
+@receiver(post_save, sender=Coin)
+@receiver(post_save, sender=Banknote)
+def update_featured_items(sender, instance, **kwargs):
+    """Сбрасывает главную, если предмет был или стал избранным"""
+    if (instance.is_published and instance.is_on_main) or featured.is_featured(instance):
+        _invalidate()
+
+
+@receiver(post_save, sender=News)
+def update_featured_news(sender, instance, **kwargs):
+    """Сбрасывает главную при публикации или изменении показанной новости"""
+    if instance.is_published or featured.is_featured(instance):
+        _invalidate()
+
+
+@receiver(post_delete, sender=Coin)
+@receiver(post_delete, sender=Banknote)
+@receiver(post_delete, sender=News)
+def remove_featured(sender, instance, **kwargs):
+    """Сбрасывает главную при удалении показанного предмета"""
+    if featured.is_featured(instance):
+        _invalidate()
+
+
+@receiver(items_bulk_created)
+def update_featured_after_import(sender, instances, **kwargs):
+    """Сбрасывает главную, если импортированы избранные предметы"""
+    if any(instance.is_published and instance.is_on_main for instance in instances):
+        _invalidate()
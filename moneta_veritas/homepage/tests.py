@@ -1,6 +1,20 @@
-from django.test import TestCase, Client
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from catalog.models import Coin, Banknote, Country, Category
+from homepage import featured
+from moneta_veritas import static_storage
 
 
 class HomepageViewTest(TestCase):
@@ -101,4 +115,108 @@ class HomepageViewTest(TestCase):
         response = self.client.get(url)
         
         # Assert
-        self.assertContains(response, "На главной странице пока нет коллекционных предметов.")
\ No newline at end of file
+        self.assertContains(response, "На главной странице пока нет коллекционных предметов.")
+
+class FeaturedStoreTest(TestCase):
+    """Тесты материализованного блока главной страницы"""
+
+    def setUp(self):
+        cache.clear()
+        self.country = Country.objects.create(title="Россия")
+        self.coin = Coin.objects.create(name="Избранная монета", country=self.country,
+                                        denomination="1", is_on_main=True)
+        self.other = Coin.objects.create(name="Обычная монета", country=self.country, denomination="2")
+        self.client.force_login(get_user_model().objects.create(username='collector'))
+
+    def catalog_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('homepage:index'))
+        return response, [q for q in queries.captured_queries if 'catalog_' in q['sql']]
+
+    def test_warm_homepage_has_no_catalog_queries(self):
+        """При теплом кеше главная не обращается к таблицам каталога"""
+        # Arrange
+        self.catalog_queries()
+
+        # Act
+        response, queries = self.catalog_queries()
+
+        # Assert
+        self.assertContains(response, "Избранная монета")
+        self.assertEqual(queries, [])
+
+    def test_flag_change_rebuilds_store(self):
+        """Снятие флага "на главной" пересобирает блок"""
+        # Arrange
+        self.catalog_queries()
+
+        # Act
+        self.coin.is_on_main = False
+        self.coin.save()
+        response, queries = self.catalog_queries()
+
+        # Assert
+        self.assertNotContains(response, "Избранная монета")
+        self.assertTrue(queries)
+
+    def test_unrelated_item_change_keeps_store(self):
+        """Изменение предмета не с главной не сбрасывает блок"""
+        # Arrange
+        self.catalog_queries()
+
+        # Act
+        self.other.name = "Переименованная монета"
+        self.other.save()
+
+        # Assert
+        self.assertIsNotNone(cache.get(featured.FEATURED_KEY))
+
+
+class StaticPipelineTest(TestCase):
+    """Тесты сборки статики"""
+
+    def test_bootstrap_css_included_once(self):
+        """CSS Bootstrap подключается один раз"""
+        # Act
+        response = self.client.get(reverse('homepage:index'))
+
+        # Assert
+        self.assertEqual(response.content.decode().count('bootstrap.min.css'), 1)
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        """collectstatic пишет файлы с хешем, манифест и сжатые копии"""
+        # Arrange
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'moneta_veritas.static_storage.CompressedManifestStaticFilesStorage'},
+        }
+
+        # Act
+        with override_settings(STATIC_ROOT=static_root, STORAGES=storages):
+            call_command('collectstatic', interactive=False, verbosity=0, stdout=StringIO())
+            from django.contrib.staticfiles.storage import staticfiles_storage
+            hashed = staticfiles_storage.stored_name('css/collector.css')
+
+        # Assert
+        self.assertRegex(hashed, r'^css/collector\.[0-9a-f]{12}\.css$')
+        self.assertTrue(os.path.exists(os.path.join(static_root, 'staticfiles.json')))
+        self.assertTrue(os.path.exists(os.path.join(static_root, hashed + '.gz')))
+        self.assertTrue(os.path.exists(os.path.join(static_root, hashed + '.br')))
+
+    def test_collectstatic_fails_without_brotli(self):
+        """Без пакета brotli сборка падает, а не пропускает копии .br"""
+        # Arrange
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'moneta_veritas.static_storage.CompressedManifestStaticFilesStorage'},
+        }
+
+        # Act & Assert
+        with override_settings(STATIC_ROOT=static_root, STORAGES=storages), \
+                mock.patch.object(static_storage, 'brotli', None):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'brotli'):
+                call_command('collectstatic', interactive=False, verbosity=0, stdout=StringIO())
@@ -1,53 +1,38 @@
-from django.shortcuts import render
-from catalog.models import Coin, Banknote
+from asgiref.sync import sync_to_async
 from django.contrib.auth.forms import UserCreationForm
+from django.shortcuts import render
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
-from django.views.generic import TemplateView
-from catalog.models import Coin, Banknote, News
-from django.views.generic import TemplateView
-from catalog.models import Coin, Banknote, News
-
 
-class IndexView(TemplateView):
-    template_name = 'homepage/index.html'
+from catalog.page_cache import cache_anonymous_page
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+from .featured import aget_featured, get_featured
 
-        try:
-            # Берем последние 3 монеты и банкноты для главной страницы
-            coins = Coin.objects.filter(is_published=True, is_on_main=True).order_by('-created_at')[:3]
-            banknotes = Banknote.objects.filter(is_published=True, is_on_main=True).order_by('-created_at')[:3]
 
-            # Берем последние 3 новости (исправлено: у News нет is_on_main)
-            news = News.objects.filter(is_published=True).order_by('-created_at')[:3]
-
-            context['coin_list'] = coins
-            context['banknote_list'] = banknotes
-            context['news_list'] = news
+def featured_context(featured):
+    return {
+        'coin_list': featured['coins'],
+        'banknote_list': featured['banknotes'],
+        'news_list': featured['news'],
+    }
 
-            print(f"DEBUG: Найдено {len(news)} новостей на главной")  # Отладка
 
-        except Exception as e:
-            # Если модели не загружены, оставляем пустые списки
-            context['coin_list'] = []
-            context['banknote_list'] = []
-            context['news_list'] = []
-            print(f"Ошибка загрузки данных на главной: {e}")
+@cache_anonymous_page('coin', 'banknote', 'news', 'user')
+def index(request):
+    template = 'homepage/index.html'
+    # Блок главной собирается заранее и берется из кеша (см. featured.py)
+    featured = get_featured()
+    return render(request, template, featured_context(featured))
 
-        return context
 
-def index(request):
+# Главная под ASGI (см. moneta_veritas/urls_async.py)
+@cache_anonymous_page('coin', 'banknote', 'news', 'user')
+async def async_index(request):
     template = 'homepage/index.html'
-    coin_list = Coin.objects.filter(is_published=True, is_on_main=True)[:6]
-    banknote_list = Banknote.objects.filter(is_published=True, is_on_main=True)[:6]
-    
-    context = {
-        'coin_list': coin_list,
-        'banknote_list': banknote_list
-    }
-    return render(request, template, context)
+    featured = await aget_featured()
+    # Шаблон рисуется в потоке: он читает request.user синхронно
+    return await sync_to_async(render)(request, template, featured_context(featured))
+
 
 class SignUp(CreateView):
     form_class = UserCreationForm
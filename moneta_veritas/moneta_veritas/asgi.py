@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moneta_veritas.settings')
+# До загрузки настроек: под ASGI соединения с базой не переиспользуются
+# (moneta_veritas/database.py)
+os.environ['MONETA_VERITAS_ASGI'] = '1'
 
 application = get_asgi_application()
@@ -0,0 +1,80 @@
+# moneta_veritas/database.py
+"""
+Профили настроек SQLite для DATABASES (DATABASE_PROFILE в settings.py).
+
+production - настройки для сервера с несколькими потоками или воркерами:
+- journal_mode=WAL: чтение не ждет записи, запись не ждет чтения;
+- synchronous=NORMAL: в режиме WAL база не портится при сбое, при
+  отключении питания могут потеряться только последние транзакции;
+- cache_size и mmap_size: страницы базы читаются из памяти;
+- temp_store=MEMORY: сортировки и временные индексы без файлов;
+- busy_timeout: занятая база - повод подождать, а не ошибка;
+- transaction_mode=IMMEDIATE: транзакция сразу берет блокировку записи.
+  С отложенной блокировкой две транзакции, которые сначала читают, а
+  потом пишут, не могут повысить блокировку и одна из них сразу
+  получает "database is locked" - busy_timeout тут не помогает;
+- постоянные соединения (CONN_MAX_AGE): PRAGMA выполняются один раз на
+  соединение, а не на каждый запрос.
+
+default - настройки Django по умолчанию. Используется, если профиль не
+задан: dev-база db.sqlite3 лежит в репозитории, а PRAGMA journal_mode=WAL
+переписала бы ее заголовок при любой команде manage.py. Сравнение
+профилей - manage.py bench_sqlite.
+
+Под ASGI постоянные соединения не используются (CONN_MAX_AGE=0):
+moneta_veritas/asgi.py выставляет MONETA_VERITAS_ASGI до загрузки
+настроек, и conn_max_age() это учитывает.
+
+PRAGMA выполняются на каждом новом соединении (OPTIONS['init_command']).
+Режим WAL хранится в самом файле базы, остальные действуют до закрытия
+соединения.
+"""
+import os
+
+PROFILES = ('default', 'production')
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Отрицательное значение - размер в КиБ: 64 МБ на соединение
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+DEFAULT_CONN_MAX_AGE = 600
+
+ASGI_ENVIRON = 'MONETA_VERITAS_ASGI'
+
+
+def init_command(pragmas=PRAGMAS):
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
+
+
+def conn_max_age(environ=os.environ):
+    """CONN_MAX_AGE из DB_CONN_MAX_AGE; под ASGI всегда 0"""
+    if environ.get(ASGI_ENVIRON):
+        return 0
+    return int(environ.get('DB_CONN_MAX_AGE', DEFAULT_CONN_MAX_AGE))
+
+
+def sqlite_database(name, profile='default', max_age=DEFAULT_CONN_MAX_AGE):
+    """Словарь для DATABASES с настройками профиля"""
+    if profile not in PROFILES:
+        raise ValueError(f'Неизвестный профиль базы {profile!r}, допустимы: {", ".join(PROFILES)}')
+    database = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+    }
+    if profile == 'production':
+        database.update({
+            'OPTIONS': {
+                'init_command': init_command(),
+                'transaction_mode': 'IMMEDIATE',
+            },
+            'CONN_MAX_AGE': max_age,
+            # Соединение, оборванное между запросами, заменяется новым
+            'CONN_HEALTH_CHECKS': True,
+        })
+    return database
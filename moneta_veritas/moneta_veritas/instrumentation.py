@@ -0,0 +1,204 @@
+# moneta_veritas/instrumentation.py
+"""
+Замеры каждого запроса: общее время, число и время SQL-запросов, время
+отрисовки шаблонов, попадания и промахи кеша.
+
+Счетчики запроса живут в RequestTiming, который ServerTimingMiddleware
+(moneta_veritas/middleware.py) кладет в contextvar на время обработки.
+Источники пишут в него сами:
+- SQL - обертка execute_wrappers, которая ставится на каждое новое
+  соединение (сигнал connection_created);
+- шаблоны - бэкенд TimedDjangoTemplates (TEMPLATES в settings.py);
+- кеш - InstrumentedCacheMixin, подмешанный к бэкенду кеша (CACHES).
+
+Вне запроса (команды, миграции) contextvar пуст и обертки шаблонов
+и кеша сразу передают вызов дальше. Обертка SQL засекает время всегда:
+запросы дольше SLOW_QUERY_THRESHOLD_MS уходят в журнал медленных
+запросов (moneta_veritas/slow_queries.py). Цена замера - несколько
+вызовов perf_counter и сложений, поэтому он включен и в продакшене.
+"""
+import time
+from contextvars import ContextVar
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+
+from . import slow_queries
+
+_current = ContextVar('request_timing', default=None)
+
+# Отличает промах кеша от сохраненного None
+_MISSING = object()
+
+
+class RequestTiming:
+    """Счетчики одного запроса"""
+    __slots__ = (
+        'request', 'started', 'finished', 'db_queries', 'db_time', 'template_time', 'template_depth',
+        'cache_hits', 'cache_misses', 'cache_paused',
+    )
+
+    def __init__(self, request=None):
+        self.request = request
+        self.started = time.perf_counter()
+        self.finished = None
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_paused = False
+
+    @property
+    def total_ms(self):
+        finished = self.finished if self.finished is not None else time.perf_counter()
+        return (finished - self.started) * 1000
+
+    @property
+    def db_ms(self):
+        return self.db_time * 1000
+
+    @property
+    def template_ms(self):
+        return self.template_time * 1000
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing"""
+        return (
+            f'total;dur={self.total_ms:.1f}, '
+            f'db;dur={self.db_ms:.1f};desc="{self.db_queries} queries", '
+            f'tpl;dur={self.template_ms:.1f}, '
+            f'cache;desc="{self.cache_hits} hits {self.cache_misses} misses"'
+        )
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total_ms, 2),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_ms, 2),
+            'template_ms': round(self.template_ms, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def start(request=None):
+    """Начинает замер запроса; возвращает (замер, токен для finish)"""
+    install_query_wrapper()
+    timing = RequestTiming(request)
+    return timing, _current.set(timing)
+
+
+def finish(timing, token):
+    timing.finished = time.perf_counter()
+    _current.reset(token)
+    return timing
+
+
+def current():
+    return _current.get()
+
+
+# SQL
+
+def record_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed = time.perf_counter() - started
+    timing = _current.get()
+    if timing is not None:
+        timing.db_queries += 1
+        timing.db_time += elapsed
+    threshold = slow_queries.get_threshold_ms()
+    if threshold is not None and elapsed * 1000 >= threshold:
+        request = timing.request if timing is not None else None
+        slow_queries.record(context['connection'], sql, params, many, elapsed, request)
+    return result
+
+
+def add_query_wrapper(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_wrapper():
+    """Обертка для соединений, открытых в этом потоке до подключения сигнала"""
+    for connection in connections.all(initialized_only=True):
+        add_query_wrapper(connection=connection)
+
+
+connection_created.connect(add_query_wrapper, dispatch_uid='moneta_veritas.instrumentation')
+
+
+# Шаблоны
+
+class TimedTemplate:
+    """Шаблон бэкенда, время отрисовки которого попадает в замер"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timing = _current.get()
+        if timing is None:
+            return self.template.render(context, request)
+        # Вложенные render_to_string уже входят во время внешнего шаблона
+        timing.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timing.template_depth -= 1
+            if not timing.template_depth:
+                timing.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates с замером времени отрисовки"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+# Кеш
+
+class InstrumentedCacheMixin:
+    """Считает попадания и промахи get/get_many; подмешивается к любому бэкенду"""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        timing = _current.get()
+        if timing is not None and not timing.cache_paused:
+            if value is _MISSING:
+                timing.cache_misses += 1
+            else:
+                timing.cache_hits += 1
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        timing = _current.get()
+        if timing is None or timing.cache_paused:
+            return super().get_many(keys, version)
+        # Базовый get_many вызывает get для каждого ключа - не считаем дважды
+        timing.cache_paused = True
+        try:
+            values = super().get_many(keys, version)
+        finally:
+            timing.cache_paused = False
+        timing.cache_hits += len(values)
+        timing.cache_misses += len(keys) - len(values)
+        return values
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
@@ -0,0 +1,269 @@
+# moneta_veritas/metrics.py
+"""
+Метрики запросов в формате Prometheus: /internal/metrics.
+
+Счетчики и гистограммы с фиксированными корзинами хранятся в памяти
+процесса (REGISTRY) под одной блокировкой - запись из нескольких потоков
+безопасна, а цена наблюдения - bisect и несколько сложений. Данные
+приходят из ServerTimingMiddleware (moneta_veritas/middleware.py):
+длительность запроса по представлению, статусу и состоянию входа,
+число и время SQL-запросов, попадания и промахи кеша.
+
+Несколько процессов (воркеры gunicorn/uvicorn): если задан METRICS_DIR,
+каждый процесс не чаще раза в METRICS_FLUSH_INTERVAL секунд записывает
+свой снимок в METRICS_DIR/<pid>.json (атомарно, через os.replace).
+Эндпоинт суммирует файлы всех процессов. Файлы завершившихся воркеров
+остаются, чтобы счетчики не уменьшались; каталог очищается при
+перезапуске всего сервиса (manage.py clear_metrics).
+"""
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Корзины длительности (секунды) и числа SQL-запросов на запрос
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+DEFAULT_FLUSH_INTERVAL = 5
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+
+    def empty(self):
+        return Counter(self.name, self.documentation, self.labels)
+
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dump(self):
+        return [[list(labels), value] for labels, value in self.values.items()]
+
+    def merge(self, rows):
+        for labels, value in rows:
+            self.inc(tuple(labels), value)
+
+    def lines(self):
+        for labels, value in sorted(self.values.items()):
+            yield f'{self.name}{format_labels(self.labels, labels)} {format_value(value)}'
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами; хранит некумулятивные счетчики"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def empty(self):
+        return Histogram(self.name, self.documentation, self.labels, self.buckets)
+
+    def observe(self, labels, value):
+        state = self.values.get(labels)
+        if state is None:
+            # Корзины, +Inf и сумма наблюдений
+            state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def dump(self):
+        return [[list(labels), state] for labels, state in self.values.items()]
+
+    def merge(self, rows):
+        for labels, counts in rows:
+            state = self.values.setdefault(tuple(labels), [0] * (len(self.buckets) + 1) + [0.0])
+            for index, count in enumerate(counts):
+                state[index] += count
+
+    def lines(self):
+        bounds = [format_value(bound) for bound in self.buckets] + ['+Inf']
+        for labels, state in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                yield f'{self.name}_bucket{format_labels(self.labels + ("le",), labels + (bound,))} {cumulative}'
+            yield f'{self.name}_sum{format_labels(self.labels, labels)} {format_value(state[-1])}'
+            yield f'{self.name}_count{format_labels(self.labels, labels)} {cumulative}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values):
+    pairs = (f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+class Registry:
+    """Метрики процесса; запись и снимок под одной блокировкой"""
+
+    def __init__(self, directory=None, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.next_flush = 0.0
+
+    def counter(self, name, documentation, labels=()):
+        return self.metrics.setdefault(name, Counter(name, documentation, tuple(labels)))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(name, documentation, tuple(labels), buckets))
+
+    def snapshot(self):
+        with self.lock:
+            return {name: metric.dump() for name, metric in self.metrics.items()}
+
+    def reset(self):
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values.clear()
+
+    # Файлы процессов
+
+    @property
+    def path(self):
+        return self.directory / f'{os.getpid()}.json'
+
+    def flush(self):
+        """Записывает снимок процесса в METRICS_DIR/<pid>.json"""
+        if self.directory is None:
+            return
+        self.next_flush = time.monotonic() + self.flush_interval
+        data = json.dumps(self.snapshot())
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Временный файл свой у каждого потока: сбросы могут идти параллельно
+        temporary = self.path.with_suffix(f'.{threading.get_ident()}.tmp')
+        temporary.write_text(data, encoding='utf-8')
+        os.replace(temporary, self.path)
+
+    def maybe_flush(self):
+        if self.directory is not None and time.monotonic() >= self.next_flush:
+            self.flush()
+
+    def collect(self):
+        """Метрики всех процессов: копии метрик с просуммированными значениями"""
+        merged = {name: metric.empty() for name, metric in self.metrics.items()}
+        if self.directory is None:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = []
+            for path in sorted(self.directory.glob('*.json')):
+                try:
+                    snapshots.append(json.loads(path.read_text(encoding='utf-8')))
+                except (OSError, ValueError):
+                    # Файл удален или пишется прямо сейчас другим способом
+                    continue
+        for snapshot in snapshots:
+            for name, rows in snapshot.items():
+                if name in merged:
+                    merged[name].merge(rows)
+        return merged.values()
+
+    def render(self):
+        lines = []
+        for metric in self.collect():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.lines())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry(
+    getattr(settings, 'METRICS_DIR', None),
+    getattr(settings, 'METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+)
+atexit.register(REGISTRY.flush)
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'moneta_http_request_duration_seconds',
+    'Длительность обработки запроса',
+    ('view', 'status', 'auth'),
+    LATENCY_BUCKETS,
+)
+DB_QUERIES = REGISTRY.histogram(
+    'moneta_db_queries_per_request',
+    'Число SQL-запросов на один запрос',
+    ('view',),
+    QUERY_COUNT_BUCKETS,
+)
+DB_DURATION = REGISTRY.histogram(
+    'moneta_db_duration_seconds',
+    'Суммарное время SQL-запросов одного запроса',
+    ('view',),
+    DB_TIME_BUCKETS,
+)
+CACHE_HITS = REGISTRY.counter('moneta_cache_hits_total', 'Попадания в кеш', ('view',))
+CACHE_MISSES = REGISTRY.counter('moneta_cache_misses_total', 'Промахи кеша', ('view',))
+
+
+def auth_state(request):
+    """Состояние входа без лишнего запроса к базе"""
+    user = getattr(request, '_cached_user', None) or getattr(request, '_acached_user', None)
+    if user is not None:
+        return 'authenticated' if user.is_authenticated else 'anonymous'
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return 'anonymous'
+    # Сессия есть, но представлению пользователь не понадобился
+    return 'unknown'
+
+
+def observe(request, response, timing):
+    """Записывает замеры запроса (instrumentation.RequestTiming)"""
+    match = request.resolver_match
+    view = match.view_name if match else 'unresolved'
+    state = auth_state(request)
+    with REGISTRY.lock:
+        REQUEST_DURATION.observe((view, str(response.status_code), state), timing.total_ms / 1000)
+        DB_QUERIES.observe((view,), timing.db_queries)
+        DB_DURATION.observe((view,), timing.db_time)
+        if timing.cache_hits:
+            CACHE_HITS.inc((view,), timing.cache_hits)
+        if timing.cache_misses:
+            CACHE_MISSES.inc((view,), timing.cache_misses)
+    REGISTRY.maybe_flush()
+
+
+def has_access(request):
+    """Персонал, адрес из METRICS_ALLOWED_IPS или токен METRICS_TOKEN"""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        return True
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ()):
+        return True
+    return request.user.is_staff
+
+
+def metrics_view(request):
+    """Метрики для Prometheus; остальным эндпоинт не виден"""
+    if not has_access(request):
+        raise Http404
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
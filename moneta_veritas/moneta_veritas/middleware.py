@@ -0,0 +1,123 @@
+# moneta_veritas/middleware.py
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+from . import instrumentation, metrics, profiling
+
+request_logger = logging.getLogger('moneta_veritas.requests')
+
+
+class AsyncUrlconfMiddleware:
+    """Направляет запросы, пришедшие через ASGI, в ASYNC_ROOT_URLCONF.
+
+    Там читающие страницы обслуживаются async-представлениями, а под WSGI
+    остаются синхронные - каждому серверу свой вариант без лишних
+    переключений между потоком и циклом событий.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def set_urlconf(self, request):
+        urlconf = getattr(settings, 'ASYNC_ROOT_URLCONF', None)
+        if urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = urlconf
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        self.set_urlconf(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.set_urlconf(request)
+        return await self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """Замеры запроса (moneta_veritas/instrumentation.py) в заголовок, лог и метрики.
+
+    Заголовок Server-Timing видно во вкладке Network браузера; строка лога
+    moneta_veritas.requests - JSON с именем представления, статусом и теми
+    же счетчиками. Стоит первым в MIDDLEWARE, чтобы total включал всю
+    цепочку. У потоковых ответов время передачи тела не учитывается.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.send_header = getattr(settings, 'SERVER_TIMING_HEADER', True)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timing, token = instrumentation.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.finish(timing, token)
+        return self.report(request, response, timing)
+
+    async def __acall__(self, request):
+        timing, token = instrumentation.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.finish(timing, token)
+        return self.report(request, response, timing)
+
+    def report(self, request, response, timing):
+        metrics.observe(request, response, timing)
+        if self.send_header:
+            response['Server-Timing'] = timing.server_timing()
+        if request_logger.isEnabledFor(logging.INFO):
+            match = request.resolver_match
+            record = {
+                'view': match.view_name if match else None,
+                'method': request.method,
+                'status': response.status_code,
+                **timing.as_dict(),
+            }
+            request_logger.info(json.dumps(record, ensure_ascii=False), extra={'timing': record})
+        return response
+
+
+class ProfilingMiddleware:
+    """Профиль отдельного запроса по требованию (moneta_veritas/profiling.py).
+
+    Стоит после AuthenticationMiddleware: ?_profile=1 действует только для
+    персонала. Остальные запросы проходят без изменений - проверяется лишь
+    наличие параметра или заголовка. Id сохраненного профиля возвращается
+    в заголовке X-Profile. В async-цепочке (ASGI) запрос не профилируется.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.get_response(request)
+        if profiling.HEADER not in request.META and profiling.QUERY_PARAM not in request.GET:
+            return self.get_response(request)
+        owner = profiling.requested_by(request)
+        if owner is None:
+            return self.get_response(request)
+        return profiling.run_profiled(self.get_response, request, owner)
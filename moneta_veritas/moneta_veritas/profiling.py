@@ -0,0 +1,261 @@
+# moneta_veritas/profiling.py
+"""
+Профилирование отдельных запросов по требованию.
+
+Запрос профилируется, если:
+- в нем есть параметр ?_profile=1 и пользователь - персонал;
+- или в заголовке X-Profile-Token передан подписанный токен со страницы
+  /admin/profiles/ (действует PROFILE_TOKEN_MAX_AGE секунд). Так можно
+  снять профиль запроса конкретного пользователя: токен добавляется
+  к его запросам, например расширением браузера или в curl с его cookie.
+
+Во время запроса работают cProfile и выборочный профилировщик: фоновый
+поток раз в PROFILE_SAMPLE_INTERVAL секунд снимает стек потока запроса.
+Результат - файлы <id>.prof (pstats), <id>.collapsed (свернутые стеки
+для flamegraph.pl или speedscope) и <id>.json (описание запроса)
+в PROFILE_DIR. Хранятся последние PROFILE_RING_SIZE профилей, старые
+удаляются. Список и загрузка - на странице /admin/profiles/.
+
+cProfile включается только в потоке запроса, другие запросы не
+замедляются; одновременно снимается не больше одного профиля на процесс.
+Под ASGI (async-цепочка middleware) профилирование не выполняется: цикл
+событий общий, и в профиль попали бы чужие запросы.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core import signing
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.views.decorators.http import require_http_methods
+
+QUERY_PARAM = '_profile'
+HEADER = 'HTTP_X_PROFILE_TOKEN'
+TOKEN_SALT = 'moneta_veritas.profiling'
+
+DEFAULT_RING_SIZE = 50
+DEFAULT_SAMPLE_INTERVAL = 0.001
+DEFAULT_TOKEN_MAX_AGE = 3600
+
+PROFILE_ID = re.compile(r'^\d{8}-\d{6}-\d{6}-[0-9a-f]{4}$')
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+EXTENSIONS = {'prof': 'application/octet-stream', 'collapsed': 'text/plain; charset=utf-8'}
+
+# Один профиль на процесс одновременно
+_busy = threading.Lock()
+
+
+def get_directory():
+    return Path(getattr(settings, 'PROFILE_DIR', settings.BASE_DIR / 'profiles'))
+
+
+# Токены
+
+def make_token(user):
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(user.get_username())
+
+
+def check_token(token):
+    """Имя выдавшего токен или None, если токен неверен или устарел"""
+    max_age = getattr(settings, 'PROFILE_TOKEN_MAX_AGE', DEFAULT_TOKEN_MAX_AGE)
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return None
+
+
+def requested_by(request):
+    """Кто запросил профиль: имя из токена, персонал с ?_profile или None"""
+    token = request.META.get(HEADER)
+    if token:
+        return check_token(token)
+    if request.GET.get(QUERY_PARAM) and request.user.is_staff:
+        return request.user.get_username()
+    return None
+
+
+# Выборочный профилировщик
+
+class StackSampler(threading.Thread):
+    """Снимает стек одного потока с заданным интервалом"""
+
+    def __init__(self, thread_id, interval, root_code=None):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                # Кадры выше точки входа профиля одинаковы у всех запросов
+                if code is self.root_code:
+                    break
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def run_profiled(get_response, request, owner):
+    """Выполняет запрос под профилировщиком и сохраняет профиль"""
+    if not _busy.acquire(blocking=False):
+        response = get_response(request)
+        response['X-Profile'] = 'busy'
+        return response
+    try:
+        sampler = StackSampler(
+            threading.get_ident(),
+            getattr(settings, 'PROFILE_SAMPLE_INTERVAL', DEFAULT_SAMPLE_INTERVAL),
+            run_profiled.__code__,
+        )
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        sampler.start()
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+            sampler.stop()
+        elapsed = time.perf_counter() - started
+        profile_id = save(request, response, owner, profiler, sampler, elapsed)
+    finally:
+        _busy.release()
+    response['X-Profile'] = profile_id
+    return response
+
+
+# Хранилище
+
+def save(request, response, owner, profiler, sampler, elapsed):
+    directory = get_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = f'{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}-{secrets.token_hex(2)}'
+    profiler.dump_stats(directory / f'{profile_id}.prof')
+    (directory / f'{profile_id}.collapsed').write_text(sampler.collapsed(), encoding='utf-8')
+    match = request.resolver_match
+    user = getattr(request, 'user', None)
+    meta = {
+        'id': profile_id,
+        'created': time.time(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view': match.view_name if match else None,
+        'user': user.get_username() if user is not None and user.is_authenticated else None,
+        'requested_by': owner,
+        'status': response.status_code,
+        'ms': round(elapsed * 1000, 1),
+        'samples': sum(sampler.stacks.values()),
+    }
+    (directory / f'{profile_id}.json').write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+    prune(directory)
+    return profile_id
+
+
+def prune(directory):
+    """Оставляет последние PROFILE_RING_SIZE профилей"""
+    size = getattr(settings, 'PROFILE_RING_SIZE', DEFAULT_RING_SIZE)
+    # Имена начинаются с даты и времени до микросекунд, поэтому сортировка по имени хронологическая
+    profiles = sorted(directory.glob('*.json'), reverse=True)
+    for path in profiles[size:]:
+        for extension in ('json', *EXTENSIONS):
+            path.with_suffix(f'.{extension}').unlink(missing_ok=True)
+
+
+def list_profiles():
+    directory = get_directory()
+    profiles = []
+    for path in sorted(directory.glob('*.json'), reverse=True) if directory.exists() else ():
+        try:
+            profiles.append(json.loads(path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def get_profile(profile_id):
+    if not PROFILE_ID.match(profile_id):
+        raise Http404
+    path = get_directory() / f'{profile_id}.json'
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        raise Http404
+
+
+# Страницы админки
+
+@staff_member_required
+@require_http_methods(['GET', 'POST'])
+def profile_list(request):
+    """Последние профили и выдача токена для заголовка X-Profile-Token"""
+    token = make_token(request.user) if request.method == 'POST' else None
+    return render(request, 'admin/profiles/list.html', {
+        **admin.site.each_context(request),
+        'title': 'Профили запросов',
+        'profiles': list_profiles(),
+        'token': token,
+        'token_max_age': getattr(settings, 'PROFILE_TOKEN_MAX_AGE', DEFAULT_TOKEN_MAX_AGE),
+        'query_param': QUERY_PARAM,
+    })
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    """Самые дорогие функции; ?sort=tottime - по собственному времени"""
+    profile = get_profile(profile_id)
+    stream = io.StringIO()
+    stats = pstats.Stats(str(get_directory() / f'{profile_id}.prof'), stream=stream)
+    sort = request.GET.get('sort')
+    stats.sort_stats(sort if sort in SORT_KEYS else 'cumulative')
+    stats.print_stats(40)
+    return render(request, 'admin/profiles/detail.html', {
+        **admin.site.each_context(request),
+        'title': f'Профиль {profile_id}',
+        'profile': profile,
+        'stats': stream.getvalue(),
+        'sort_keys': SORT_KEYS,
+    })
+
+
+@staff_member_required
+def profile_download(request, profile_id, extension):
+    get_profile(profile_id)
+    if extension not in EXTENSIONS:
+        raise Http404
+    path = get_directory() / f'{profile_id}.{extension}'
+    if not path.exists():
+        raise Http404
+    return FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=path.name,
+        content_type=EXTENSIONS[extension],
+    )
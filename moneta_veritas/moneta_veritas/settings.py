@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from moneta_veritas.database import conn_max_age, sqlite_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -34,6 +37,7 @@ INSTALLED_APPS = [
     'homepage.apps.HomepageConfig',
     'catalog.apps.CatalogConfig',
     'about.apps.AboutConfig',
+    'core.apps.CoreConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -46,11 +50,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы замер включал всю цепочку (moneta_veritas/instrumentation.py)
+    'moneta_veritas.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'moneta_veritas.middleware.AsyncUrlconfMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Профиль запроса по ?_profile=1 или X-Profile-Token (moneta_veritas/profiling.py)
+    'moneta_veritas.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -66,7 +75,9 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени отрисовки для Server-Timing
+        'BACKEND': 'moneta_veritas.instrumentation.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,15 +93,20 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'moneta_veritas.wsgi.application'
 
+# Маршруты для запросов через ASGI: читающие страницы - async-представления
+ASYNC_ROOT_URLCONF = 'moneta_veritas.urls_async'
+
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Профиль SQLite (moneta_veritas/database.py): default - как у Django,
+# production (DATABASE_PROFILE=production на сервере) - WAL, PRAGMA на
+# каждом соединении и постоянные соединения, кроме запуска под ASGI
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'default')
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3', DATABASE_PROFILE, conn_max_age()),
 }
 
 
@@ -141,6 +157,23 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static_dev',
     ]
 
+# Сборка статики: python manage.py collectstatic
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# В продакшене - имена с хешем и заранее сжатые .gz/.br (static_storage.py),
+# при разработке - исходные файлы из STATICFILES_DIRS
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'moneta_veritas.static_storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -148,4 +181,87 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Catalog
+# Курсорная пагинация списков монет и банкнот (без OFFSET и COUNT(*)).
+# Даже при False ее можно включить для запроса параметром ?cursor=
+CATALOG_CURSOR_PAGINATION = False
+
+# Время жизни кеша фасетных счетчиков фильтров, секунд
+CATALOG_FACETS_TIMEOUT = 300
+
+# Время жизни закешированных страниц каталога для анонимов, секунд.
+# Изменения данных сбрасывают страницы сразу (catalog/page_cache.py)
+CATALOG_PAGE_CACHE_TIMEOUT = 600
+
+# Cache
+# LocMem живет внутри процесса. При нескольких воркерах нужен общий бэкенд
+# (Redis, Memcached): через него процессы делят счетчики версий справочников
+# (catalog/reference.py), поколения страниц (catalog/page_cache.py) и кеш фасетов
+CACHES = {
+    'default': {
+        # LocMemCache со счетчиками попаданий для Server-Timing; для другого
+        # бэкенда подмешивается instrumentation.InstrumentedCacheMixin
+        'BACKEND': 'moneta_veritas.instrumentation.InstrumentedLocMemCache',
+        'LOCATION': 'moneta-veritas',
+    }
+}
+
+# Тесты: полный прогон дополнительно проверяет бюджеты SQL-запросов страниц
+# (catalog/query_budgets.py)
+TEST_RUNNER = 'moneta_veritas.test_runner.QueryBudgetRunner'
+
+# Замеры запросов (moneta_veritas/middleware.py): заголовок Server-Timing
+# в ответе и JSON-строка на каждый запрос в логгер moneta_veritas.requests
+SERVER_TIMING_HEADER = True
+
+# Метрики Prometheus (moneta_veritas/metrics.py). При нескольких процессах
+# METRICS_DIR - общий каталог, куда каждый процесс пишет свой снимок
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = 5
+# Доступ к /internal/metrics: персонал, адреса из METRICS_ALLOWED_IPS и
+# запросы с заголовком Authorization: Bearer <METRICS_TOKEN>. Не INTERNAL_IPS:
+# за прокси на том же хосте все запросы приходят с 127.0.0.1
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+# Журнал медленных SQL-запросов (moneta_veritas/slow_queries.py) с планом
+# EXPLAIN QUERY PLAN; просмотр - manage.py slow_queries. None выключает
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = BASE_DIR / 'slow_queries.log'
+
+# Профили отдельных запросов (moneta_veritas/profiling.py): последние
+# PROFILE_RING_SIZE профилей в PROFILE_DIR, список - /admin/profiles/
+PROFILE_DIR = BASE_DIR / 'profiles'
+PROFILE_RING_SIZE = 50
+PROFILE_SAMPLE_INTERVAL = 0.001
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_queries': {
+            'class': 'logging.FileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'moneta_veritas.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'moneta_veritas.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,155 @@
+# moneta_veritas/slow_queries.py
+"""
+Журнал медленных SQL-запросов: python manage.py slow_queries
+
+Обертка SQL из moneta_veritas/instrumentation.py передает сюда каждый
+запрос дольше SLOW_QUERY_THRESHOLD_MS. В логгер moneta_veritas.slow_queries
+(файл SLOW_QUERY_LOG) пишется JSON-строка: отпечаток формы запроса, SQL,
+параметры, представление, из которого он пришел, длительность и план
+EXPLAIN QUERY PLAN.
+
+Форма запроса - SQL с плейсхолдерами, где списки IN (%s, %s, ...)
+свернуты, поэтому запросы, отличающиеся только значениями фильтров,
+получают один отпечаток. План для формы снимается один раз на процесс:
+повторный EXPLAIN дал бы тот же результат. Команда slow_queries
+группирует строки журнала по отпечатку и показывает самые дорогие формы
+с числом повторов.
+
+Замеры (bench_sqlite, bench_asgi, run_benchmarks) и тесты выключают
+журнал через disabled(): синтетическая нагрузка в одном файле с
+запросами пользователей исказила бы отчет slow_queries.
+"""
+import hashlib
+import json
+import logging
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.test.utils import override_settings
+
+logger = logging.getLogger('moneta_veritas.slow_queries')
+
+# Планы уже встреченных форм; размер ограничен на случай динамического SQL
+MAX_PLANS = 1000
+_plans = {}
+
+MAX_PARAM_LENGTH = 200
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def get_threshold_ms():
+    """Порог в мс; None выключает журнал"""
+    return getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+
+
+def disabled():
+    """Журнал выключен внутри блока with или декорированной функции"""
+    return override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+
+
+def normalize(sql):
+    return _SPACES.sub(' ', _IN_LIST.sub('(%s, ...)', sql)).strip()
+
+
+def fingerprint(shape):
+    return hashlib.md5(shape.encode()).hexdigest()[:12]
+
+
+def format_params(params):
+    if params is None:
+        return None
+    values = []
+    for value in params:
+        text = repr(value)
+        values.append(text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + '…')
+    return values
+
+
+def explain(connection, sql, params):
+    """План SQLite в виде строк дерева; для других баз и не-SELECT - None"""
+    if connection.vendor != 'sqlite' or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    try:
+        with connection.cursor() as wrapper:
+            # Курсор бэкенда напрямую: EXPLAIN не проходит через обертки
+            # и не попадает ни в счетчики запроса, ни снова в журнал
+            wrapper.cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            rows = wrapper.cursor.fetchall()
+    except Exception as error:
+        return [f'EXPLAIN не выполнен: {error}']
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node] + detail)
+    return lines
+
+
+def record(connection, sql, params, many, elapsed, request=None):
+    """Пишет медленный запрос в журнал"""
+    shape = normalize(sql)
+    key = fingerprint(shape)
+    plan = None
+    if not many and key not in _plans:
+        plan = explain(connection, sql, params)
+        if len(_plans) < MAX_PLANS:
+            _plans[key] = True
+    match = getattr(request, 'resolver_match', None)
+    entry = {
+        'fingerprint': key,
+        'ms': round(elapsed * 1000, 2),
+        'view': match.view_name if match else None,
+        'path': request.path if request is not None else None,
+        'sql': shape,
+        'params': None if many else format_params(params),
+        'plan': plan,
+    }
+    logger.warning(json.dumps(entry, ensure_ascii=False), extra={'slow_query': entry})
+
+
+def read_log(path):
+    """Записи журнала; строки другого формата пропускаются"""
+    try:
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and 'fingerprint' in entry:
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def aggregate(entries, view=None):
+    """Формы запросов с числом повторов, временем и последним планом"""
+    shapes = {}
+    for entry in entries:
+        if view and entry.get('view') != view:
+            continue
+        shape = shapes.get(entry['fingerprint'])
+        if shape is None:
+            shape = shapes[entry['fingerprint']] = {
+                'fingerprint': entry['fingerprint'],
+                'sql': entry['sql'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'views': Counter(),
+                'params': None,
+                'plan': None,
+            }
+        shape['count'] += 1
+        shape['total_ms'] += entry['ms']
+        if entry['ms'] >= shape['max_ms']:
+            # Параметры самого медленного повтора - с ними проще воспроизвести
+            shape['max_ms'] = entry['ms']
+            shape['params'] = entry.get('params')
+        shape['views'][entry.get('view') or '-'] += 1
+        if entry.get('plan'):
+            shape['plan'] = entry['plan']
+    return list(shapes.values())
@@ -0,0 +1,89 @@
+# moneta_veritas/static_storage.py
+"""
+Хранилище статики для продакшена.
+
+collectstatic записывает файлы с хешем содержимого в имени (через
+staticfiles.json) и рядом - сжатые варианты .gz и .br, которые фронтовой
+прокси отдает напрямую (gzip_static / brotli_static в nginx).
+Пакет brotli обязателен для сборки (requirements.txt): без него
+collectstatic завершается ошибкой, а не собирает статику без .br.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    # Модуль импортируется и без brotli (настройки, тесты с DEBUG);
+    # сборка статики без него невозможна - см. post_process
+    brotli = None
+
+# Расширения, которые имеет смысл сжимать (картинки уже сжаты)
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico')
+
+# Файлы меньше этого размера не сжимаются: выигрыш меньше заголовков
+MIN_COMPRESS_SIZE = 256
+
+
+def compress_gzip(data):
+    # mtime=0: одинаковое содержимое дает одинаковый архив
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+COMPRESSORS = {'.gz': compress_gzip, '.br': compress_brotli}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хешированные имена через манифест и заранее сжатые копии файлов"""
+
+    # Файл, которого нет в манифесте, отдается по исходному имени
+    manifest_strict = False
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def convert(matchobj):
+            try:
+                return converter(matchobj)
+            except ValueError:
+                # Ссылка на файл, которого нет в сборке (bootstrap.min.css.map)
+                return matchobj['matched']
+
+        return convert
+
+    def post_process(self, paths, dry_run=False, **options):
+        if brotli is None and not dry_run:
+            raise ImproperlyConfigured(
+                'Для сборки статики нужен пакет brotli (pip install -r requirements.txt): '
+                'без него не будет сжатых копий .br'
+            )
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths)
+        names.update(self.hashed_files.get(self.hash_key(self.clean_name(name))) for name in paths)
+        for name in sorted(filter(None, names)):
+            if name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        """Пишет сжатые варианты файла, если они меньше оригинала"""
+        with self.open(name) as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compressor in COMPRESSORS.items():
+            compressed = compressor(data)
+            if len(compressed) >= len(data):
+                continue
+            target = name + suffix
+            if self.exists(target):
+                self.delete(target)
+            self._save(target, ContentFile(compressed))
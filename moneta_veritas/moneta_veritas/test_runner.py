@@ -0,0 +1,73 @@
+# moneta_veritas/test_runner.py
+"""
+Тестовый раннер проекта: к обычным тестам добавляет проверку бюджетов
+SQL-запросов страниц (catalog/query_budgets.py).
+
+Проверка включается при полном прогоне (manage.py test без аргументов)
+и по флагу --query-budgets при запуске отдельных тестов; отключается
+флагом --no-query-budgets. Число запросов проверяется всегда, а время
+SQL - только с явным --query-budgets: на медленной или загруженной
+машине оно превышает бюджет без изменений в коде.
+
+Строки лога запросов (moneta_veritas.requests) в тестах не пишутся,
+журнал медленных запросов выключен (slow_queries.disabled()).
+"""
+import logging
+
+from django.test.runner import DiscoverRunner
+
+from . import instrumentation, slow_queries
+
+BUDGET_TESTS = 'catalog.query_budgets.QueryBudgetTest'
+
+
+class QueryBudgetRunner(DiscoverRunner):
+
+    def __init__(self, query_budgets=None, **kwargs):
+        super().__init__(**kwargs)
+        self.query_budgets = query_budgets
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--query-budgets',
+            action='store_true',
+            default=None,
+            help='Проверить бюджеты SQL-запросов страниц (и время SQL) и при запуске отдельных тестов'
+        )
+        parser.add_argument(
+            '--no-query-budgets',
+            action='store_false',
+            dest='query_budgets',
+            help='Не проверять бюджеты SQL-запросов страниц'
+        )
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        logging.getLogger('moneta_veritas.requests').setLevel(logging.WARNING)
+        self.slow_query_log = slow_queries.disabled()
+        self.slow_query_log.enable()
+        if self.query_budgets:
+            from catalog.query_budgets import QueryBudgetTest
+
+            QueryBudgetTest.enforce_sql_time = True
+
+    def teardown_test_environment(self, **kwargs):
+        self.slow_query_log.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def setup_databases(self, **kwargs):
+        old_config = super().setup_databases(**kwargs)
+        # Тестовая база открыта до загрузки middleware: счетчик SQL ставится явно
+        instrumentation.install_query_wrapper()
+        return old_config
+
+    def build_suite(self, test_labels=None, **kwargs):
+        test_labels = list(test_labels or [])
+        enabled = self.query_budgets if self.query_budgets is not None else not test_labels
+        if enabled:
+            # Без меток раннер ищет тесты во всем проекте ('.'), метку бюджетов
+            # добавляем к ней; модуль не называется test*.py и сам не находится
+            test_labels = (test_labels or ['.']) + [BUDGET_TESTS]
+        return super().build_suite(test_labels, **kwargs)
@@ -3,7 +3,10 @@ from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
+from catalog.storage import serve_media
 from homepage import views
+from moneta_veritas import profiling
+from moneta_veritas.metrics import metrics_view
 import mimetypes
 
 if settings.DEBUG:
@@ -15,12 +18,22 @@ urlpatterns = [
     path('', include('homepage.urls', namespace='homepage')),
     path('about/', include('about.urls', namespace='about')),
     path('catalog/', include('catalog.urls', namespace='catalog')),
+    # JSON API только для чтения (catalog/api.py)
+    path('api/', include('catalog.api_urls', namespace='api')),
     path('my-collection/', include('usercollections.urls', namespace='usercollections')),  # Новый путь
     path('auth/', include('django.contrib.auth.urls')),
     path('auth/signup/', views.SignUp.as_view(), name='signup'),
+    # Профили запросов (moneta_veritas/profiling.py) - до admin.site.urls,
+    # иначе адреса перехватит админка
+    path('admin/profiles/', profiling.profile_list, name='profiles'),
+    path('admin/profiles/<str:profile_id>/', profiling.profile_detail, name='profile'),
+    path('admin/profiles/<str:profile_id>.<str:extension>', profiling.profile_download, name='profile_download'),
     path('admin/', admin.site.urls),
+    # Метрики Prometheus: персоналу, с METRICS_ALLOWED_IPS и по METRICS_TOKEN
+    path('internal/metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Файлы контентно-адресуемого хранилища отдаются с Cache-Control: immutable
+    urlpatterns += static(settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,48 @@
+# moneta_veritas/urls_async.py
+"""
+URLconf для запросов через ASGI (см. moneta_veritas/middleware.py).
+
+Маршруты и их имена те же, что в urls.py, но читающие страницы каталога
+и главная заменены асинхронными представлениями.
+"""
+from django.urls import URLPattern, URLResolver
+
+from catalog import async_views
+from homepage import views as homepage_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+# Полное имя маршрута -> async-представление
+ASYNC_VIEWS = {
+    'homepage:index': homepage_views.async_index,
+    'catalog:catalog_detail': async_views.CatalogDetailView.as_view(),
+    'catalog:coin_list': async_views.CoinListView.as_view(),
+    'catalog:banknote_list': async_views.BanknoteListView.as_view(),
+    'catalog:news_list': async_views.NewsListView.as_view(),
+    'catalog:news_detail': async_views.NewsDetailView.as_view(),
+}
+
+
+def replace_views(patterns, namespace=None):
+    """Копия маршрутов с подставленными async-представлениями"""
+    result = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            result.append(URLResolver(
+                pattern.pattern,
+                replace_views(pattern.url_patterns, pattern.namespace or namespace),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            ))
+            continue
+        name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+        view = ASYNC_VIEWS.get(name)
+        if view is None:
+            result.append(pattern)
+        else:
+            result.append(URLPattern(pattern.pattern, view, pattern.default_args, pattern.name))
+    return result
+
+
+urlpatterns = replace_views(sync_urlpatterns)
@@ -1,3 +1,29 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from catalog.models import Banknote, Coin, Country
+
+User = get_user_model()
+
+
+class AddToCollectionQueriesTest(TestCase):
+    """Страница добавления в коллекцию не делает запрос на каждую карточку"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='collector', password='password')
+        russia = Country.objects.create(title="Россия")
+        for number in range(6):
+            author = User.objects.create(username=f'author{number}')
+            Coin.objects.create(name=f"Монета {number}", country=russia, denomination="1", author=author)
+            Banknote.objects.create(name=f"Банкнота {number}", country=russia, denomination="10", author=author)
+
+    def test_authors_loaded_with_items(self):
+        """Авторы карточек читаются одним JOIN вместе с предметами"""
+        # Arrange
+        self.client.force_login(self.user)
+
+        # Act & Assert
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('usercollections:add_to_collection'))
+        self.assertContains(response, "author5")
@@ -44,12 +44,12 @@ class AddToCollectionView(LoginRequiredMixin, TemplateView):
         coins = Coin.objects.filter(
             Q(is_published=True) |
             Q(author=self.request.user)
-        ).exclude(id__in=coin_ids).order_by('-created_at')
+        ).exclude(id__in=coin_ids).select_related('author').order_by('-created_at')
 
         banknotes = Banknote.objects.filter(
             Q(is_published=True) |
             Q(author=self.request.user)
-        ).exclude(id__in=banknote_ids).order_by('-created_at')
+        ).exclude(id__in=banknote_ids).select_related('author').order_by('-created_at')
 
         # Пагинация для монет
         coin_page = self.request.GET.get('coin_page', 1)